@@ -5,6 +5,12 @@ import streamlit as st
 import plotly.graph_objects as go
 import numpy as np
 import pandas as pd
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from report import read_report
 
 
 class Generator:
@@ -36,37 +42,9 @@ def _is_end_of_file(line):
 
 
 def _load_r60_data(r60_file):
-    data = {}
-    with open(r60_file, 'r', encoding='ISO-8859-1') as file:
-        lines = file.readlines()
-        # Extract RAP Total
-        rap_total_str = lines[7][88:106].replace(".", "").replace(",", ".")
-        data["RAP Total"] = float(rap_total_str) if rap_total_str.strip() not in ["", "------"] else None
-        # Extract MUST Geração
-        must_ger_str = lines[8][15:26].replace(".", "").replace(",", ".")
-        data["MUST Geração"] = float(must_ger_str) if must_ger_str.strip() not in ["", "------"] else None
-        # Extract MUST Consumo_P
-        must_cp_str = lines[8][55:66].replace(".", "").replace(",", ".")
-        data["MUST Consumo_P"] = float(must_cp_str) if must_cp_str.strip() not in ["", "------"] else None
-        # Extract MUST Consumo_FP
-        must_fp_str = lines[8][75:86].replace(".", "").replace(",", ".")
-        data["MUST Consumo_FP"] = float(must_fp_str) if must_fp_str.strip() not in ["", "------"] else None
-        # Extract TEU
-        teu_values = []
-        for i in range(17, 20):
-            if i < len(lines):
-                teu_str = lines[i][8:14].replace(",", ".")
-                teu_values.append(float(teu_str) if teu_str.strip() not in ["", "------"] else None)
-            else:
-                teu_values.append(None)
-        # Add TEUcf if it's missing
-        if len(lines) < 20:
-            teu_values.append(None)
-        data["TEUg"] = teu_values[0]
-        data["TEUcp"] = teu_values[1]
-        data["TEUcf"] = teu_values[2]
-
-    return data
+    cycle = read_report(Path(r60_file), 0)
+    return {"RAP Total": cycle.rap, "MUST Geração": cycle.mustg, "MUST Consumo_P": cycle.mustp,
+            "MUST Consumo_FP": cycle.mustfp, "TEUg": cycle.teug, "TEUcp": cycle.teup, "TEUcf": cycle.teufp}
 
 
 def load_base(DB_PATH):
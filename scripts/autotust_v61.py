@@ -2,6 +2,13 @@ import os
 import csv
 import subprocess
 import argparse
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from report import read_report
+
 
 class Generator:
     def __init__(self):
@@ -44,38 +51,8 @@ def _is_end_of_file(line):
 
 
 def _load_r61_data(r61_file):
-    data = {}
-    with open(r61_file, 'r', encoding='ISO-8859-1') as file:
-        lines = file.readlines()
-        # Extract rap
-        rap_total_str = lines[7][88:106].replace(".", "").replace(",", ".")
-        data["rap"] = float(rap_total_str) if rap_total_str.strip() not in ["", "------"] else None
-        # Extract mustg
-        must_ger_str = lines[8][15:26].replace(".", "").replace(",", ".")
-        data["mustg"] = float(must_ger_str) if must_ger_str.strip() not in ["", "------"] else None
-        # Extract mustp
-        must_cp_str = lines[8][55:66].replace(".", "").replace(",", ".")
-        data["mustp"] = float(must_cp_str) if must_cp_str.strip() not in ["", "------"] else None
-        # Extract mustfp
-        must_fp_str = lines[8][75:86].replace(".", "").replace(",", ".")
-        data["mustfp"] = float(must_fp_str) if must_fp_str.strip() not in ["", "------"] else None
-        # Extract TEU
-        teu_values = []
-        for i in range(17, 20):
-            if i < len(lines):
-                teu_str = lines[i][7:14].replace(",", ".")
-                teu_values.append(float(teu_str) if teu_str.strip().strip('-') != "" else None)
-
-            else:
-                teu_values.append(None)
-
-        if len(lines) < 20:
-            teu_values.append(None)
-        data["teug"] = teu_values[0]
-        data["teup"] = teu_values[1]
-        data["teufp"] = teu_values[2]
-
-    return data
+    cycle = read_report(Path(r61_file), 0)
+    return {key: getattr(cycle, key) for key in ("rap", "mustg", "mustp", "mustfp", "teug", "teup", "teufp")}
 
 
 def load_dc(DB_PATH, year):
@@ -0,0 +1,63 @@
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import autotust
+from models import Database
+from synthetic_base import write_synthetic_base
+
+
+class LinearScanDatabase(Database):
+    """Database with the previous O(n) lookups, kept for comparison."""
+
+    def get_generator_by_name(self, name):
+        return next((g for g in self.generators if g.name == name), None)
+
+    def get_bus_by_name(self, name):
+        return next((b for b in self.buses if b.name == name), None)
+
+
+def load_cycles(database, case_path, years):
+    for year in years:
+        autotust.load_ger_file(case_path / f"{year}-{year + 1}.GER", year, database)
+        autotust.load_tuh_file(case_path / f"{year}-{year + 1}.TUH", year, database)
+        autotust.load_nos_file(case_path / f"{year}-{year + 1}.NOS", year, database)
+    return database
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<45s} {time.perf_counter() - start:8.2f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark linear vs indexed Database lookups")
+    parser.add_argument("--generators", type=int, default=20000)
+    parser.add_argument("--buses", type=int, default=5000)
+    parser.add_argument("--cycles", type=int, default=1, help="Cycles loaded in the per-cycle comparison")
+    args = parser.parse_args()
+
+    logging.getLogger("autotust").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        case_path = write_synthetic_base(tmp, n_generators=args.generators, n_buses=args.buses)
+        years = range(2024, 2024 + args.cycles)
+        print(f"Synthetic base: {args.generators} generators, {args.buses} buses")
+
+        linear = timed(f"linear scan, {args.cycles} cycle(s)", load_cycles, LinearScanDatabase(), case_path, years)
+        indexed = timed(f"indexed, {args.cycles} cycle(s)", load_cycles, Database(), case_path, years)
+        assert [g.name for g in linear.generators] == [g.name for g in indexed.generators]
+        assert [g.tust for g in linear.generators] == [g.tust for g in indexed.generators]
+
+        timed("indexed, full load_base 2024-2032", autotust.load_base, case_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import autotust
+import fixedwidth
+from synthetic_base import write_synthetic_base
+
+
+def _is_end_of_file(line):
+    return line[:2].strip() == "X"
+
+
+def _is_comment(line):
+    return len(line) <= 1 or line[0] == "("
+
+
+def ger_line_loop(file_path):
+    records = []
+    with open(file_path, "r") as file:
+        for line in file:
+            if _is_comment(line):
+                continue
+            cegnucleo = int(line[55:60]) if line[55:60].strip().isdigit() else line[55:60].strip()
+            records.append((line[0:32].strip(), line[52:62].strip(), cegnucleo, line[42:43].strip(),
+                            line[44:45].strip(), float(line[32:41].strip()), int(line[70:75].strip())))
+    return records
+
+
+def tuh_line_loop(file_path):
+    records = []
+    with open(file_path, "r") as file:
+        for line_number, line in enumerate(file, 1):
+            if line_number <= 11 or _is_comment(line) or _is_end_of_file(line):
+                continue
+            records.append((line[3:35].strip(), float(line[96:102]), line[51:53].strip()))
+    return records
+
+
+def nos_line_loop(file_path):
+    records = []
+    with open(file_path, "r") as file:
+        for line_number, line in enumerate(file, 1):
+            if _is_end_of_file(line):
+                break
+            if line_number <= 11 or _is_comment(line):
+                continue
+            tust = float(line[37:43].strip()) if line[37:43].strip() else 0
+            records.append((line[8:21].strip(), int(line[2:7].strip()), line[8:20].strip(), tust))
+    return records
+
+
+def ger_columns(file_path):
+    table = fixedwidth.read_ger(file_path, ("name", "ceg", "cegnucleo", "d", "s", "must", "bus01"))
+    return fixedwidth.parse_float(table["must"]), fixedwidth.parse_int(table["bus01"])
+
+
+def tuh_columns(file_path):
+    table = fixedwidth.read_tuh(file_path, ("name", "tust", "uf"))
+    return fixedwidth.parse_float(table["tust"])
+
+
+def nos_columns(file_path):
+    table = fixedwidth.read_nos(file_path)
+    return fixedwidth.parse_int(table["num"]), fixedwidth.parse_float(table["tust"], blank=0)
+
+
+def best_of(repeats, func, *args):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark line loops vs the vectorized fixed-width reader")
+    parser.add_argument("--lines", type=int, default=150000, help="Data lines per file")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.getLogger("autotust").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        case_path = write_synthetic_base(tmp, n_generators=args.lines, n_buses=min(args.lines, 99999),
+                                         years=[2024])
+        cases = [
+            ("GER", ger_line_loop, ger_columns, autotust._read_ger_records),
+            ("TUH", tuh_line_loop, tuh_columns, autotust._read_tuh_records),
+            ("NOS", nos_line_loop, nos_columns, autotust._read_nos_records),
+        ]
+        # "columns" is the bulk extraction into arrays; "records" also builds the
+        # Python tuples that load_base merges into the Database
+        print(f"{'file':<6s}{'lines':>10s}{'line loop':>12s}{'columns':>12s}{'records':>12s}")
+        for ext, line_loop, columns, records in cases:
+            file_path = case_path / f"2024-2025.{ext}"
+            old_time, old_records = best_of(args.repeats, line_loop, file_path)
+            column_time, _ = best_of(args.repeats, columns, file_path)
+            record_time, new_records = best_of(args.repeats, records, file_path)
+            assert old_records == new_records, f"{ext} records differ"
+            print(f"{ext:<6s}{len(old_records):>10d}{old_time:>11.3f}s{column_time:>11.3f}s{record_time:>11.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,251 +1,200 @@
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-import csv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fixedwidth import GER_LAYOUT, NOS_LAYOUT, TUH_LAYOUT, read_fixed_width
 
 
 source = ["ONS","ONS","ONS","ONS","EPE","EPE","EPE","EPE","EPE"]
+CYCLES = [f"{year}-{year + 1}" for year in range(2024, 2033)]
+FORMATS = ("csv", "parquet")
+
+DBAR_COLUMNS = ["NUMBER", "OP", "TYPE", "NAME", "VOLT", "PHASE", "MUST", "UF", "SS"]
+DLIN_COLUMNS = ["DE", "NOME_DE", "PARA", "NOME_PARA", "CIRC", "EST"]
+
+# Colunas exportadas pelo conversor; onde diferem do leitor do nucleo valem as posicoes do convert_base.jl
+GER_COLUMNS = {**GER_LAYOUT, "ceg": (53, 61)}
+TUH_COLUMNS = {"name": (3, 33), "ceg": TUH_LAYOUT["ceg"], "tust": TUH_LAYOUT["tust_total"]}
+NOS_COLUMNS = {"num": NOS_LAYOUT["num"], "name": NOS_LAYOUT["name"], "tustb": NOS_LAYOUT["tustb"]}
+
+
+def _write(df, tust_path, prefix, cycle, fmt="csv"):
+    output_path = tust_path + "\\" + prefix + "_" + cycle + "." + fmt
+    if fmt == "parquet":
+        df.to_parquet(output_path, index=False)
+    else:
+        df.to_csv(output_path, index=False)
+
+
+def read_lines(path, layout, first_line, lines_after):
+    """Unstripped columns of lines first_line..(total - lines_after), 1-based, with their text length."""
+    table = read_fixed_width(path, layout, raw=True)
+    total = len(table["line_number"])
+    rows = (table["line_number"] >= first_line) & (table["line_number"] <= total - lines_after)
+    return {column: values[rows] for column, values in table.items()}
+
+
+def _is_data_line(line):
+    return len(line) >= 78 and line[0] != "("
+
+
+def _dbar_row(line):
+    return [line[0:5], line[6:7], line[7:8], line[10:21], line[24:28], line[28:32], line[32:37], line[73:76],
+            line[76:78]]
+
+
+def read_dc_rows(dc_path):
+    """Read the DBAR and DLIN rows of a .dc file in a single pass.
+
+    Keeps the row selection of the original converter: DBAR rows start at the
+    fourth line, DLIN rows two lines after "DLIN", and the line just before each
+    "99999" is left out. A section without its "99999" gives no rows.
+    """
+    dbar_rows, dlin_rows = [], []
+    dbar_open, dlin_open = True, False
+    dbar_pending, dlin_pending = None, None
+    dlin_start = None
+
+    with open(dc_path, "r") as aneel_input:
+        for i, line in enumerate(aneel_input):
+            if dbar_open:
+                if i >= 1 and line[0:5] == "99999":
+                    dbar_open = False
+                    dbar_pending = None
+                elif i >= 3:
+                    if dbar_pending is not None and _is_data_line(dbar_pending):
+                        dbar_rows.append(_dbar_row(dbar_pending))
+                    dbar_pending = line
+
+            if dlin_start is None:
+                if i >= 1 and line[0:4] == "DLIN":
+                    dlin_start, dlin_open = i, True
+                continue
+            if dlin_open:
+                if line[0:5] == "99999":
+                    dlin_open = False
+                    dlin_pending = None
+                elif i >= dlin_start + 2:
+                    if dlin_pending is not None and _is_data_line(dlin_pending):
+                        dlin_rows.append((dlin_pending[0:5], dlin_pending[10:15], dlin_pending[15:17],
+                                          dlin_pending[17:18]))
+                    dlin_pending = line
+
+    if dbar_open:
+        dbar_rows = []
+    if dlin_open:
+        dlin_rows = []
+    return dbar_rows, dlin_rows
+
+
+def convert_dc_cycle(tust_path, cycle, cycle_source, fmt="csv"):
+    aneel_example_path = tust_path + "\\" + cycle + ".dc"
+    dbar_rows, dlin_rows = read_dc_rows(aneel_example_path)
+
+    df_dc = pd.DataFrame(dbar_rows, columns=DBAR_COLUMNS, dtype=object)
+    df_dc["CYCLE"] = cycle[0:4]
+    df_dc["SOURCE"] = cycle_source
+    _write(df_dc, tust_path, "dc", cycle, fmt)
+
+    # Nomes resolvidos por dicionario; a primeira barra com o numero vale, como no .loc[...].values[0]
+    names = {}
+    for row in dbar_rows:
+        names.setdefault(row[0], row[3])
+    df_dlin = pd.DataFrame([(de, names.get(de, ""), para, names.get(para, ""), circ, est)
+                            for de, para, circ, est in dlin_rows], columns=DLIN_COLUMNS, dtype=object)
+    _write(df_dlin, tust_path, "dlin", cycle, fmt)
+
+
+def convert_ger_cycle(tust_path, cycle, cycle_source, fmt="csv"):
+    ger_example_path = tust_path + "\\" + cycle + ".ger"
+    ger = read_lines(ger_example_path, GER_COLUMNS, 2, 1)
+    data = (ger["line_length"] >= 75) & ~np.char.startswith(ger["name"], "(")
+    ger = {column: values[data] for column, values in ger.items()}
+    ger["name"] = np.char.rstrip(ger["name"])
+    rows = len(ger["name"])
+
+    df_ger = pd.DataFrame({"CEG": ger["ceg"], "NOME": ger["name"], "TYPE": ger["type"], "MUST": ger["must"],
+                           "C": ger["c"], "D": ger["d"], "O": ger["o"], "S": ger["s"], "I": ger["i"],
+                           "DISCOUNT": ger["discount"], "MONTH": ger["month"], "ONS": ger["ons"],
+                           "E": ger["e"], "AUX": ger["aux"], "TRANS": ger["trans"], "BUS01": ger["bus01"],
+                           "CYCLE": [cycle[0:4]] * rows, "SOURCE": [cycle_source] * rows})
+    _write(df_ger, tust_path, "ger", cycle, fmt)
+
+
+def convert_tuh_cycle(tust_path, cycle, cycle_source, fmt="csv"):
+    aneel_example_path = tust_path + "\\" + cycle + ".tuh"
+    tuh = read_lines(aneel_example_path, TUH_COLUMNS, 12, 2)
+    tuh["name"] = np.char.rstrip(tuh["name"])
+    rows = len(tuh["name"])
+
+    df_tuh = pd.DataFrame({"CEG": tuh["ceg"], "NAME": tuh["name"], "TUST": tuh["tust"],
+                           "CYCLE": [cycle[0:4]] * rows, "SOURCE": [cycle_source] * rows})
+    _write(df_tuh, tust_path, "tuh", cycle, fmt)
+
+
+def convert_nos_cycle(tust_path, cycle, cycle_source, fmt="csv"):
+    aneel_example_path = tust_path + "\\" + cycle + ".nos"
+    nos = read_lines(aneel_example_path, NOS_COLUMNS, 13, 10)
+    rows = len(nos["num"])
+
+    df_nos = pd.DataFrame({"NUMBER": nos["num"], "NAME": nos["name"], "TUSTB": nos["tustb"],
+                           "CYCLE": [cycle[0:4]] * rows, "SOURCE": [cycle_source] * rows})
+    _write(df_nos, tust_path, "nos", cycle, fmt)
+
+
+def source_of(cycle):
+    """Source (ONS or EPE) of a cycle, by its position in CYCLES."""
+    return source[CYCLES.index(cycle)]
+
+
+def convert_ger(tust_path, cycles, fmt="csv"):
+    for cycle in cycles:
+        convert_ger_cycle(tust_path, cycle, source_of(cycle), fmt)
+
+
+def convert_dc(tust_path, cycles, fmt="csv"):
+    for cycle in cycles:
+        convert_dc_cycle(tust_path, cycle, source_of(cycle), fmt)
+
+
+def convert_tuh(tust_path, cycles, fmt="csv"):
+    for cycle in cycles:
+        convert_tuh_cycle(tust_path, cycle, source_of(cycle), fmt)
+
+
+def convert_nos(tust_path, cycles, fmt="csv"):
+    for cycle in cycles:
+        convert_nos_cycle(tust_path, cycle, source_of(cycle), fmt)
+
+
+def convert_cycle(tust_path, cycle, cycle_source, fmt="csv"):
+    convert_ger_cycle(tust_path, cycle, cycle_source, fmt)
+    convert_dc_cycle(tust_path, cycle, cycle_source, fmt)
+    convert_tuh_cycle(tust_path, cycle, cycle_source, fmt)
+    convert_nos_cycle(tust_path, cycle, cycle_source, fmt)
+    return cycle
 
 
-def convert_ger(tust_path, cycles):
-    for cycle in range(len(cycles)):
-        ger_example_path = tust_path + "\\" + cycles[cycle] + ".ger"
-        with open(ger_example_path, "r") as ger_input:
-            ger_lines = ger_input.readlines()
-
-        final_line_index = len(ger_lines)
-
-        col_type = []
-        col_name = []
-        col_must = []
-        col_c = []
-        col_d = []
-        col_o = []
-        col_s = []
-        col_i = []
-        col_discount = []
-        col_month = []
-        col_ceg = []
-        col_ons = []
-        col_e = []
-        col_aux = []
-        col_trans = []
-        col_bus01 = []
-        col_cycle = []
-        col_source = []
-        for i in range(1, final_line_index-1):
-            line = ger_lines[i]
-            if len(line) >= 75 and line[0] != "(":
-                type_val = line[0:3]
-                name = line[0:32].rstrip()
-                must = line[32:41]
-                c = line[41:42]
-                d = line[42:43]
-                o = line[43:44]
-                s = line[44:45]
-                i_val = line[45:46]
-                discount = line[46:51]
-                month = line[51:53]
-                ceg = line[53:61]
-                ons = line[61:66]
-                e = line[66:67]
-                aux = line[67:68]
-                trans = line[68:69]
-                bus01 = line[70:75]
-                col_type.append(type_val)
-                col_name.append(name)
-                col_must.append(must)
-                col_c.append(c)
-                col_d.append(d)
-                col_o.append(o)
-                col_s.append(s)
-                col_i.append(i_val)
-                col_discount.append(discount)
-                col_ceg.append(ceg)
-                col_month.append(month)
-                col_ons.append(ons)
-                col_e.append(e)
-                col_aux.append(aux)
-                col_trans.append(trans)
-                col_bus01.append(bus01)
-                col_cycle.append(cycles[cycle][0:4])
-                col_source.append(source[cycle])
-        
-        df_ger = pd.DataFrame({"CEG": col_ceg, "NOME": col_name, "TYPE": col_type, "MUST": col_must, "C": col_c,
-                               "D": col_d, "O": col_o, "S": col_s, "I": col_i, "DISCOUNT": col_discount,
-                               "MONTH": col_month, "ONS": col_ons, "E": col_e, "AUX": col_aux, "TRANS": col_trans,
-                               "BUS01": col_bus01, "CYCLE": col_cycle, "SOURCE": col_source})
-        
-        csv_path = tust_path + "\\ger_" + cycles[cycle] + ".csv"
-        df_ger.to_csv(csv_path, index=False)
-
-
-def convert_dc(tust_path, cycles):
-    for cycle in range(len(cycles)):
-        aneel_example_path = tust_path + "\\" + cycles[cycle] + ".dc"
-        with open(aneel_example_path, "r") as aneel_input:
-            aneel_lines = aneel_input.readlines()
-
-        final_line_index = 0
-        for i in range(1, len(aneel_lines)):
-            line = aneel_lines[i]
-            if len(line) >= 5 and line[0:5] == "99999":
-                final_line_index = i
-                break
-
-        col_number = []
-        col_op = []
-        col_type = []
-        col_name = []
-        col_volt = []
-        col_phase = []
-        col_must = []
-        col_uf = []
-        col_ss = []
-        col_cycle = []
-        col_source = []
-        for i in range(3, final_line_index-1):
-            line = aneel_lines[i]
-            if len(line) >= 78 and line[0] != "(":
-                number = line[0:5]
-                op = line[6:7]
-                type_val = line[7:8]
-                name = line[10:21]
-                volt = line[24:28]
-                phase = line[28:32]
-                must = line[32:37]
-                uf = line[73:76]
-                ss = line[76:78]
-                col_number.append(number)
-                col_op.append(op)
-                col_type.append(type_val)
-                col_name.append(name)
-                col_volt.append(volt)
-                col_phase.append(phase)
-                col_must.append(must)
-                col_uf.append(uf)
-                col_ss.append(ss)
-                col_cycle.append(cycles[cycle][0:4])
-                col_source.append(source[cycle])
-
-        df_dc = pd.DataFrame({"NUMBER": col_number, "OP": col_op, "TYPE": col_type, "NAME": col_name, "VOLT": col_volt,
-                              "PHASE": col_phase, "MUST": col_must, "UF": col_uf, "SS": col_ss, "CYCLE": col_cycle,
-                              "SOURCE": col_source})
-        
-        csv_path = tust_path + "\\dc_" + cycles[cycle] + ".csv"
-        df_dc.to_csv(csv_path, index=False)
-
-        first_line_index = 0
-        for i in range(1, len(aneel_lines)):
-            line = aneel_lines[i]
-            if line[0:4] == "DLIN":
-                first_line_index = i
-                break
-
-        final_line_index = 0
-        for i in range(first_line_index, len(aneel_lines)):
-            line = aneel_lines[i]
-            if len(line) >= 5 and line[0:5] == "99999":
-                final_line_index = i
-                break
-
-        col_de = []
-        col_nome_de = []
-        col_para = []
-        col_nome_para = []
-        col_circ = []
-        col_est = []
-
-        for i in range(first_line_index+2, final_line_index-1):
-            line = aneel_lines[i]
-            if len(line) >= 78 and line[0] != "(":
-                de = line[0:5]
-                nome_de = df_dc.loc[df_dc["NUMBER"] == de, "NAME"].values[0]
-                para = line[10:15]
-                nome_para = df_dc.loc[df_dc["NUMBER"] == para, "NAME"].values[0]
-                circ = line[15:17]
-                est = line[17:18]
-                col_de.append(de)
-                col_nome_de.append(nome_de)
-                col_para.append(para)
-                col_nome_para.append(nome_para)
-                col_circ.append(circ)
-                col_est.append(est)
-
-        df_dlin = pd.DataFrame({"DE": col_de, "NOME_DE": col_nome_de, "PARA": col_para, "NOME_PARA": col_nome_para,
-                                "CIRC": col_circ, "EST": col_est})
-        
-        csv_path = tust_path + "\\dlin_" + cycles[cycle] + ".csv"
-        df_dlin.to_csv(csv_path, index=False)
-
-
-def convert_tuh(tust_path, cycles):
-    for cycle in range(len(cycles)):
-        aneel_example_path = tust_path + "\\" + cycles[cycle] + ".tuh"
-        with open(aneel_example_path, "r") as aneel_input:
-            aneel_lines = aneel_input.readlines()
-
-        final_line_index = len(aneel_lines)-1
-
-        col_name = []
-        col_ceg = []
-        col_tust = []
-        col_cycle = []
-        col_source = []
-        for i in range(11, final_line_index-1):
-            line = aneel_lines[i]
-            name = line[3:33].rstrip()
-            ceg = line[36:43]
-            tust = line[126:132]
-            col_name.append(name)
-            col_ceg.append(ceg)
-            col_tust.append(tust)
-            col_cycle.append(cycles[cycle][0:4])
-            col_source.append(source[cycle])
-
-        df_tuh = pd.DataFrame({"CEG": col_ceg, "NAME": col_name, "TUST": col_tust, "CYCLE": col_cycle,
-                               "SOURCE": col_source})
-        
-        csv_path = tust_path + "\\tuh_" + cycles[cycle] + ".csv"
-        df_tuh.to_csv(csv_path, index=False)
-
-
-def convert_nos(tust_path, cycles):
-    for cycle in range(len(cycles)):
-        aneel_example_path = tust_path + "\\" + cycles[cycle] + ".nos"
-        with open(aneel_example_path, "r") as aneel_input:
-            aneel_lines = aneel_input.readlines()
-
-        final_line_index = len(aneel_lines)-9
-
-        col_number = []
-        col_name = []
-        col_tustb = []
-        col_cycle = []
-        col_source = []
-
-        for i in range(12, final_line_index-1):
-            line = aneel_lines[i]
-            number = line[2:7]
-            name = line[8:20]
-            tustb = line[34:43]
-            col_number.append(number)
-            col_name.append(name)
-            col_tustb.append(tustb)
-            col_cycle.append(cycles[cycle][0:4])
-            col_source.append(source[cycle])
-
-        df_nos = pd.DataFrame({"NUMBER": col_number, "NAME": col_name, "TUSTB": col_tustb, "CYCLE": col_cycle,
-                               "SOURCE": col_source})
-        
-        csv_path = tust_path + "\\nos_" + cycles[cycle] + ".csv"
-        df_nos.to_csv(csv_path, index=False)
-
-
-def run(tust_path, cycles):
-    convert_ger(tust_path, cycles)
-    convert_dc(tust_path, cycles)
-    convert_tuh(tust_path, cycles)
-    convert_nos(tust_path, cycles)
+def run(tust_path, cycles=CYCLES, workers=None, fmt="csv"):
+    """Convert every cycle, one cycle per worker process."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for cycle in executor.map(convert_cycle, repeat(tust_path), cycles, map(source_of, cycles),
+                                  repeat(fmt)):
+            print(f"{cycle} convertido")
 
 
 if __name__ == "__main__":
-	run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Convert the GER, DC, TUH and NOS files of a base to CSV or Parquet")
+    parser.add_argument("tust_path", type=str, help="Path to the base folder")
+    parser.add_argument("--cycles", nargs="+", default=CYCLES)
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("-f", "--format", choices=FORMATS, default="csv")
+    args = parser.parse_args()
+    run(args.tust_path, args.cycles, args.workers, args.format)
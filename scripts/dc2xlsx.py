@@ -1,6 +1,11 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 from openpyxl import Workbook
-import autotust as tust
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from network import load_network
 
 # INPUTS
 DB_PATH = r'D:\dev\auto_tust\cases\BasePSR_RedeEPE_2022'
@@ -12,12 +17,15 @@ yearly_data = []
 
 # ITERAÇÃO SOBRE OS ANOS
 for year in years:
-    buses = tust.load_dc(DB_PATH, year)
+    network = load_network(DB_PATH, year)
+    if network is None:
+        continue
+    adjacency = network.topology().adjacency_lists()
+    names = dict(zip(network.bus_numbers.tolist(), network.bus_names))
     rows = []
-    for bus in buses.values():
-        circuits = bus.circuits.get(year, [])
-        circuit_names = ", ".join([buses[num].name for num in circuits if num in buses])
-        row = [bus.num, bus.name, bus.area, circuit_names]
+    for num, area in zip(network.bus_numbers.tolist(), network.areas.tolist()):
+        circuit_names = ", ".join(names[neighbour] for neighbour in adjacency[num])
+        row = [num, names[num], area, circuit_names]
         rows.append(row)
 
     yearly_data.append({"year": year, "rows": rows})
@@ -35,4 +43,4 @@ for data in yearly_data:
         ws_year.append(row)
 
 wb.save(filename='outputs/dc2xlsx.xlsx')
-print(f"Excel file created")
\ No newline at end of file
+print(f"Excel file created")
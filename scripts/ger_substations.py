@@ -14,7 +14,6 @@ bus_must_data = {}
 # ITERAÇÃO SOBRE OS ANOS
 for year in years:
     generators, _ = tust.load_ger(DB_PATH, year)
-    buses = tust.load_dc(DB_PATH, year)
     total_must = 0
     bus_must = {}
     bus_gen_names = {barra: [] for barra in barras_de_interesse}
@@ -1,7 +1,16 @@
-import autotust_v61 as tust
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from autotust import nodal_jobs
+from scheduler import run_jobs
 
 #SEMPRE RODAR O SCRIPT COMO ADMINISTRADOR
 
+NODAL_PATH = Path(r"C:\Program Files (x86)\Nodal_V63")
+WORKERS = 4
+
 rap23 = [41244217.19, 42551207.39, 43105639.57, 46475182.88, 46449217.35, 47993366.19, 48134649.99, 48204543.25]
 pdr23 = [80, 70, 60, 50, 50, 50, 50, 50]
 pdr_alt1 = [100, 100, 100, 100, 100, 100, 100, 100]
@@ -13,7 +22,14 @@ usinas = [
     {'NOME': 'JAIBA', 'MUST': 500.00, 'COD': 2024, 'BUS01_ONS': 7716, 'BUS01_EPE': 38911},
 ]
 
+cycles = list(range(2024, 2032))
+jobs = []
 for usina in usinas:
     nome = str(usina['NOME'])
-    CASE_PATH = f'D:\\dev\\auto_tust\\cases\\BasePSR_RedeEPE_2022_{nome}'
-    tust.run_nodal61(CASE_PATH, rap23, pdr23)
\ No newline at end of file
+    CASE_PATH = Path(f'D:\\dev\\auto_tust\\cases\\BasePSR_RedeEPE_2022_{nome}')
+    jobs.extend(nodal_jobs(CASE_PATH, cycles, rap23, pdr23))
+
+# Todos os ciclos de todas as usinas rodam em paralelo, cada um em uma copia do Nodal
+results = run_jobs(jobs, NODAL_PATH, workers=WORKERS)
+for result in results:
+    print(f"{result.job}: {'OK' if result.ok else result.error}")
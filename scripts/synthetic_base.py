@@ -0,0 +1,94 @@
+import random
+from pathlib import Path
+
+TYPES = ["UHE", "UTE", "EOL", "UFV", "PCH"]
+UFS = ["MG", "SP", "BA", "CE", "RS", "PA", "GO", "PR", "RN", "PI"]
+HEADER_LINES = 11
+
+
+def _header(title):
+    lines = [f"( {title}\n"] + ["(\n"] * (HEADER_LINES - 1)
+    return "".join(lines)
+
+
+def _fixed_width(fields, width=80):
+    """Place (start, text) fields on a blank line."""
+    line = [" "] * width
+    for start, text in fields:
+        line[start:start + len(text)] = text
+    return "".join(line).rstrip() + "\n"
+
+
+def write_synthetic_dc(file_path, n_buses=5000, seed=0):
+    """Write a connected synthetic network with DBAR and DLIN sections."""
+    rng = random.Random(seed)
+    with open(file_path, "w") as file:
+        file.write("TITU\nSYNTHETIC NETWORK\nDBAR\n(Num)OETGb(   nome   )Gl( V)( A)( Pg)\n")
+        for num in range(1, n_buses + 1):
+            generation = rng.uniform(0, 900) if rng.random() < 0.3 else 0.0
+            load = rng.uniform(0, 300)
+            file.write(_fixed_width([(0, f"{num:5d}"), (6, "L"), (10, f"{'BUS' + str(num):12s}"),
+                                     (24, "1000"), (32, f"{generation:5.0f}"), (58, f"{load:5.0f}"),
+                                     (73, f"{rng.randrange(1, 28):3d}"), (76, f"{rng.randrange(1, 5):2d}")]))
+        file.write("99999\nDLIN\n(De )d O d(Pa )NcEP ( R% )( X% )\n")
+        # Mostly local connections, as in a real grid, plus a few long lines
+        edges = [(max(1, num - rng.randrange(1, 20)), num) for num in range(2, n_buses + 1)]
+        for _ in range(n_buses // 2):
+            from_bus = rng.randrange(1, n_buses)
+            span = rng.randrange(1, 50) if rng.random() < 0.95 else rng.randrange(1, n_buses)
+            edges.append((from_bus, min(n_buses, from_bus + span)))
+        edges = [(from_bus, to_bus) for from_bus, to_bus in edges if from_bus != to_bus]
+        for from_bus, to_bus in edges:
+            file.write(_fixed_width([(0, f"{from_bus:5d}"), (10, f"{to_bus:5d}"), (15, " 1"), (17, "L"),
+                                     (20, f"{rng.randrange(1, 200):6d}"), (26, f"{rng.randrange(50, 3000):6d}"),
+                                     (63, f"{rng.randrange(500, 3000):4d}")]))
+        file.write("99999\nFIM\n")
+
+
+def write_synthetic_base(case_path, n_generators=20000, n_buses=5000, years=range(2024, 2033), seed=0):
+    """Write a synthetic case folder with GER, TUH, R63, NOS and .dc files for benchmarking."""
+    case_path = Path(case_path)
+    case_path.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+
+    generators = []
+    for i in range(n_generators):
+        type_ = TYPES[i % len(TYPES)]
+        name = f"{type_} SYNTH {i:06d}"
+        ceg = f"{type_}{i % 100000:05d}.{i % 10}"
+        generators.append((name, ceg, rng.choice(UFS), rng.randrange(1, n_buses + 1)))
+
+    for year in years:
+        cycle = f"{year}-{year + 1}"
+
+        with open(case_path / f"{cycle}.GER", "w") as file:
+            file.write("( NOME                           MUST     CDOSI\n")
+            for name, ceg, _, bus in generators:
+                must = rng.uniform(1, 500)
+                file.write(f"{name:32s}{must:9.2f} N N   0   {ceg:10s}        {bus:5d}\n")
+
+        with open(case_path / f"{cycle}.TUH", "w") as file:
+            file.write(_header("TUST DAS USINAS"))
+            for name, ceg, uf, _ in generators:
+                tust = rng.uniform(1, 15)
+                file.write(f"   {name:32s}{ceg:16s}{uf:2s}{'':43s}{tust:6.2f}\n")
+            file.write(" X\n")
+
+        with open(case_path / f"{cycle}.NOS", "w") as file:
+            file.write(_header("TARIFAS NODAIS"))
+            for num in range(1, n_buses + 1):
+                tust = rng.uniform(1, 15)
+                file.write(f"  {num:5d} {'BUS' + str(num):12s}{'':17s}{tust:6.2f}\n")
+            file.write(" X\n")
+
+        write_synthetic_dc(case_path / f"{cycle}.dc", n_buses, seed=seed + year)
+
+        with open(case_path / f"{cycle}.R63", "w", encoding="ISO-8859-1") as file:
+            lines = ["\n"] * 20
+            lines[7] = f"{'':88s}{'41.244.217,19':>18s}\n"
+            lines[8] = f"{'':15s}{'100.000,00':>11s}{'':29s}{'90.000,00':>11s}{'':9s}{'80.000,00':>11s}\n"
+            for i in range(17, 20):
+                lines[i] = f"{'':7s}{'5,12':>7s}\n"
+            file.writelines(lines)
+
+    return case_path
@@ -1,10 +1,15 @@
-import autotust_v61 as tust
-import csv
+import sys
+from pathlib import Path
 
-ss = {'AP': 'N', 'AM': 'N', 'PA': 'N', 'RR': 'N', 'TO': 'N','MA': 'N', 
-    'AL': 'NE', 'BA': 'NE', 'CE': 'NE', 'PB': 'NE', 'PE': 'NE', 'PI': 'NE', 'RN': 'NE', 'SE': 'NE',
-    'ES': 'SE', 'MG': 'SE', 'RJ': 'SE', 'SP': 'SE', 'GO': 'SE', 'MS': 'SE', 'MT': 'SE', 'DF': 'SE', 'AC': 'SE', 'RO': 'SE',
-    'PR': 'S', 'RS': 'S', 'SC': 'S'}
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from autotust import load_base
+from columnar import BUS_MISSING
+from models import Candidate, INITIAL_CYCLE
+from resolve import resolve_tust
 
 usinas = [
     {'NOME': 'ARINOS', 'MUST': 337.00, 'COD': 2024, 'BUS01_ONS': 4349, 'BUS01_EPE': 39813},
@@ -12,48 +17,34 @@ usinas = [
     {'NOME': 'BARRO', 'MUST': 330.00, 'COD': 2024, 'BUS01_ONS': 229, 'BUS01_EPE': 3947},
 ]
 
+years = list(range(INITIAL_CYCLE, 2041))
+
 for usina in usinas:
     nome = str(usina['NOME'])
     CASE_PATH = f'D:\\dev\\auto_tust\\cases\\BasePSR_RedeEPE_2022_{nome}'
-    generators, buses, _ = tust.load_base(CASE_PATH)
-    bus_num_to_bus_ons = {bus.num: bus for bus in buses.values() if isinstance(bus, tust.BusOns)}
-
-    csv_file = CASE_PATH + "/tust2csv.csv"
-
-    years = range(2023, 2041)
-    with open(csv_file, mode='w', newline='') as file:
-        writer = csv.writer(file)
-        header = ["USINA", "SUBSISTEMA", "CEG"] + [str(year) for year in years]
-        writer.writerow(header)
-
-        for name, generator in generators.items():
-            row = [name]
-            
-            subsistema = ss.get(generator.uf, '')
-            row.extend([subsistema, generator.ceg])
-
-            previous_numeric_tust = None
-            for year in years:
-                tust_value = None
-                if year < usina['COD']:
-                    bus01 = bus_num_to_bus_ons[usina['BUS01_ONS']]
-                    bus02 = bus_num_to_bus_ons[usina['BUS02_ONS']] if 'BUS02_ONS' in usina else None
-
-                    if bus01 and bus02:
-                        tust_value = (bus01.tust.get(year, 0) + bus02.tust.get(year, 0)) / 2
-                    elif bus01:
-                        tust_value = bus01.tust.get(year, 0)
-                    else:
-                        tust_value = '-'
-                else:
-                    if year > 2031 and previous_numeric_tust is not None:
-                        tust_value = previous_numeric_tust - 0.02
-                    else:
-                        tust_value = generator.tust.get(year, '-')
-                    
-                if isinstance(tust_value, (int, float)):
-                    previous_numeric_tust = tust_value
-                
-                row.extend([tust_value])
-
-            writer.writerow(row)
\ No newline at end of file
+    database = load_base(Path(CASE_PATH))
+    store = database.columnar()
+    # Ciclos ate o ultimo carregado do caso; os seguintes sao extrapolados
+    resolved_years = [year for year in years if year <= store.years.max()]
+    candidate = Candidate(nome, usina['MUST'], usina['COD'], usina['BUS01_ONS'], usina['BUS01_EPE'],
+                          usina.get('BUS02_ONS'), usina.get('BUS02_EPE'))
+
+    # Antes do COD a usina estudada recebe a TUST das suas barras; as demais usam so o TUH
+    names = store.names.tolist()
+    buses = np.full((len(names), 2, len(resolved_years)), BUS_MISSING, dtype=np.int64)
+    cod = [None] * len(names)
+    if candidate.generator_name in names:
+        row = names.index(candidate.generator_name)
+        cod[row] = candidate.cod
+        for j, year in enumerate(resolved_years):
+            buses[row, :, j] = [BUS_MISSING if bus is None else bus for bus in candidate.buses(year)]
+    tust, _ = resolve_tust(database, names, buses, cod=cod, years=resolved_years)
+
+    # Apos o ultimo ciclo do caso a TUST cai 0,02 por ciclo a partir do ultimo valor conhecido
+    last = pd.DataFrame(tust).ffill(axis=1).iloc[:, -1].to_numpy()
+    extrapolated = last[:, None] - 0.02 * np.arange(1, len(years) - len(resolved_years) + 1)[None, :]
+    values = pd.DataFrame(np.hstack((tust, extrapolated)), columns=[str(year) for year in years])
+
+    subsystems = np.array(store.subsystems, dtype=object)[store.subsystem_codes]
+    table = pd.concat([pd.DataFrame({"USINA": names, "SUBSISTEMA": subsystems, "CEG": store.cegs}), values], axis=1)
+    table.to_csv(CASE_PATH + "/tust2csv.csv", index=False, na_rep='-')
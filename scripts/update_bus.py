@@ -1,5 +1,11 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
-import os
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from ger_edit import ENCODING, ChangeBus, apply_ger_batch, ger_path
 
 DB_PATH = r"D:\dev\auto_tust\cases\BasePSR_RedeEPE_2022"
 excel_path = r"D:\dev\auto_tust\inputs\usinas_atualizar.xlsx"
@@ -9,22 +15,12 @@ years = range(2031, 2032)
 df = excel.parse('Sheet1')
 geradores_barras = dict(zip(df['name'], df['barra']))
 
-for year in years:
-    ger_file = os.path.join(DB_PATH, f"{year}-{year+1}.GER")
-    new_ger_file = os.path.join(DB_PATH, f"{year}-{year+1}_updated.GER")
-    only_updated_ger_file = os.path.join(DB_PATH, f"{year}-{year+1}_only_updated.GER")
-
-    if os.path.exists(ger_file):
-        with open(ger_file, "r") as file, open(new_ger_file, "w") as new_file, open(only_updated_ger_file, "w") as only_updated_file:
-            for line in file:
-                name = line[0:32].strip()
-                if name in geradores_barras:
-                    new_bar = str(geradores_barras[name]).zfill(5)
-                    updated_line = line[:70] + new_bar + line[75:]
-                    new_file.write(updated_line)
-                    only_updated_file.write(updated_line)
-                else:
-                    new_file.write(line)
+operations = {year: [ChangeBus(name, int(barra)) for name, barra in geradores_barras.items()] for year in years}
+results = apply_ger_batch(DB_PATH, operations, suffix="_updated")
 
-    print(f"Ano {year}: Arquivo .GER atualizado.")
+for year, result in results.items():
+    # As linhas editadas mantem o fim de linha do arquivo original
+    with open(ger_path(DB_PATH, year, "_only_updated"), "w", encoding=ENCODING, newline="") as only_updated_file:
+        only_updated_file.writelines(result.edited_lines)
 
+    print(f"Ano {year}: Arquivo .GER atualizado.")
@@ -1,74 +1,55 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
 from openpyxl import Workbook
-import autotust_v61 as tust
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from autotust import load_base
+from diff import diff_cycles
 
 # INPUTS
 DB_PATH = r'D:\dev\auto_tust\cases\BasePSR'
+# Ciclos da base v61 (.R61): 2022-2023 a 2031-2032
+YEARS = range(2022, 2032)
 ralie_df = pd.read_excel('inputs\ralie-usina.xlsx').set_index('IdeNucleoCEG')
 ralie_unidade_df = pd.read_excel('inputs\ralie-unidade-geradora.xlsx').set_index('IdeNucleoCEG')
+ralie_columns = ['DscViabilidade', 'DscSituacaoObra', 'DscSitCCT', 'DscSitCust']
 
 # INICIANDO VARIÁVEIS
-years = range(2023, 2032)
-summary_data = {"year": [year for year in years], "total_must": []}
-yearly_data = []
-bus_must_data = {}
-previous_generators = set()
-
-# ITERAÇÃO SOBRE OS ANOS
-for year in years:
-    generators, _ = tust.load_ger(DB_PATH, year)
-    current_generators = set()
-    rows = []
-    total_must = 0
-    bus_must = {}
-
-    for generator in generators.values():
-        current_generators.add(generator.name)
-
-        if generator.name in previous_generators:
-            continue
-
-        must = generator.must.get(year, 0)
-        total_must += must
-        bus = generator.bus[year]
-        bus_must[bus] = bus_must.get(bus, 0) + must
-
-        additional_columns = ['', '', '', '']
-        if generator.cegnucleo in ralie_df.index:
-            additional_columns = ralie_df.loc[generator.cegnucleo, ['DscViabilidade', 'DscSituacaoObra', 'DscSitCCT', 'DscSitCust']].tolist()
-
-        data_cod = ''
-        if generator.cegnucleo in ralie_unidade_df.index:
-            data_cod = ralie_unidade_df.query('IdeNucleoCEG == @generator.cegnucleo')['DatPrevisaoOpComercialSFG'].iloc[0]
-
-        row = [generator.type, generator.name, must, generator.ceg, generator.cegnucleo] + additional_columns + [data_cod]
-        rows.append(row)
-
-    previous_generators = current_generators    
-    summary_data["total_must"].append(total_must)
-    yearly_data.append({"year": year, "rows": rows})
-    bus_must_data[year] = bus_must
+changes = diff_cycles(load_base(Path(DB_PATH), years=YEARS).columnar())
+entering = changes.entering.fillna({'must_b': 0})
+years = sorted(entering['cycle_b'].unique())
+bus_must = entering.pivot_table(index='bus_b', columns='cycle_b', values='must_b', aggfunc='sum')
+summary_data = {"year": years, "total_must": [entering.loc[entering['cycle_b'] == year, 'must_b'].sum()
+                                              for year in years]}
+for bus, row in bus_must.iterrows():
+    summary_data[str(bus)] = ['' if pd.isna(row.get(year)) else row.get(year) for year in years]
 
 # OUTPUTS EM EXCEL
 wb = Workbook()
 ws_summary = wb.active
 ws_summary.title = "Resumo"
 
-for year, bus_must in bus_must_data.items():
-    for bus, must in bus_must.items():
-        bus_key = str(bus)
-        if bus_key not in summary_data:
-            summary_data[bus_key] = ['' for _ in range(len(years))]
-        summary_data[bus_key][year - years[0]] = must
-
 for key, row in summary_data.items():
-    ws_summary.append([key] + row)
+    ws_summary.append([key] + list(row))
 
-for data in yearly_data:
-    ws_year = wb.create_sheet(title=str(data['year']))
-    header = ['type', 'name', 'must', 'ceg', 'cegnucleo', 'DscViabilidade', 'DscSituacaoObra', 'DscSitCCT', 'DscSitCust', 'DatPrevisaoOpComercialSFG']
+for year, rows in entering.groupby('cycle_b'):
+    ws_year = wb.create_sheet(title=str(year))
+    header = ['type', 'name', 'must', 'ceg', 'cegnucleo'] + ralie_columns + ['DatPrevisaoOpComercialSFG']
     ws_year.append(header)
-    for row in data['rows']:
+    for generator in rows.itertuples(index=False):
+        additional_columns = ['', '', '', '']
+        if generator.cegnucleo in ralie_df.index:
+            additional_columns = ralie_df.loc[generator.cegnucleo, ralie_columns].tolist()
+
+        data_cod = ''
+        if generator.cegnucleo in ralie_unidade_df.index:
+            data_cod = ralie_unidade_df.loc[[generator.cegnucleo], 'DatPrevisaoOpComercialSFG'].iloc[0]
+
+        row = [generator.type, generator.name, generator.must_b, generator.ceg, generator.cegnucleo] \
+            + additional_columns + [data_cod]
         ws_year.append(row)
 
 wb.save(filename='outputs\entram.xlsx')
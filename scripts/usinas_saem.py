@@ -1,44 +1,25 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
 from openpyxl import Workbook
-import autotust_v61 as tust
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from autotust import load_base
+from diff import diff_cycles
 
 # INPUTS
 DB_PATH = r'D:\dev\auto_tust\cases\BasePSR'
+# Ciclos da base v61 (.R61): 2022-2023 a 2031-2032
+YEARS = range(2022, 2032)
 ralie_df = pd.read_excel('inputs\ralie-usina.xlsx').set_index('IdeNucleoCEG')
 ralie_unidade_df = pd.read_excel('inputs\ralie-unidade-geradora.xlsx').set_index('IdeNucleoCEG')
+ralie_columns = ['DscViabilidade', 'DscSituacaoObra', 'DscSitCCT', 'DscSitCust']
 
 # INICIANDO VARIÁVEIS
-years = range(2023, 2032)
-previous_generators = {}
-summary_data = []
-yearly_data = []
-
-# ITERAÇÃO SOBRE OS ANOS
-for year in years:
-    current_generators, _ = tust.load_ger(DB_PATH, year)
-    missing_generators = set(previous_generators.keys()) - set(current_generators.keys())
-    rows = []
-    total_must = 0
-    for generator_name in missing_generators:
-        generator = previous_generators[generator_name]
-
-        must = generator.must.get(year - 1, 0)
-        additional_columns = ['', '', '', '']
-        data_cod = ''
-
-        if generator.cegnucleo in ralie_df.index:
-            additional_columns = ralie_df.loc[generator.cegnucleo, ['DscViabilidade', 'DscSituacaoObra', 'DscSitCCT', 'DscSitCust']].tolist()
-
-        if generator.cegnucleo in ralie_unidade_df.index:
-            data_cod = ralie_unidade_df.query('IdeNucleoCEG == @generator.cegnucleo')['DatPrevisaoOpComercialSFG'].iloc[0]
-
-        row = [generator.type, generator.name, must, generator.ceg, generator.cegnucleo] + additional_columns + [data_cod]
-        total_must += must
-        rows.append(row)
-
-    previous_generators = current_generators
-    summary_data.append([year, total_must])
-    yearly_data.append({"year": year, "rows": rows})
+changes = diff_cycles(load_base(Path(DB_PATH), years=YEARS).columnar())
+leaving = changes.leaving.fillna({'must_a': 0})
 
 # OUTPUTS EM EXCEL
 wb = Workbook()
@@ -46,14 +27,24 @@ ws_summary = wb.active
 ws_summary.title = "Resumo"
 ws_summary.append(['Year', 'Total MUST'])
 
-for row in summary_data:
-    ws_summary.append(row)
+for year, rows in leaving.groupby('cycle_b'):
+    ws_summary.append([year, rows['must_a'].sum()])
 
-for data in yearly_data:
-    ws_year = wb.create_sheet(title=str(data['year']))
-    header = ['type', 'name', 'must', 'ceg', 'cegnucleo', 'DscViabilidade', 'DscSituacaoObra', 'DscSitCCT', 'DscSitCust', 'DatPrevisaoOpComercialSFG']
+for year, rows in leaving.groupby('cycle_b'):
+    ws_year = wb.create_sheet(title=str(year))
+    header = ['type', 'name', 'must', 'ceg', 'cegnucleo'] + ralie_columns + ['DatPrevisaoOpComercialSFG']
     ws_year.append(header)
-    for row in data['rows']:
+    for generator in rows.itertuples(index=False):
+        additional_columns = ['', '', '', '']
+        if generator.cegnucleo in ralie_df.index:
+            additional_columns = ralie_df.loc[generator.cegnucleo, ralie_columns].tolist()
+
+        data_cod = ''
+        if generator.cegnucleo in ralie_unidade_df.index:
+            data_cod = ralie_unidade_df.loc[[generator.cegnucleo], 'DatPrevisaoOpComercialSFG'].iloc[0]
+
+        row = [generator.type, generator.name, generator.must_a, generator.ceg, generator.cegnucleo] \
+            + additional_columns + [data_cod]
         ws_year.append(row)
 
 wb.save(filename='outputs\saem.xlsx')
@@ -0,0 +1,45 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import fixedwidth
+from dcflow import DCFlowModel, compare_with_nos
+from network import load_network
+
+
+def read_nos_tust(file_path):
+    table = fixedwidth.read_nos(file_path, ("num", "tust"))
+    nums = fixedwidth.parse_int(table["num"])
+    tusts = fixedwidth.parse_float(table["tust"], blank=0)
+    return dict(zip(nums.tolist(), tusts.tolist()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the DC-flow tariff approximation with the Nodal .NOS bus TUST")
+    parser.add_argument("path", type=str, help="Path to the case folder")
+    parser.add_argument("--years", type=int, nargs="+", default=list(range(2024, 2033)))
+    args = parser.parse_args()
+
+    case_path = Path(args.path)
+    print(f"{'cycle':<11s}{'buses':>7s}{'branches':>9s}{'matched':>8s}{'r2':>8s}{'pearson':>9s}"
+          f"{'spearman':>9s}{'slope':>10s}{'intercept':>10s}{'time':>8s}")
+    for year in args.years:
+        nos_path = case_path / f"{year}-{year + 1}.NOS"
+        start = time.perf_counter()
+        network = load_network(case_path, year)
+        if network is None or not nos_path.exists():
+            print(f"{year}-{year + 1}: missing .dc or .NOS file")
+            continue
+        model = DCFlowModel(network)
+        result = compare_with_nos(model, read_nos_tust(nos_path))
+        elapsed = time.perf_counter() - start
+        print(f"{year}-{year + 1:<6d}{network.n_buses:>7d}{network.n_branches:>9d}{result['buses']:>8d}"
+              f"{result['r2']:>8.3f}{result['pearson']:>9.3f}{result['spearman']:>9.3f}"
+              f"{result['slope']:>10.3f}{result['intercept']:>10.3f}{elapsed:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Vectorized group-by statistics of generator TUST over the columnar store.
+"""
+
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from columnar import GeneratorStore
+
+GROUP_KEYS = ("subsystem", "uf", "type", "cycle")
+
+
+def _group_codes(store: GeneratorStore, key: str, rows: np.ndarray, columns: np.ndarray):
+    """Return (codes, labels) of a grouping key for the selected matrix cells."""
+    if key == "subsystem":
+        return store.subsystem_codes[rows], store.subsystems
+    if key == "uf":
+        return store.uf_codes[rows], store.ufs
+    if key == "type":
+        return store.type_codes[rows], store.types
+    if key == "cycle":
+        return columns, store.years.tolist()
+    raise ValueError(f"Unknown group key {key!r}. Expected one of {GROUP_KEYS}.")
+
+
+def aggregate_tust(store: GeneratorStore, by: Sequence[str] = ("subsystem", "cycle"),
+                   years: Optional[Iterable[int]] = None, percentiles: Sequence[float] = (10, 90)) -> pd.DataFrame:
+    """Aggregate positive TUST values by any combination of subsystem, UF, type and cycle.
+
+    Returns one row per group with the count, sum, mean, median, the requested
+    percentiles and the MUST-weighted mean (weights are the MUST of the same cycle).
+    Only `years` are considered when given.
+    """
+    by = list(by)
+    valid = store.tust > 0
+    if years is not None:
+        valid &= np.isin(store.years, list(years))[None, :]
+    rows, columns = np.nonzero(valid)
+    values = store.tust[rows, columns]
+    weights = np.nan_to_num(store.must[rows, columns])
+
+    codes, labels = zip(*(_group_codes(store, key, rows, columns) for key in by)) if by else ((), ())
+    sizes = [max(len(label), 1) for label in labels]
+    group = np.ravel_multi_index(codes, sizes) if by else np.zeros(len(values), dtype=np.int64)
+    groups, inverse = np.unique(group, return_inverse=True)
+
+    count = np.bincount(inverse, minlength=len(groups))
+    total = np.bincount(inverse, weights=values, minlength=len(groups))
+    weighted = np.bincount(inverse, weights=values * weights, minlength=len(groups))
+    weight_total = np.bincount(inverse, weights=weights, minlength=len(groups))
+
+    result = {}
+    for key, key_codes, key_labels in zip(by, np.unravel_index(groups, sizes) if by else (), labels):
+        result[key] = [key_labels[code] for code in key_codes]
+    result["count"] = count
+    result["sum"] = total
+    result["mean"] = total / count
+    # Sorted once by (group, value); every percentile indexes into the same order
+    ordered = values[np.lexsort((values, inverse))]
+    result["median"] = _group_percentile(ordered, count, 50)
+    for q in percentiles:
+        result[f"p{q:g}"] = _group_percentile(ordered, count, q)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result["must_weighted"] = np.where(weight_total > 0, weighted / weight_total, np.nan)
+    return pd.DataFrame(result)
+
+
+def _group_percentile(ordered: np.ndarray, count: np.ndarray, q: float) -> np.ndarray:
+    """Per-group percentile with linear interpolation, as np.percentile does.
+
+    `ordered` holds the values sorted by group and then by value.
+    """
+    if len(count) == 0:
+        return np.zeros(0)
+    starts = np.cumsum(count) - count
+    position = (count - 1) * (q / 100.0)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, count - 1)
+    fraction = position - lower
+    low_values = ordered[starts + lower]
+    return low_values + (ordered[starts + upper] - low_values) * fraction
@@ -3,227 +3,291 @@ AutoTUST - Nodal Automation v1.0
 Provides functionality for automating the Nodal v63 process for TUST calculations.
 """
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import csv
+from dataclasses import dataclass
+from itertools import repeat
 import logging
 import os
 from pathlib import Path
 import subprocess
 import sys
-from typing import List, Union, Optional, Tuple
+from typing import Iterable, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
+from aggregation import aggregate_tust
+import cache
+from dcflow import DCFlowModel
+from diff import ChangeSet, diff_bases, diff_cycles
+from export import EXTENSIONS, export_results, read_generator_filter
+from fixedwidth import read_ger, read_tuh, read_nos, parse_float, parse_int
+from ger_edit import CommentOut, apply_ger_operations
 from models import Database, Generator, Bus, CycleData
-from models import VALID_YEARS, STATE_TO_SUBSYSTEM, SUBSYSTEM_MAP, NODAL_PATH
+from models import VALID_YEARS, STATE_TO_SUBSYSTEM, SUBSYSTEM_MAP, NODAL_PATH, INITIAL_CYCLE, FINAL_CYCLE
+from montecarlo import bands_frame, base_inputs, cycle_columns, pdr_sensitivity, sample_trajectories, tust_bands
+from network import load_network, load_networks
+from projection import DEFAULT_MODEL, ProjectionModel
+from report import REPORT_LAYOUTS, find_report, read_report
+from scheduler import JobResult, NodalJob, run_jobs
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
-def _is_end_of_file(line: str) -> bool:
-    return line[:2].strip() == "X"
+@dataclass
+class CycleRecords:
+    """Plain records parsed from one cycle's GER, TUH, summary report and NOS files."""
+    year: int
+    ger: Optional[List[tuple]] = None
+    tuh: Optional[List[tuple]] = None
+    r63: Optional[CycleData] = None
+    nos: Optional[List[tuple]] = None
 
 
-def _is_comment(line: str) -> bool:
-    return len(line) <= 1 or line[0] == "("
+def _read_ger_records(file_path: Path) -> Optional[List[tuple]]:
+    """Read (name, ceg, cegnucleo, d, s, must, bus) records from a .GER file."""
+    if not file_path.exists():
+        logger.warning(f"File {file_path} does not exist.")
+        return None
 
+    table = read_ger(file_path, ("name", "ceg", "cegnucleo", "d", "s", "must", "bus01"))
+    nucleo = table["cegnucleo"]
+    digits = np.char.isdigit(nucleo)
+    cegnucleo = nucleo.astype(object)
+    cegnucleo[digits] = parse_int(nucleo[digits]).tolist()
+    return list(zip(table["name"].tolist(), table["ceg"].tolist(), cegnucleo.tolist(), table["d"].tolist(),
+                    table["s"].tolist(), parse_float(table["must"]).tolist(), parse_int(table["bus01"]).tolist()))
 
-def _parse_float(value_str: str) -> Optional[float]:
-    value_str = value_str.replace(".", "").replace(",", ".").strip()
-    return float(value_str) if value_str and not value_str.startswith("-") else None
 
+def _read_tuh_records(file_path: Path) -> Optional[List[tuple]]:
+    """Read (name, tust, uf) records from a .TUH file."""
+    if not file_path.exists():
+        logger.warning(f"File {file_path} does not exist.")
+        return None
 
-def load_ger_file(file_path: Path, year: int, database: Database) -> None:
-    """Load data from a .GER file into the database."""
+    table = read_tuh(file_path, ("name", "tust", "uf"))
+    return list(zip(table["name"].tolist(), parse_float(table["tust"]).tolist(), table["uf"].tolist()))
+
+
+def _read_report_data(db_path: Path, year: int) -> Optional[CycleData]:
+    """Read the cycle summary from the .R63 report, or the .R61 / .R60 one of older Nodal runs."""
+    file_path = find_report(db_path, year)
+    if file_path is None:
+        logger.warning(f"No {'/'.join(REPORT_LAYOUTS)} file for cycle {year}-{year + 1} in {db_path}.")
+        return None
+    return read_report(file_path, year)
+
+
+def _read_nos_records(file_path: Path) -> Optional[List[tuple]]:
+    """Read (lookup name, num, name, tust) records from a .NOS file."""
     if not file_path.exists():
         logger.warning(f"File {file_path} does not exist.")
-        return
+        return None
 
-    with open(file_path, "r") as file:
-        for line in file:
-            if _is_comment(line):
-                continue
-            if len(line) > 0:
-                name = line[0:32].strip()
-                gen = database.get_generator_by_name(name)
-                if not gen:
-                    gen = Generator()
-                    gen.name = name
-                    gen.type = name[0:3]
-                    gen.ceg = line[52:62].strip()
-                    gen.cegnucleo = int(line[55:60]) if line[55:60].strip().isdigit() else line[55:60].strip()
-                    database.add_generator(gen)
-                gen.d[year] = line[42:43].strip()
-                gen.s[year] = line[44:45].strip()
-                gen.must[year] = float(line[32:41].strip())
-                gen.bus[year] = int(line[70:75].strip())
+    table = read_nos(file_path)
+    try:
+        nums, tusts = parse_int(table["num"]), parse_float(table["tust"], blank=0)
+    except ValueError:
+        return _read_nos_records_checked(file_path, table)
+    return list(zip(table["key"].tolist(), nums.tolist(), table["name"].tolist(), tusts.tolist()))
+
+
+def _read_nos_records_checked(file_path: Path, table: dict) -> List[tuple]:
+    """Row-by-row fallback that logs and skips the lines that fail to parse."""
+    records = []
+    for line_number, key, num, name, value in zip(table["line_number"].tolist(), table["key"].tolist(),
+                                                  table["num"].tolist(), table["name"].tolist(),
+                                                  table["tust"].tolist()):
+        try:
+            records.append((key, int(num), name, float(value) if value else 0))
+        except ValueError as e:
+            logger.error(f"Error processing line {line_number} of file {file_path}: {e}")
+            logger.debug(f"Line content: {key} {num} {value}")
+    return records
+
+
+def _merge_ger_records(records: List[tuple], year: int, database: Database) -> None:
+    for name, ceg, cegnucleo, d, s, must, bus in records:
+        gen = database.get_generator_by_name(name)
+        if not gen:
+            gen = Generator()
+            gen.name = name
+            gen.type = name[0:3]
+            gen.ceg = ceg
+            gen.cegnucleo = cegnucleo
+            database.add_generator(gen)
+        gen.d[year] = d
+        gen.s[year] = s
+        gen.must[year] = must
+        gen.bus[year] = bus
     logger.info(f"Generators loaded for cycle {year}-{year + 1}.")
 
 
+def _merge_tuh_records(records: List[tuple], year: int, database: Database) -> None:
+    for name, tust, uf in records:
+        gen = database.get_generator_by_name(name)
+        if gen:
+            gen.tust[year] = tust
+            gen.uf = gen.uf or uf
+        else:
+            logger.warning(f"Generator {name} not found in the generator list.")
+
+
+def _merge_nos_records(records: List[tuple], year: int, database: Database) -> None:
+    for lookup_name, num, name, tust in records:
+        bus = database.get_bus_by_name(lookup_name)
+        if not bus:
+            bus = Bus()
+            bus.num = num
+            bus.name = name
+            database.add_bus(bus)
+        bus.tust[year] = tust
+
+
+def load_ger_file(file_path: Path, year: int, database: Database) -> None:
+    """Load data from a .GER file into the database."""
+    records = _read_ger_records(file_path)
+    if records is not None:
+        _merge_ger_records(records, year, database)
+
+
 def load_tuh_file(file_path: Path, year: int, database: Database) -> None:
     """Load data from a .TUH file into the database."""
-    if not file_path.exists():
-        logger.warning(f"File {file_path} does not exist.")
-        return
-
-    with open(file_path, "r") as file:
-        for line_number, line in enumerate(file, 1):
-            if line_number <= 11 or _is_comment(line) or _is_end_of_file(line):
-                continue
-            if len(line) > 0:
-                name = line[3:35].strip()
-                tust = float(line[96:102])
-                uf = line[51:53].strip()
-                gen = database.get_generator_by_name(name)
-                if gen:
-                    gen.tust[year] = tust
-                    gen.uf = gen.uf or uf
-                else:
-                    logger.warning(f"Generator {name} not found in the generator list.")
+    records = _read_tuh_records(file_path)
+    if records is not None:
+        _merge_tuh_records(records, year, database)
 
 
 def load_r63_file(file_path: Path, year: int, database: Database) -> None:
-    """Load data from a .R63 file into the database."""
+    """Load data from a .R63 (or .R61 / .R60) file into the database."""
     if not file_path.exists():
         logger.warning(f"File {file_path} does not exist.")
         return
-
-    with open(file_path, 'r', encoding='ISO-8859-1') as file:
-        lines = file.readlines()
-        data = CycleData(year=year)
-        data.rap = _parse_float(lines[7][88:106])
-        data.mustg = _parse_float(lines[8][15:26])
-        data.mustp = _parse_float(lines[8][55:66])
-        data.mustfp = _parse_float(lines[8][75:86])
-        teu_values = [_parse_float(lines[i][7:14]) if i < len(lines) else None for i in range(17, 20)]
-        data.teug, data.teup, data.teufp = teu_values + [None] * (3 - len(teu_values))
-
-    database.add_cycle_data(data)
+    database.add_cycle_data(read_report(file_path, year))
 
 
 def load_nos_file(file_path: Path, year: int, database: Database) -> None:
     """Load data from a .NOS file into the database."""
-    if not file_path.exists():
-        logger.warning(f"File {file_path} does not exist.")
-        return
-
-    with open(file_path, "r") as file:
-        for line_number, line in enumerate(file, 1):
-            if _is_end_of_file(line):
-                break
-            if line_number <= 11 or _is_comment(line):
-                continue
-            if len(line) > 0:
-                try:
-                    name = line[8:21].strip()
-                    tust = float(line[37:43].strip()) if line[37:43].strip() else 0
-                    bus = database.get_bus_by_name(name)
-                    if not bus:
-                        bus = Bus()
-                        bus.num = int(line[2:7].strip())
-                        bus.name = line[8:20].strip()
-                        database.add_bus(bus)
-                    bus.tust[year] = tust
-                except ValueError as e:
-                    logger.error(f"Error processing line {line_number} of file {file_path}: {e}")
-                    logger.debug(f"Line content: {line.strip()}")
-
-
-def load_base(db_path: Path) -> Database:
-    """Load all data files into the database."""
+    records = _read_nos_records(file_path)
+    if records is not None:
+        _merge_nos_records(records, year, database)
+
+
+def read_cycle(db_path: Path, year: int) -> CycleRecords:
+    """Parse one cycle's GER, TUH, summary report and NOS files without touching a Database."""
+    cycle_str = f"{year}-{year + 1}"
+    db_path = Path(db_path)
+    return CycleRecords(
+        year=year,
+        ger=_read_ger_records(db_path / f"{cycle_str}.GER"),
+        tuh=_read_tuh_records(db_path / f"{cycle_str}.TUH"),
+        r63=_read_report_data(db_path, year),
+        nos=_read_nos_records(db_path / f"{cycle_str}.NOS"),
+    )
+
+
+def merge_cycle(records: CycleRecords, database: Database) -> None:
+    """Merge one cycle's records into the database, in the serial load order."""
+    if records.ger is not None:
+        _merge_ger_records(records.ger, records.year, database)
+    if records.tuh is not None:
+        _merge_tuh_records(records.tuh, records.year, database)
+    if records.r63 is not None:
+        database.add_cycle_data(records.r63)
+    if records.nos is not None:
+        _merge_nos_records(records.nos, records.year, database)
+
+
+def load_base(db_path: Path, workers: int = 1, use_processes: bool = False, use_cache: bool = True,
+              rebuild_cache: bool = False, networks: bool = False,
+              years: Optional[Iterable[int]] = None) -> Database:
+    """Load all data files into the database.
+
+    With workers > 1 each cycle is parsed in a thread (or process) pool and the
+    records are merged in cycle order, giving the same result as the serial load.
+    Parsed cycles are cached under the case folder and reused while the
+    fingerprints of their GER, TUH, summary report and NOS files are unchanged.
+    With `networks`, the .dc network of each cycle is attached and bus circuits are filled.
+    `years` selects other cycles than INITIAL_CYCLE..FINAL_CYCLE, e.g. those of an older base.
+    """
     database = Database()
-    years = range(2024, 2033)
+    years = range(INITIAL_CYCLE, FINAL_CYCLE + 1) if years is None else sorted(years)
 
     db_path = Path(db_path)  # Ensure DB_PATH is a Path object
 
+    cycles = {}
+    fingerprints = {}
+    if use_cache:
+        for year in years:
+            fingerprints[year] = cache.cycle_fingerprint(db_path, year)
+            if not rebuild_cache:
+                cycles[year] = cache.load_cycle(db_path, year, fingerprints[year])
+    stale_years = [year for year in years if cycles.get(year) is None]
+    if use_cache:
+        logger.info(f"Cache hits for {len(years) - len(stale_years)} of {len(years)} cycles.")
+
+    if workers > 1 and len(stale_years) > 1:
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor_class(max_workers=min(workers, len(stale_years))) as executor:
+            cycles.update(zip(stale_years, executor.map(read_cycle, repeat(db_path), stale_years)))
+    else:
+        cycles.update((year, read_cycle(db_path, year)) for year in stale_years)
+
+    if use_cache:
+        for year in stale_years:
+            cache.save_cycle(db_path, year, fingerprints[year], cycles[year])
+
     for year in years:
-        ger_file = db_path / f"{year}-{year + 1}.GER"
-        tuh_file = db_path / f"{year}-{year + 1}.TUH"
-        r63_file = db_path / f"{year}-{year + 1}.R63"
-        nos_file = db_path / f"{year}-{year + 1}.NOS"
+        merge_cycle(cycles[year], database)
 
-        load_ger_file(ger_file, year, database)
-        load_tuh_file(tuh_file, year, database)
-        load_r63_file(r63_file, year, database)
-        load_nos_file(nos_file, year, database)
+    if networks:
+        for year, network in load_networks(db_path, years).items():
+            database.add_network(year, network)
 
     database.generators.sort(key=lambda x: x.name)
-    for generator in database.generators:
-        for year in range(2033, 2040):
-            generator.tust[year] = generator.tust.get(year - 1, 0) - 0.02
-
-    csv_file = db_path / "autotust_list.csv"
-    years = list(range(2022, 2040))
-    with open(csv_file, mode='w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(["GENERATOR"] + [str(year) for year in years])
-        for generator in database.generators:
-            row = [generator.name] + [generator.tust.get(year, 0) for year in years]
-            writer.writerow(row)
-
+    database.compact()
     return database
 
 
-def _read_param63(file_path: Path) -> List[Union[str, float]]:
-    """Read the param.v63 file."""
-    param_list = []
-    if file_path.exists():
-        with open(file_path) as param_file:
-            for iline, line in enumerate(param_file):
-                contents = line if (iline <= 3 or line == "\n") else float(line)
-                param_list.append(contents)
-    logger.debug(f"Param63 contents: {param_list}")
-    return param_list
-
-
-def _write_param63(params: List[Union[str, float]], file_path: Path) -> None:
-    """Write to the param.v63 file."""
-    with open(file_path, "w") as param_file:
-        for iparam, value in enumerate(params):
-            if iparam == 0:
-                param_file.write(f"{value}")
-            elif 1 <= iparam <= 3:
-                param_file.write(f"{value}\n")
-            elif iparam == 4:
-                param_file.write(f"{value:013.2f}\n")
-            elif iparam == 5:
-                param_file.write(f"{value}\n")
-            elif 6 <= iparam <= 10:
-                param_file.write(f"{value:05.1f}\n")
-            elif iparam <= 11:
-                param_file.write(f"{value:013.2f}\n")
-            else:
-                param_file.write(f"{value:05.2f}\n")
-
-
-def run_nodal63(case_path: Path, cycle_years: List[int], rap: List[float], pdr: List[float], nodal_path: Optional[Path] = None) -> None:
-    """Run Nodal v63 for specified cycles."""
-    effective_nodal_path = nodal_path or NODAL_PATH
-    params_file_path = effective_nodal_path / "param.v63"
-    params = _read_param63(params_file_path)
-    params[1] = str(effective_nodal_path)
-
-    for i, cycle in enumerate(cycle_years):
-        cycle_str = f"{cycle}-{cycle + 1}"
-        params[2] = str(case_path / f"{cycle_str}.dc")
-        params[3] = str(case_path / cycle_str)
-        params[4] = rap[i]
-        params[20] = pdr[i]
-        _write_param63(params, params_file_path)
-
-        command = "Nodal_F63.exe"
-        try:
-            subprocess.run(command, check=True, shell=True, cwd=effective_nodal_path)
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Error running Nodal_F63.exe: {e}")
-            return
-
-        log_path = effective_nodal_path / "#ER_nod#.TX1"
-        if log_path.exists():
-            with open(log_path, "r") as file:
-                logger.info(file.read())
+def write_tust_list(case_path: Path, database: Database, model: ProjectionModel = DEFAULT_MODEL,
+                    years: Sequence[int] = range(2022, 2040)) -> Path:
+    """Write autotust_list.csv: the TUST of every generator per year, projected past the last cycle, 0 if missing."""
+    store = database.columnar()
+    projected_years = [year for year in years if year > FINAL_CYCLE]
+    projected = database.projected_tust(model, projected_years)
+    columns = []
+    for year in years:
+        if year > FINAL_CYCLE:
+            columns.append(projected[:, projected_years.index(year)])
+        elif year in store._year_index:
+            columns.append(store.tust[:, store._year_index[year]])
         else:
-            logger.warning("The file #ER_nod#.TX1 was not found.")
+            columns.append(np.full(len(store), np.nan))
+    table = pd.DataFrame(np.nan_to_num(np.column_stack(columns), nan=0.0) if columns else None,
+                         columns=[str(year) for year in years])
+    table.insert(0, "GENERATOR", store.names)
+
+    csv_file = Path(case_path) / "autotust_list.csv"
+    table.to_csv(csv_file, index=False, lineterminator="\r\n")
+    logger.info(f"TUST list of {len(table)} generators written to {csv_file}")
+    return csv_file
+
+
+def nodal_jobs(case_path: Path, cycle_years: List[int], rap: List[float], pdr: List[float]) -> List[NodalJob]:
+    """Build one Nodal job per cycle of a case."""
+    return [NodalJob(case_path, cycle, rap[i], pdr[i]) for i, cycle in enumerate(cycle_years)]
+
+
+def run_nodal63(case_path: Path, cycle_years: List[int], rap: List[float], pdr: List[float],
+                nodal_path: Optional[Path] = None, workers: int = 1, force: bool = False) -> List[JobResult]:
+    """Run Nodal v63 for specified cycles, `workers` cycles at a time.
+
+    Cycles whose inputs and outputs are unchanged since their last run are skipped unless `force` is set.
+    """
+    return run_jobs(nodal_jobs(case_path, cycle_years, rap, pdr), nodal_path or NODAL_PATH, workers,
+                    force=force)
 
 
 def read_autotust_csv(csv_path: Path) -> Tuple[List[int], List[float], List[int]]:
@@ -238,41 +302,99 @@ def read_autotust_csv(csv_path: Path) -> Tuple[List[int], List[float], List[int]
     return cycle_years, rap_values, pdr_values
 
 
-def get_tust_results(case_path: Path, database: Database) -> None:
-    """Generate TUST results CSV file for specified generators."""
-    years = range(2024, 2033)
-    input_file = case_path / "autotust_input_generators.csv"
-    generator_list = None
+def get_tust_results(case_path: Path, database: Database, fmt: str = "csv", full: bool = False) -> Path:
+    """Generate the TUST results file for specified generators.
 
-    if input_file.exists():
-        with open(input_file, 'r') as f:
-            generator_list = [line.strip() for line in f.readlines()]
+    With `full`, every attribute of every cycle is exported instead of the TUST table.
+    """
+    input_file = case_path / "autotust_input_generators.csv"
+    generator_names = read_generator_filter(input_file)
+    if generator_names is not None:
         logger.info(f"Using generator list from {input_file}")
     else:
         logger.info(f"File {input_file} not found. Using all generators.")
 
-    with open(case_path / "autotust_results.csv", mode='w', newline='') as file:
-        writer = csv.writer(file)
-        header = ["USINA", "SUBSISTEMA", "CEG"] + [str(year) for year in years] + ["MUST_2032", "BUS_2023", "BUS_2032"]
-        writer.writerow(header)
-
-        for generator in database.generators:
-            if generator_list is None or generator.name in generator_list:
-                row = [generator.name]
-                subsistema = STATE_TO_SUBSYSTEM.get(generator.uf, '')
-                row.extend([subsistema, generator.ceg])
-                for year in years:
-                    tust_year = generator.tust.get(year, '-')
-                    row.extend([tust_year])
-                must31 = generator.must.get(2031, '-')
-                row.extend([must31])
-                bus24 = generator.bus.get(2024, '-')
-                row.extend([bus24])
-                bus31 = generator.bus.get(2031, '-')
-                row.extend([bus31])
-                writer.writerow(row)
-
-    logger.info(f"TUST results written to {case_path / 'autotust_results.csv'}")
+    output_path = case_path / f"autotust_results{'_full' if full else ''}.{EXTENSIONS[fmt]}"
+    rows = export_results(database.columnar(), output_path, fmt, generator_names,
+                          years=range(INITIAL_CYCLE, FINAL_CYCLE + 1), full=full)
+    logger.info(f"TUST results ({rows} rows) written to {output_path}")
+    return output_path
+
+
+def get_tust_summary(case_path: Path, database: Database, by: Sequence[str] = ("subsystem", "cycle")) -> None:
+    """Write TUST statistics grouped by `by` to autotust_summary.csv."""
+    summary = aggregate_tust(database.columnar(), by=by, years=VALID_YEARS)
+    summary.to_csv(case_path / "autotust_summary.csv", index=False, float_format="%.4f")
+    logger.info(f"Wrote {len(summary)} groups to {case_path / 'autotust_summary.csv'}")
+
+
+def get_base_diff(case_path: Path, database: Database, other: Optional[Database] = None,
+                  years: Optional[Sequence[int]] = None, fmt: str = "csv") -> ChangeSet:
+    """Write the generator changes of a base to autotust_diff_* files in the case folder.
+
+    Without `other`, each cycle is compared with the one before it; with `other`,
+    each cycle of this base is compared with the same cycle of `other`.
+    """
+    if other is None:
+        changes = diff_cycles(database.columnar(), years)
+    else:
+        changes = diff_bases(database.columnar(), other.columnar(), years)
+    paths = changes.export(case_path, fmt=fmt)
+    logger.info(f"Wrote {len(changes)} changes to {len(paths)} files in {case_path}")
+    return changes
+
+
+def _case_inputs(case_path: Path, database: Database, years: Sequence[int]):
+    """Base RAP and PDR of a solved case, from its summary reports and autotust.csv."""
+    csv_path = Path(case_path) / "autotust.csv"
+    csv_inputs = read_autotust_csv(csv_path) if csv_path.exists() else None
+    return base_inputs({data.year: data.rap for data in database.cycle_data}, csv_inputs, years)
+
+
+def get_tust_bands(case_path: Path, database: Database, samples: int = 1000, rap_sigma: float = 0.05,
+                   pdr_sigma: float = 0.0, reference_path: Optional[Path] = None,
+                   reference: Optional[Database] = None, seed: Optional[int] = None,
+                   years: Optional[Sequence[int]] = None) -> pd.DataFrame:
+    """Write P10/P50/P90 TUST bands of every generator under sampled RAP and PDR paths to autotust_montecarlo.csv.
+
+    The TUST of the solved base is rescaled per sample (see montecarlo). PDR
+    uncertainty needs `reference`, the same base solved with another PDR, loaded
+    from `reference_path`; a `pdr_sigma` above zero without it raises ValueError.
+    """
+    if pdr_sigma > 0 and reference is None:
+        raise ValueError("PDR uncertainty (pdr_sigma > 0) needs a reference case solved with another PDR.")
+    store = database.columnar()
+    years = sorted(store.years.tolist() if years is None else years)
+    base_rap, base_pdr = _case_inputs(case_path, database, years)
+
+    sensitivity = None
+    if reference is not None:
+        if np.isnan(base_pdr).any():
+            raise ValueError(f"autotust.csv of {case_path} lacks the PDR of some cycles, needed with a reference case.")
+        reference_rap, reference_pdr = _case_inputs(reference_path, reference, years)
+        sensitivity = pdr_sensitivity(store, years, base_rap, base_pdr, reference.columnar(),
+                                      reference_rap, reference_pdr)
+
+    trajectories = sample_trajectories(years, base_rap, np.nan_to_num(base_pdr), samples, rap_sigma, pdr_sigma, seed)
+    bands = tust_bands(cycle_columns(store, years), trajectories, sensitivity)
+    table = bands_frame(store, years, bands)
+
+    output_path = Path(case_path) / "autotust_montecarlo.csv"
+    table.to_csv(output_path, index=False, float_format="%.4f")
+    logger.info(f"TUST bands of {table['NOME'].nunique()} generators over {samples} samples written to {output_path}")
+    return table
+
+
+def get_bus_ranking(case_path: Path, year: int, buses: Optional[Sequence[int]] = None) -> None:
+    """Rank connection buses of a cycle by the DC-flow tariff approximation, without running Nodal."""
+    network = load_network(case_path, year)
+    if network is None:
+        logger.error(f"No .dc file found for cycle {year}-{year + 1} in {case_path}.")
+        return
+    ranking = DCFlowModel(network).rank_buses(buses)
+    output_path = case_path / f"autotust_ranking_{year}-{year + 1}.csv"
+    ranking.to_csv(output_path, index=False, float_format="%.6f")
+    logger.info(f"Wrote {len(ranking)} buses to {output_path}")
 
 
 def run_streamlit() -> None:
@@ -320,14 +442,8 @@ def clean_ger(excel_path: str, db_path: str, output_path: str) -> None:
         
         geradores_retirados = []
         if ger_file.exists():
-            with open(ger_file, "r") as file, open(new_ger_file, "w") as new_file:
-                for line in file:
-                    name = line[0:32].strip()
-                    if name in geradores_retirar:
-                        geradores_retirados.append(name)
-                        new_file.write('(' + line)
-                    else:
-                        new_file.write(line)
+            result = apply_ger_operations(ger_file, [CommentOut(name) for name in geradores_retirar], new_ger_file)
+            geradores_retirados = result.edited
         geradores_retirados_total[year] = geradores_retirados
         logger.info(f"Ano {year}: {len(geradores_retirados)} geradores retirados.")
 
@@ -0,0 +1,77 @@
+"""
+On-disk cache of parsed case files, keyed by file fingerprints.
+Each cycle is stored separately so only the cycles whose files changed are re-parsed.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = ".autotust_cache"
+CACHE_VERSION = 2
+CYCLE_EXTENSIONS = ("GER", "TUH", "R63", "R61", "R60", "NOS")
+_CHUNK_SIZE = 1 << 20
+
+Fingerprint = Optional[Tuple[str, int, int, str]]
+
+
+def file_fingerprint(file_path: Path) -> Fingerprint:
+    """Return (path, size, mtime, content hash) of a file, or None if it does not exist."""
+    file_path = Path(file_path)
+    try:
+        stat = file_path.stat()
+    except FileNotFoundError:
+        return None
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return str(file_path.resolve()), stat.st_size, stat.st_mtime_ns, digest.hexdigest()
+
+
+def cycle_fingerprint(db_path: Path, year: int) -> Tuple[Fingerprint, ...]:
+    """Fingerprint the GER, TUH, summary report (R63, R61 or R60) and NOS files of a cycle."""
+    cycle_str = f"{year}-{year + 1}"
+    return tuple(file_fingerprint(Path(db_path) / f"{cycle_str}.{ext}") for ext in CYCLE_EXTENSIONS)
+
+
+def _cycle_cache_path(db_path: Path, year: int) -> Path:
+    return Path(db_path) / CACHE_DIR_NAME / f"{year}-{year + 1}.pkl"
+
+
+def load_cycle(db_path: Path, year: int, fingerprint: Tuple[Fingerprint, ...]) -> Optional[Any]:
+    """Return the cached records of a cycle if its fingerprint still matches."""
+    cache_path = _cycle_cache_path(db_path, year)
+    if not cache_path.exists():
+        return None
+
+    try:
+        with open(cache_path, "rb") as file:
+            entry: Dict[str, Any] = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+        logger.warning(f"Ignoring unreadable cache file {cache_path}: {e}")
+        return None
+
+    if entry.get("version") != CACHE_VERSION or entry.get("fingerprint") != fingerprint:
+        return None
+    return entry["records"]
+
+
+def save_cycle(db_path: Path, year: int, fingerprint: Tuple[Fingerprint, ...], records: Any) -> None:
+    """Store the parsed records of a cycle, replacing the cache file atomically."""
+    cache_path = _cycle_cache_path(db_path, year)
+    tmp_path = cache_path.with_suffix(".tmp")
+    entry = {"version": CACHE_VERSION, "fingerprint": fingerprint, "records": records}
+    try:
+        cache_path.parent.mkdir(exist_ok=True)
+        with open(tmp_path, "wb") as file:
+            pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write cache file {cache_path}: {e}")
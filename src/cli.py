@@ -1,6 +1,12 @@
 import argparse
+import sys
 from pathlib import Path
 import autotust
+from aggregation import GROUP_KEYS
+from export import FORMATS
+from projection import MODELS, make_model
+from scheduler import run_jobs
+from screening import run_screening
 
 
 def cli():
@@ -11,10 +17,74 @@ def cli():
     subparsers = parser.add_subparsers(dest='command', help='commands')
 
     nodal_parser = subparsers.add_parser('nodal', help='Run Nodal v63')
-    nodal_parser.add_argument('path', type=str, help='Path to the case folder')
+    nodal_parser.add_argument('paths', type=str, nargs='+', help='Paths to the case folders')
+    nodal_parser.add_argument('-j', '--jobs', type=int, default=1,
+                              help='Number of Nodal runs executed in parallel')
+    nodal_parser.add_argument('--force', action='store_true',
+                              help='Run every cycle, even those unchanged since their last run')
 
     output_parser = subparsers.add_parser('output', help='Get TUST results')
     output_parser.add_argument('path', type=str, help='Path to the case folder')
+    output_parser.add_argument('-w', '--workers', type=int, default=1,
+                               help='Number of cycles parsed in parallel')
+    output_parser.add_argument('--processes', action='store_true',
+                               help='Parse cycles in a process pool instead of threads')
+    output_parser.add_argument('--no-cache', action='store_true',
+                               help='Parse every cycle without reading or writing the cache')
+    output_parser.add_argument('--rebuild-cache', action='store_true',
+                               help='Re-parse every cycle and overwrite the cache')
+    output_parser.add_argument('-f', '--format', choices=FORMATS, default='csv',
+                               help='Output file format')
+    output_parser.add_argument('--full', action='store_true',
+                               help='Export TUST, MUST, bus and S/D flags of every cycle')
+
+    summary_parser = subparsers.add_parser('summary', help='Get TUST statistics by group')
+    summary_parser.add_argument('path', type=str, help='Path to the case folder')
+    summary_parser.add_argument('--by', nargs='+', default=['subsystem', 'cycle'], choices=GROUP_KEYS,
+                                help='Group keys of the summary')
+
+    diff_parser = subparsers.add_parser('diff', help='List generator changes between cycles or between two bases')
+    diff_parser.add_argument('path', type=str, help='Path to the case folder')
+    diff_parser.add_argument('other', type=str, nargs='?',
+                             help='Case folder to compare with (consecutive cycles of PATH by default)')
+    diff_parser.add_argument('--cycles', type=int, nargs='+', help='First years of the cycles to compare')
+    diff_parser.add_argument('-f', '--format', choices=FORMATS, default='csv', help='Output file format')
+
+    rank_parser = subparsers.add_parser('rank', help='Rank connection buses with the DC-flow approximation')
+    rank_parser.add_argument('path', type=str, help='Path to the case folder')
+    rank_parser.add_argument('cycle', type=int, help='First year of the cycle, e.g. 2024')
+    rank_parser.add_argument('--buses', type=int, nargs='+', help='Candidate bus numbers (all buses by default)')
+
+    screen_parser = subparsers.add_parser('screen', help='Screen candidate plants against a base')
+    screen_parser.add_argument('candidates', type=str,
+                               help='CSV or Excel table with NOME, MUST, COD and BUS01/BUS02 _ONS/_EPE columns')
+    screen_parser.add_argument('base', type=str, help='Path to the base case folder')
+    screen_parser.add_argument('-o', '--output', type=str, default='screening',
+                               help='Folder for the candidate cases, the state file and the ranking')
+    screen_parser.add_argument('-j', '--jobs', type=int, default=1,
+                               help='Number of Nodal runs executed in parallel')
+    screen_parser.add_argument('--force', action='store_true',
+                               help='Screen every candidate again, even those already done')
+
+    project_parser = subparsers.add_parser('project',
+                                           help='Write autotust_list.csv with the TUST projected past the last cycle')
+    project_parser.add_argument('path', type=str, help='Path to the case folder')
+    project_parser.add_argument('--model', choices=tuple(MODELS), default='linear', help='Projection model')
+    project_parser.add_argument('--step', type=float,
+                                help='Yearly TUST decrement of the linear model (0.02 by default)')
+    project_parser.add_argument('--window', type=int,
+                                help='Number of last cycles used by the cagr and regression models (5 by default)')
+
+    bands_parser = subparsers.add_parser('bands', help='Get P10/P50/P90 TUST bands under sampled RAP and PDR paths')
+    bands_parser.add_argument('path', type=str, help='Path to the solved case folder')
+    bands_parser.add_argument('-s', '--samples', type=int, default=1000, help='Number of sampled paths')
+    bands_parser.add_argument('--rap-sigma', type=float, default=0.05,
+                              help='Standard deviation of the yearly log-change of the RAP')
+    bands_parser.add_argument('--pdr-sigma', type=float, default=0.0,
+                              help='Standard deviation of the yearly change of the PDR')
+    bands_parser.add_argument('--reference', type=str,
+                              help='The same case solved with another PDR, to estimate the TUST sensitivity to it')
+    bands_parser.add_argument('--seed', type=int, help='Seed of the random generator')
 
     clean_parser = subparsers.add_parser('clean', help='Clean GER files')
     clean_parser.add_argument('excel_path', type=str, help='Path to the Excel file with generators to remove')
@@ -24,13 +94,49 @@ def cli():
     args = parser.parse_args()
 
     if args.command == 'nodal':
-        csv_path = Path(args.path) / "autotust.csv"
-        cycle_years, rap, pdr = autotust.read_autotust_csv(csv_path)
-        autotust.run_nodal63(Path(args.path), cycle_years, rap, pdr, nodal_path=Path(args.nodal))
+        jobs = []
+        for path in args.paths:
+            cycle_years, rap, pdr = autotust.read_autotust_csv(Path(path) / "autotust.csv")
+            jobs.extend(autotust.nodal_jobs(Path(path), cycle_years, rap, pdr))
+        results = run_jobs(jobs, Path(args.nodal), workers=args.jobs, force=args.force)
+        failed = [result for result in results if not result.ok]
+        if failed:
+            sys.exit(f"{len(failed)} of {len(results)} Nodal runs failed.")
 
     elif args.command == 'output':
+        database = autotust.load_base(Path(args.path), workers=args.workers, use_processes=args.processes,
+                                      use_cache=not args.no_cache, rebuild_cache=args.rebuild_cache)
+        autotust.get_tust_results(Path(args.path), database, fmt=args.format, full=args.full)
+
+    elif args.command == 'summary':
+        database = autotust.load_base(Path(args.path))
+        autotust.get_tust_summary(Path(args.path), database, by=args.by)
+
+    elif args.command == 'diff':
+        database = autotust.load_base(Path(args.path))
+        other = autotust.load_base(Path(args.other)) if args.other else None
+        autotust.get_base_diff(Path(args.path), database, other, years=args.cycles, fmt=args.format)
+
+    elif args.command == 'rank':
+        autotust.get_bus_ranking(Path(args.path), args.cycle, args.buses)
+
+    elif args.command == 'screen':
+        cycle_years, rap, pdr = autotust.read_autotust_csv(Path(args.base) / "autotust.csv")
+        run_screening(Path(args.candidates), Path(args.base), Path(args.output), Path(args.nodal), cycle_years,
+                      rap, pdr, workers=args.jobs, force=args.force)
+
+    elif args.command == 'project':
+        database = autotust.load_base(Path(args.path))
+        model = make_model(args.model, step=args.step, window=args.window)
+        autotust.write_tust_list(Path(args.path), database, model)
+
+    elif args.command == 'bands':
+        if args.pdr_sigma > 0 and not args.reference:
+            bands_parser.error("--pdr-sigma needs --reference, the same case solved with another PDR")
         database = autotust.load_base(Path(args.path))
-        autotust.get_tust_results(Path(args.path), database)
+        reference = autotust.load_base(Path(args.reference)) if args.reference else None
+        autotust.get_tust_bands(Path(args.path), database, args.samples, args.rap_sigma, args.pdr_sigma,
+                                Path(args.reference) if args.reference else None, reference, args.seed)
 
     elif args.command == 'clean':
         autotust.clean_ger(args.excel_path, args.db_path, args.output_path)
@@ -0,0 +1,259 @@
+"""
+Columnar (generator x cycle) storage for generator time series.
+GeneratorView objects expose a row of the store with the same interface as models.Generator.
+"""
+
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+BUS_MISSING = -1
+CODE_MISSING = -1
+
+
+def _categorize(values: Sequence[Any], categories: List[Any]) -> np.ndarray:
+    """Encode values as codes into `categories`, appending unseen values in first-seen order."""
+    lookup = {category: code for code, category in enumerate(categories)}
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(categories)
+            categories.append(value)
+        codes[i] = code
+    return codes
+
+
+class GeneratorStore:
+    """Generator x cycle matrices with categorical codes for type, UF and subsystem.
+
+    Missing values are NaN in `must` and `tust`, BUS_MISSING in `bus` and
+    CODE_MISSING in the `s` and `d` flag codes.
+    """
+
+    def __init__(self, names: Sequence[str], years: Sequence[int], state_to_subsystem: Optional[Dict[str, str]] = None):
+        n, n_years = len(names), len(years)
+        self.state_to_subsystem = state_to_subsystem or {}
+        self.names = np.array(names, dtype=object)
+        self.cegs = np.full(n, "", dtype=object)
+        self.cegnucleos = np.zeros(n, dtype=object)
+        self.years = np.array(sorted(years), dtype=np.int64)
+        self.must = np.full((n, n_years), np.nan)
+        self.tust = np.full((n, n_years), np.nan)
+        self.bus = np.full((n, n_years), BUS_MISSING, dtype=np.int64)
+        self.s = np.full((n, n_years), CODE_MISSING, dtype=np.int8)
+        self.d = np.full((n, n_years), CODE_MISSING, dtype=np.int8)
+        self.flag_categories: List[str] = []
+        self.types: List[str] = []
+        self.ufs: List[str] = []
+        self.subsystems: List[str] = []
+        self.type_codes = np.zeros(n, dtype=np.int32)
+        self.uf_codes = np.zeros(n, dtype=np.int32)
+        self.subsystem_codes = np.zeros(n, dtype=np.int32)
+        self._year_index = {int(year): i for i, year in enumerate(self.years)}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_generators(cls, generators: Sequence[Any],
+                        state_to_subsystem: Optional[Dict[str, str]] = None) -> "GeneratorStore":
+        """Build a store from Generator objects (or views), keeping their order."""
+        years = set()
+        for generator in generators:
+            for series in (generator.must, generator.s, generator.d, generator.bus, generator.tust):
+                years.update(series.keys())
+
+        store = cls([generator.name for generator in generators], years, state_to_subsystem)
+        store.cegs[:] = [generator.ceg for generator in generators]
+        store.cegnucleos[:] = [generator.cegnucleo for generator in generators]
+        store.type_codes = _categorize([generator.type for generator in generators], store.types)
+        store.set_ufs(range(len(generators)), [generator.uf for generator in generators])
+
+        year_index = store._year_index
+        for row, generator in enumerate(generators):
+            for year, value in generator.must.items():
+                store.must[row, year_index[year]] = value
+            for year, value in generator.tust.items():
+                store.tust[row, year_index[year]] = value
+            for year, value in generator.bus.items():
+                store.bus[row, year_index[year]] = value
+            store.s[row, [year_index[year] for year in generator.s]] = _categorize(
+                list(generator.s.values()), store.flag_categories)
+            store.d[row, [year_index[year] for year in generator.d]] = _categorize(
+                list(generator.d.values()), store.flag_categories)
+        return store
+
+    def views(self) -> List["GeneratorView"]:
+        return [GeneratorView(self, row) for row in range(len(self))]
+
+    def set_ufs(self, rows: Sequence[int], ufs: Sequence[str]) -> None:
+        """Set the UF (and derived subsystem) codes of the given rows."""
+        rows = list(rows)
+        self.uf_codes[rows] = _categorize(ufs, self.ufs)
+        self.subsystem_codes[rows] = _categorize([self.state_to_subsystem.get(uf, '') for uf in ufs],
+                                                 self.subsystems)
+
+    def freeze(self) -> None:
+        """Make every array read-only, so a store shared between sessions cannot be modified in place."""
+        for value in vars(self).values():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+
+    def column(self, year: int, create: bool = False) -> int:
+        """Return the column of a year, adding it to every matrix if `create` is set."""
+        index = self._year_index.get(year)
+        if index is None:
+            if not create:
+                raise KeyError(year)
+            self._add_year(year)
+            index = self._year_index[year]
+        return index
+
+    def _add_year(self, year: int) -> None:
+        position = int(np.searchsorted(self.years, year))
+        self.years = np.insert(self.years, position, year)
+        self.must = np.insert(self.must, position, np.nan, axis=1)
+        self.tust = np.insert(self.tust, position, np.nan, axis=1)
+        self.bus = np.insert(self.bus, position, BUS_MISSING, axis=1)
+        self.s = np.insert(self.s, position, CODE_MISSING, axis=1)
+        self.d = np.insert(self.d, position, CODE_MISSING, axis=1)
+        self._year_index = {int(value): i for i, value in enumerate(self.years)}
+
+    def must_by_type(self) -> Dict[str, Dict[int, float]]:
+        """Sum MUST per generator type and year, over the years each type has values."""
+        present = ~np.isnan(self.must)
+        values = np.where(present, self.must, 0.0)
+        result = {}
+        for code, type_ in enumerate(self.types):
+            rows = self.type_codes == code
+            if not present[rows].any():
+                continue
+            years_present = present[rows].any(axis=0)
+            totals = values[rows].sum(axis=0)
+            result[type_] = {int(year): float(total)
+                             for year, total, has in zip(self.years, totals, years_present) if has}
+        return result
+
+    def mean_tust(self) -> float:
+        """Mean of every TUST value in the store."""
+        return float(np.nanmean(self.tust)) if np.isfinite(self.tust).any() else float("nan")
+
+
+class SeriesView(MutableMapping):
+    """Dict-like {year: value} view over one row of a store matrix."""
+
+    __slots__ = ("_store", "_row", "_attribute")
+
+    def __init__(self, store: GeneratorStore, row: int, attribute: str):
+        self._store = store
+        self._row = row
+        self._attribute = attribute
+
+    def _matrix(self) -> np.ndarray:
+        return getattr(self._store, self._attribute)
+
+    def _present(self) -> np.ndarray:
+        row = self._matrix()[self._row]
+        if self._attribute in ("must", "tust"):
+            return ~np.isnan(row)
+        return row != (BUS_MISSING if self._attribute == "bus" else CODE_MISSING)
+
+    def _decode(self, value: Any) -> Any:
+        if self._attribute in ("must", "tust"):
+            return float(value)
+        if self._attribute == "bus":
+            return int(value)
+        return self._store.flag_categories[value]
+
+    def _encode(self, value: Any) -> Any:
+        if self._attribute in ("s", "d"):
+            return _categorize([value], self._store.flag_categories)[0]
+        return value
+
+    def __getitem__(self, year: int) -> Any:
+        column = self._store._year_index.get(year)
+        if column is None or not self._present()[column]:
+            raise KeyError(year)
+        return self._decode(self._matrix()[self._row, column])
+
+    def __setitem__(self, year: int, value: Any) -> None:
+        column = self._store.column(year, create=True)
+        self._matrix()[self._row, column] = self._encode(value)
+
+    def __delitem__(self, year: int) -> None:
+        column = self._store._year_index.get(year)
+        if column is None or not self._present()[column]:
+            raise KeyError(year)
+        matrix = self._matrix()
+        if self._attribute in ("must", "tust"):
+            matrix[self._row, column] = np.nan
+        else:
+            matrix[self._row, column] = BUS_MISSING if self._attribute == "bus" else CODE_MISSING
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._store.years[self._present()].tolist())
+
+    def __len__(self) -> int:
+        return int(self._present().sum())
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class GeneratorView:
+    """Lightweight generator backed by a row of a GeneratorStore."""
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: GeneratorStore, row: int):
+        self._store = store
+        self._row = row
+
+    @property
+    def name(self) -> str:
+        return self._store.names[self._row]
+
+    @property
+    def type(self) -> str:
+        return self._store.types[self._store.type_codes[self._row]]
+
+    @property
+    def ceg(self) -> str:
+        return self._store.cegs[self._row]
+
+    @property
+    def cegnucleo(self):
+        return self._store.cegnucleos[self._row]
+
+    @property
+    def uf(self) -> str:
+        return self._store.ufs[self._store.uf_codes[self._row]]
+
+    @uf.setter
+    def uf(self, value: str) -> None:
+        self._store.set_ufs([self._row], [value])
+
+    @property
+    def must(self) -> SeriesView:
+        return SeriesView(self._store, self._row, "must")
+
+    @property
+    def tust(self) -> SeriesView:
+        return SeriesView(self._store, self._row, "tust")
+
+    @property
+    def bus(self) -> SeriesView:
+        return SeriesView(self._store, self._row, "bus")
+
+    @property
+    def s(self) -> SeriesView:
+        return SeriesView(self._store, self._row, "s")
+
+    @property
+    def d(self) -> SeriesView:
+        return SeriesView(self._store, self._row, "d")
+
+    def __repr__(self) -> str:
+        return f"GeneratorView(name={self.name!r}, type={self.type!r}, ceg={self.ceg!r}, uf={self.uf!r})"
@@ -0,0 +1,164 @@
+"""
+DC power-flow sensitivities and a nodal tariff approximation computed from the .dc network,
+without running Nodal.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import splu
+from scipy.stats import spearmanr
+
+from network import Network
+
+logger = logging.getLogger(__name__)
+
+
+class DCFlowModel:
+    """Linearized (DC) power flow of a network with one slack bus per island.
+
+    The reduced B matrix is factorized once; flows, PTDF columns and nodal
+    tariffs are then obtained by sparse triangular solves.
+    """
+
+    def __init__(self, network: Network, slack: Optional[int] = None):
+        self.network = network
+        n_buses, n_branches = network.n_buses, network.n_branches
+
+        # Branch x bus incidence: +1 at the from bus, -1 at the to bus
+        branches = np.arange(n_branches)
+        self.incidence = sparse.csr_matrix(
+            (np.concatenate((np.ones(n_branches), -np.ones(n_branches))),
+             (np.concatenate((branches, branches)), np.concatenate((network.from_index, network.to_index)))),
+            shape=(n_branches, n_buses))
+        # Out-of-service and zero-reactance branches get no susceptance, so they carry no flow
+        active = network.energized_branches() & (network.reactance != 0)
+        self.susceptance = np.zeros(n_branches)
+        self.susceptance[active] = 1.0 / network.reactance[active]
+        self.b_matrix = (self.incidence.T @ sparse.diags(self.susceptance) @ self.incidence).tocsc()
+        self.b_matrix.eliminate_zeros()
+
+        self.slack_buses = self._choose_slacks(slack)
+        self.free = np.ones(n_buses, dtype=bool)
+        self.free[self.slack_buses] = False
+        free_index = np.flatnonzero(self.free)
+        # B is symmetric, so a symmetric ordering without off-diagonal pivoting keeps the fill-in low
+        self._lu = splu(self.b_matrix[free_index][:, free_index].tocsc(), permc_spec="MMD_AT_PLUS_A",
+                        diag_pivot_thresh=0.0, options={"SymmetricMode": True})
+
+    def _choose_slacks(self, slack: Optional[int]) -> np.ndarray:
+        """Pick the given slack bus for its island and the largest generator bus for the others."""
+        network = self.network
+        adjacency = self.b_matrix != 0
+        n_islands, labels = connected_components(adjacency, directed=False)
+        slacks = np.empty(n_islands, dtype=np.int64)
+        order = np.lexsort((-network.generation, labels))
+        first = np.searchsorted(labels[order], np.arange(n_islands))
+        slacks[:] = order[first]
+        if slack is not None:
+            index = network.bus_index(slack)
+            slacks[labels[index]] = index
+        if n_islands > 1:
+            logger.info(f"Network has {n_islands} islands, using one slack bus in each.")
+        return np.sort(slacks)
+
+    def _solve(self, rhs: np.ndarray) -> np.ndarray:
+        """Solve B theta = rhs with zero angle at the slack buses (rhs has one row per bus)."""
+        theta = np.zeros(rhs.shape, dtype=float)
+        theta[self.free] = self._lu.solve(np.ascontiguousarray(rhs[self.free]))
+        return theta
+
+    def angles(self, injection: Optional[np.ndarray] = None) -> np.ndarray:
+        """Bus voltage angles for a net injection per bus (the network's own dispatch by default)."""
+        if injection is None:
+            injection = self.network.injection()
+        return self._solve(np.asarray(injection, dtype=float))
+
+    def flows(self, injection: Optional[np.ndarray] = None) -> np.ndarray:
+        """Active flow of every branch, positive from the `from` bus to the `to` bus."""
+        return self.susceptance * (self.incidence @ self.angles(injection))
+
+    def ptdf(self, buses: Optional[Iterable[int]] = None, branches: Optional[Iterable[int]] = None) -> np.ndarray:
+        """Branch x bus PTDF matrix for the selected bus numbers and branch positions.
+
+        Entry (k, j) is the flow change of branch k per MW injected at bus j and
+        withdrawn at the slack of its island. The matrix is dense, so select
+        buses or branches on large networks.
+        """
+        network = self.network
+        columns = np.arange(network.n_buses) if buses is None else network.bus_indices(buses)
+        rows = np.arange(network.n_branches) if branches is None else np.asarray(list(branches), dtype=np.int64)
+
+        if len(rows) < len(columns):
+            # B is symmetric, so PTDF rows are B^-1 A^T columns scaled by the susceptance
+            rhs = (self.incidence[rows].T @ sparse.diags(self.susceptance[rows])).toarray()
+            return self._solve(rhs)[columns].T
+        rhs = np.zeros((network.n_buses, len(columns)))
+        rhs[columns, np.arange(len(columns))] = 1.0
+        theta = self._solve(rhs)
+        return self.susceptance[rows, None] * (self.incidence[rows] @ theta)
+
+    def nodal_tariff(self, costs: Optional[np.ndarray] = None,
+                     injection: Optional[np.ndarray] = None) -> np.ndarray:
+        """Locational tariff per bus: sum over branches of cost * PTDF * sign(flow).
+
+        `costs` is the cost per MW of each branch; by default the reactance is used
+        as a proxy for line length. The result is computed with a single solve,
+        without forming the PTDF matrix.
+        """
+        if costs is None:
+            costs = self.network.reactance
+        weights = np.asarray(costs, dtype=float) * np.sign(self.flows(injection))
+        return self._solve(self.incidence.T @ (self.susceptance * weights))
+
+    def rank_buses(self, buses: Optional[Iterable[int]] = None, costs: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Rank buses for a new generator connection, cheapest generation tariff first.
+
+        Disconnected buses are left out: their tariff only reflects their island's slack.
+        """
+        network = self.network
+        tariff = self.nodal_tariff(costs)
+        index = np.arange(network.n_buses) if buses is None else network.bus_indices(buses)
+        index = index[network.bus_in_service[index]]
+        ranking = pd.DataFrame({
+            "bus": network.bus_numbers[index],
+            "name": [network.bus_names[i] for i in index],
+            "area": network.areas[index],
+            "tariff": tariff[index],
+        })
+        return ranking.sort_values("tariff", kind="stable").reset_index(drop=True)
+
+
+def compare_with_nos(model: DCFlowModel, nos_tust: Dict[int, float],
+                     costs: Optional[np.ndarray] = None) -> Dict[str, float]:
+    """Fit NOS = intercept + slope * tariff over the buses found in both.
+
+    Nodal adds a postage-stamp term and rescales the locational signal to recover
+    the RAP, so an affine fit is the right comparison. Disconnected buses are
+    left out. Returns the fit and the Pearson and Spearman correlations.
+    """
+    network = model.network
+    tariff = model.nodal_tariff(costs)
+    in_service = network.bus_numbers[network.bus_in_service]
+    common = [num for num in in_service.tolist() if num in nos_tust]
+    if len(common) < 3:
+        raise ValueError("Fewer than 3 buses are present in both the network and the NOS file.")
+    approximation = tariff[network.bus_indices(common)]
+    reference = np.array([nos_tust[num] for num in common], dtype=float)
+
+    slope, intercept = np.polyfit(approximation, reference, 1)
+    residual = reference - (intercept + slope * approximation)
+    total = ((reference - reference.mean()) ** 2).sum()
+    return {
+        "buses": len(common),
+        "slope": float(slope),
+        "intercept": float(intercept),
+        "r2": float(1 - (residual ** 2).sum() / total) if total > 0 else float("nan"),
+        "pearson": float(np.corrcoef(approximation, reference)[0, 1]),
+        "spearman": float(spearmanr(approximation, reference)[0]),
+        "rmse": float(np.sqrt((residual ** 2).mean())),
+    }
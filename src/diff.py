@@ -0,0 +1,211 @@
+"""
+Differences between two cycles of a base, or between the same cycles of two bases.
+Every comparison is done on whole columns of the columnar store.
+"""
+
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from columnar import BUS_MISSING, CODE_MISSING, GeneratorStore
+from export import EXTENSIONS, write_frames
+
+# Changes smaller than these are rounding noise from the fixed-width files
+MUST_TOLERANCE = 1e-6
+TUST_TOLERANCE = 1e-6
+
+CHANGE_TABLES = ("entering", "leaving", "must", "bus", "flags", "tust")
+
+
+@dataclass
+class ChangeSet:
+    """Generator changes between pairs of cycles, one table per kind of change.
+
+    Every table starts with the cycle pair (cycle_a, cycle_b) and the generator
+    name, type, CEG, CEG nucleus, UF and subsystem. A generator is in a cycle
+    when it has a line in that cycle's GER file.
+    """
+    entering: pd.DataFrame = field(default_factory=pd.DataFrame)
+    leaving: pd.DataFrame = field(default_factory=pd.DataFrame)
+    must: pd.DataFrame = field(default_factory=pd.DataFrame)
+    bus: pd.DataFrame = field(default_factory=pd.DataFrame)
+    flags: pd.DataFrame = field(default_factory=pd.DataFrame)
+    tust: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+    def tables(self) -> Dict[str, pd.DataFrame]:
+        return {table.name: getattr(self, table.name) for table in fields(self)}
+
+    def __len__(self) -> int:
+        return sum(len(table) for table in self.tables().values())
+
+    @classmethod
+    def concat(cls, change_sets: Iterable["ChangeSet"]) -> "ChangeSet":
+        change_sets = list(change_sets)
+        if not change_sets:
+            return cls()
+        return cls(**{name: pd.concat([getattr(change_set, name) for change_set in change_sets], ignore_index=True)
+                      for name in CHANGE_TABLES})
+
+    def summary(self) -> pd.DataFrame:
+        """Generator count and MUST involved per cycle pair and kind of change.
+
+        The MUST of leaving generators is taken from cycle_a, every other from cycle_b.
+        """
+        rows = []
+        for name, table in self.tables().items():
+            if table.empty:
+                continue
+            must = table["must_a"] if name == "leaving" else table["must_b"]
+            grouped = table.assign(_must=must.fillna(0.0)).groupby(["cycle_a", "cycle_b"], sort=True)
+            for (cycle_a, cycle_b), group in grouped:
+                rows.append({"cycle_a": cycle_a, "cycle_b": cycle_b, "change": name,
+                             "generators": len(group), "must": round(group["_must"].sum(), 4)})
+        return pd.DataFrame(rows, columns=["cycle_a", "cycle_b", "change", "generators", "must"])
+
+    def export(self, output_dir: Path, prefix: str = "autotust_diff", fmt: str = "csv") -> List[Path]:
+        """Write the summary and every change table to `prefix`_<table> files in `output_dir`."""
+        paths = []
+        for name, table in [("summary", self.summary())] + list(self.tables().items()):
+            path = Path(output_dir) / f"{prefix}_{name}.{EXTENSIONS[fmt]}"
+            write_frames([table], path, fmt)
+            paths.append(path)
+        return paths
+
+
+def _column(matrix: np.ndarray, rows: np.ndarray, column: Optional[int], missing) -> np.ndarray:
+    """Values of `rows` in a column, `missing` for rows of -1 and for a cycle the store lacks."""
+    values = np.full(len(rows), missing, dtype=matrix.dtype)
+    found = rows >= 0
+    if column is not None:
+        values[found] = matrix[rows[found], column]
+    return values
+
+
+def _align(store_a: GeneratorStore, store_b: GeneratorStore) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows of every generator of either store in each store, -1 where it is missing."""
+    if store_a is store_b:
+        rows = np.arange(len(store_a))
+        return rows, rows
+    index_a, index_b = pd.Index(store_a.names), pd.Index(store_b.names)
+    names = index_a.append(index_b[~index_b.isin(index_a)])
+    return index_a.get_indexer(names), index_b.get_indexer(names)
+
+
+def _pick(values_a: np.ndarray, values_b: np.ndarray, rows_a: np.ndarray, rows_b: np.ndarray) -> np.ndarray:
+    """values_b of the generators in base b, values_a of the others."""
+    values = np.empty(len(rows_a), dtype=object)
+    use_b = rows_b >= 0
+    values[use_b] = values_b[rows_b[use_b]]
+    values[~use_b] = values_a[rows_a[~use_b]]
+    return values
+
+
+def _decoded(store: GeneratorStore, codes: str, labels: str) -> np.ndarray:
+    return np.array(getattr(store, labels) + [""], dtype=object)[getattr(store, codes)]
+
+
+def _attributes(store_a: GeneratorStore, store_b: GeneratorStore, rows_a: np.ndarray,
+                rows_b: np.ndarray) -> pd.DataFrame:
+    """Descriptive columns of each aligned generator, from base b when it has the generator."""
+    frame = {"name": _pick(store_a.names, store_b.names, rows_a, rows_b)}
+    for key, codes, labels in (("type", "type_codes", "types"), ("ceg", "cegs", None),
+                               ("cegnucleo", "cegnucleos", None), ("uf", "uf_codes", "ufs"),
+                               ("subsystem", "subsystem_codes", "subsystems")):
+        if labels is None:
+            frame[key] = _pick(getattr(store_a, codes), getattr(store_b, codes), rows_a, rows_b)
+        else:
+            frame[key] = _pick(_decoded(store_a, codes, labels), _decoded(store_b, codes, labels), rows_a, rows_b)
+    return pd.DataFrame(frame)
+
+
+def _flags(store: GeneratorStore, codes: np.ndarray) -> np.ndarray:
+    # CODE_MISSING (-1) picks the trailing empty flag
+    return np.array(store.flag_categories + [""], dtype=object)[codes]
+
+
+def compare(store_a: GeneratorStore, year_a: int, store_b: GeneratorStore, year_b: int) -> ChangeSet:
+    """Changes from cycle `year_a` of `store_a` to cycle `year_b` of `store_b`.
+
+    The two stores may be the same object to compare two cycles of one base.
+    Generators are matched by name.
+    """
+    rows_a, rows_b = _align(store_a, store_b)
+    column_a = store_a._year_index.get(year_a)
+    column_b = store_b._year_index.get(year_b)
+
+    must_a = _column(store_a.must, rows_a, column_a, np.nan)
+    must_b = _column(store_b.must, rows_b, column_b, np.nan)
+    bus_a = _column(store_a.bus, rows_a, column_a, BUS_MISSING)
+    bus_b = _column(store_b.bus, rows_b, column_b, BUS_MISSING)
+    tust_a = _column(store_a.tust, rows_a, column_a, np.nan)
+    tust_b = _column(store_b.tust, rows_b, column_b, np.nan)
+    s_codes_a = _column(store_a.s, rows_a, column_a, CODE_MISSING)
+    s_codes_b = _column(store_b.s, rows_b, column_b, CODE_MISSING)
+    s_a, s_b = _flags(store_a, s_codes_a), _flags(store_b, s_codes_b)
+    d_a = _flags(store_a, _column(store_a.d, rows_a, column_a, CODE_MISSING))
+    d_b = _flags(store_b, _column(store_b.d, rows_b, column_b, CODE_MISSING))
+
+    # Every GER line sets the S flag, so a flag code marks the generators of the cycle
+    in_a, in_b = s_codes_a != CODE_MISSING, s_codes_b != CODE_MISSING
+    both = in_a & in_b
+
+    must_delta = must_b - must_a
+    tust_delta = tust_b - tust_a
+    with np.errstate(invalid="ignore"):
+        must_changed = both & ((np.abs(must_delta) > MUST_TOLERANCE) | (np.isnan(must_a) != np.isnan(must_b)))
+        tust_changed = np.abs(tust_delta) > TUST_TOLERANCE
+    masks = {
+        "entering": in_b & ~in_a,
+        "leaving": in_a & ~in_b,
+        "must": must_changed,
+        "bus": both & (bus_a != bus_b),
+        # Flag codes of two stores are not comparable, so the decoded flags are compared
+        "flags": both & ((s_a != s_b) | (d_a != d_b)),
+        "tust": tust_changed,
+    }
+    values = {
+        "entering": {"must_b": must_b, "bus_b": bus_b, "s_b": s_b, "d_b": d_b, "tust_b": tust_b},
+        "leaving": {"must_a": must_a, "bus_a": bus_a, "s_a": s_a, "d_a": d_a, "tust_a": tust_a},
+        "must": {"must_a": must_a, "must_b": must_b, "must_delta": must_delta},
+        "bus": {"bus_a": bus_a, "bus_b": bus_b, "must_b": must_b},
+        "flags": {"s_a": s_a, "s_b": s_b, "d_a": d_a, "d_b": d_b, "must_b": must_b},
+        "tust": {"tust_a": tust_a, "tust_b": tust_b, "tust_delta": tust_delta, "must_b": must_b},
+    }
+
+    selected = np.flatnonzero(np.logical_or.reduce(list(masks.values())))
+    attributes = _attributes(store_a, store_b, rows_a[selected], rows_b[selected])
+    tables = {}
+    for name, mask in masks.items():
+        keep = mask[selected]
+        table = attributes[keep].reset_index(drop=True)
+        table.insert(0, "cycle_b", year_b)
+        table.insert(0, "cycle_a", year_a)
+        for column, column_values in values[name].items():
+            column_values = column_values[selected][keep]
+            if column.startswith("bus"):
+                column_values = pd.arrays.IntegerArray(column_values, column_values == BUS_MISSING)
+            table[column] = column_values
+        tables[name] = table
+    return ChangeSet(**tables)
+
+
+def ger_years(store: GeneratorStore) -> List[int]:
+    """Cycles of the store with at least one GER line."""
+    return store.years[(store.s != CODE_MISSING).any(axis=0)].tolist()
+
+
+def diff_cycles(store: GeneratorStore, years: Optional[Iterable[int]] = None) -> ChangeSet:
+    """Changes between each cycle and the one before it, over `years` (every GER cycle by default)."""
+    years = sorted(years if years is not None else ger_years(store))
+    return ChangeSet.concat(compare(store, year_a, store, year_b) for year_a, year_b in zip(years, years[1:]))
+
+
+def diff_bases(store_a: GeneratorStore, store_b: GeneratorStore,
+               years: Optional[Iterable[int]] = None) -> ChangeSet:
+    """Changes from base a to base b in each cycle of `years` (the GER cycles of either base by default)."""
+    if years is None:
+        years = set(ger_years(store_a)) | set(ger_years(store_b))
+    return ChangeSet.concat(compare(store_a, year, store_b, year) for year in sorted(years))
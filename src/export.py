@@ -0,0 +1,180 @@
+"""
+Streaming export of generator results to CSV, Parquet or Feather.
+Rows are written in batches straight from the columnar store; pyarrow is only
+needed for the Parquet and Feather formats.
+"""
+
+import logging
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence, Set
+
+import numpy as np
+import pandas as pd
+
+from columnar import BUS_MISSING, CODE_MISSING, GeneratorStore
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "parquet", "feather")
+EXTENSIONS = {"csv": "csv", "parquet": "parquet", "feather": "feather"}
+BATCH_SIZE = 10000
+MISSING = "-"
+
+
+def read_generator_filter(file_path: Path) -> Optional[Set[str]]:
+    """Read the generator names to export, one per line, or None if the file does not exist."""
+    if not file_path.exists():
+        return None
+    with open(file_path, "r") as file:
+        return {line.strip() for line in file}
+
+
+def select_rows(store: GeneratorStore, names: Optional[Set[str]] = None) -> np.ndarray:
+    """Store rows of the generators in `names` (every row when it is None)."""
+    if names is None:
+        return np.arange(len(store))
+    return np.flatnonzero(np.fromiter((name in names for name in store.names), dtype=bool, count=len(store)))
+
+
+def _year_values(store: GeneratorStore, matrix: np.ndarray, rows: np.ndarray, year: int, missing) -> np.ndarray:
+    column = store._year_index.get(year)
+    if column is None:
+        return np.full(len(rows), missing, dtype=matrix.dtype)
+    return matrix[rows, column]
+
+
+def _bus_series(values: np.ndarray) -> pd.Series:
+    """Bus numbers as nullable integers, so missing buses do not turn the column into floats."""
+    series = pd.Series(values, dtype="Int64")
+    series[values == BUS_MISSING] = pd.NA
+    return series
+
+
+def _text(values: Sequence) -> pd.Series:
+    return pd.Series(values, dtype="string")
+
+
+def results_frame(store: GeneratorStore, rows: np.ndarray, years: Iterable[int]) -> pd.DataFrame:
+    """The autotust_results layout: TUST per cycle plus the MUST and bus columns."""
+    subsystems = np.array(store.subsystems, dtype=object)
+    frame = {
+        "USINA": _text(store.names[rows]),
+        "SUBSISTEMA": _text(subsystems[store.subsystem_codes[rows]]),
+        "CEG": _text(store.cegs[rows]),
+    }
+    for year in years:
+        frame[str(year)] = _year_values(store, store.tust, rows, year, np.nan)
+    # Column names kept from the original report; the values are from the 2031 and 2024 cycles
+    frame["MUST_2032"] = _year_values(store, store.must, rows, 2031, np.nan)
+    frame["BUS_2023"] = _bus_series(_year_values(store, store.bus, rows, 2024, BUS_MISSING))
+    frame["BUS_2032"] = _bus_series(_year_values(store, store.bus, rows, 2031, BUS_MISSING))
+    return pd.DataFrame(frame)
+
+
+def attributes_frame(store: GeneratorStore, rows: np.ndarray) -> pd.DataFrame:
+    """Every attribute of every cycle, one row per generator and cycle with any value."""
+    present = (~np.isnan(store.tust[rows]) | ~np.isnan(store.must[rows]) | (store.bus[rows] != BUS_MISSING)
+               | (store.s[rows] != CODE_MISSING) | (store.d[rows] != CODE_MISSING))
+    local, columns = np.nonzero(present)
+    generator_rows = rows[local]
+    # CODE_MISSING (-1) picks the trailing None
+    flags = np.array(store.flag_categories + [None], dtype=object)
+    types = np.array(store.types, dtype=object)
+    ufs = np.array(store.ufs, dtype=object)
+    subsystems = np.array(store.subsystems, dtype=object)
+    return pd.DataFrame({
+        "name": _text(store.names[generator_rows]),
+        "type": _text(types[store.type_codes[generator_rows]]),
+        "ceg": _text(store.cegs[generator_rows]),
+        "cegnucleo": _text([str(value) for value in store.cegnucleos[generator_rows]]),
+        "uf": _text(ufs[store.uf_codes[generator_rows]]),
+        "subsystem": _text(subsystems[store.subsystem_codes[generator_rows]]),
+        "cycle": store.years[columns],
+        "tust": store.tust[generator_rows, columns],
+        "must": store.must[generator_rows, columns],
+        "bus": _bus_series(store.bus[generator_rows, columns]),
+        "s": _text(flags[store.s[generator_rows, columns]]),
+        "d": _text(flags[store.d[generator_rows, columns]]),
+    })
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("pyarrow is required for Parquet and Feather output (pip install pyarrow).") from e
+    return pyarrow
+
+
+def write_frames(frames: Iterable[pd.DataFrame], file_path: Path, fmt: str = "csv") -> int:
+    """Write a stream of frames with the same columns to one file, returning the row count."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}. Expected one of {FORMATS}.")
+    rows = 0
+    if fmt == "csv":
+        for i, frame in enumerate(frames):
+            frame.to_csv(file_path, mode="w" if i == 0 else "a", header=i == 0, index=False, na_rep=MISSING,
+                         lineterminator="\r\n")
+            rows += len(frame)
+        return rows
+
+    pa = _import_pyarrow()
+    writer, schema = None, None
+    try:
+        for frame in frames:
+            batch = pa.RecordBatch.from_pandas(frame, schema=schema, preserve_index=False)
+            if writer is None:
+                schema = batch.schema
+                if fmt == "parquet":
+                    writer = pa.parquet.ParquetWriter(file_path, schema)
+                else:
+                    # Feather V2 is the Arrow IPC file format
+                    writer = pa.ipc.new_file(file_path, schema)
+            if fmt == "parquet":
+                writer.write_batch(batch)
+            else:
+                writer.write(batch)
+            rows += len(frame)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def _batched(rows: np.ndarray, batch_size: int) -> Iterator[np.ndarray]:
+    # An empty selection still yields one batch so the file gets its header
+    for start in range(0, max(len(rows), 1), batch_size):
+        yield rows[start:start + batch_size]
+
+
+def export_results(store: GeneratorStore, file_path: Path, fmt: str = "csv", names: Optional[Set[str]] = None,
+                   years: Iterable[int] = range(2024, 2033), full: bool = False,
+                   batch_size: int = BATCH_SIZE) -> int:
+    """Export the results of the generators in `names` (all by default), one batch of rows at a time.
+
+    With `full`, every attribute of every cycle is written in long format instead
+    of the autotust_results layout. Returns the number of rows written.
+    """
+    rows = select_rows(store, names)
+    years = list(years)
+    if full:
+        frames = (attributes_frame(store, batch) for batch in _batched(rows, batch_size))
+    else:
+        frames = (results_frame(store, batch, years) for batch in _batched(rows, batch_size))
+    return write_frames(frames, file_path, fmt)
+
+
+def series_csv_chunks(names: Sequence[str], years: Sequence[int], values: np.ndarray,
+                      index_label: str = "Year", batch_size: int = BATCH_SIZE) -> Iterator[bytes]:
+    """CSV of a (row x year) matrix, one row per name, yielded in encoded batches as they are formatted.
+
+    Missing values are left empty, as in the dashboard downloads.
+    """
+    yield (",".join([index_label] + [str(year) for year in years]) + "\n").encode()
+    for batch in _batched(np.arange(len(names)), batch_size):
+        if len(batch) == 0:
+            continue
+        frame = pd.DataFrame(values[batch], index=pd.Index(np.asarray(names, dtype=object)[batch]))
+        yield frame.to_csv(header=False).encode()
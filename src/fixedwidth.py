@@ -0,0 +1,303 @@
+"""
+Column-spec driven reader for the fixed-width Nodal files (.GER, .TUH, .NOS).
+Files are memory-mapped and read in chunks of whole lines; within a chunk each
+column is sliced for every line at once, so memory does not grow with the file.
+"""
+
+import mmap
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+ColumnSpec = Dict[str, Tuple[int, int]]
+
+GER_LAYOUT: ColumnSpec = {
+    "type": (0, 3),
+    "name": (0, 32),
+    "must": (32, 41),
+    "c": (41, 42),
+    "d": (42, 43),
+    "o": (43, 44),
+    "s": (44, 45),
+    "i": (45, 46),
+    "discount": (46, 51),
+    "month": (51, 53),
+    "ceg": (52, 62),
+    "cegnucleo": (55, 60),
+    "ons": (61, 66),
+    "e": (66, 67),
+    "aux": (67, 68),
+    "trans": (68, 69),
+    "bus01": (70, 75),
+}
+
+TUH_LAYOUT: ColumnSpec = {
+    "name": (3, 35),
+    "ceg": (36, 43),
+    "uf": (51, 53),
+    "tust": (96, 102),
+    "tust_total": (126, 132),
+}
+
+NOS_LAYOUT: ColumnSpec = {
+    "num": (2, 7),
+    "name": (8, 20),
+    "key": (8, 21),
+    "tustb": (34, 43),
+    "tust": (37, 43),
+}
+
+# Header lines skipped at the top of .TUH and .NOS files
+REPORT_HEADER_LINES = 11
+# Bytes of a file decoded at once; a chunk is extended to the end of its last line
+CHUNK_BYTES = 1 << 23
+
+_NEWLINE = ord("\n")
+_CARRIAGE_RETURN = ord("\r")
+_COMMENT = ord("(")
+_END_MARKER = ord("X")
+_WHITESPACE = np.array([ord(c) for c in " \t\n\r\x0b\x0c"], dtype=np.uint8)
+
+
+def _line_bounds(buffer: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return start, content end (without line break) and text length of every line."""
+    newlines = np.flatnonzero(buffer == _NEWLINE)
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [len(buffer)]))
+    if starts[-1] == len(buffer):
+        starts, ends = starts[:-1], ends[:-1]
+    has_newline = ends < len(buffer)
+
+    # Text mode turns "\r\n" into "\n"
+    nonempty = ends > starts
+    carriage = np.zeros(len(ends), dtype=bool)
+    carriage[nonempty] = buffer[ends[nonempty] - 1] == _CARRIAGE_RETURN
+    content_ends = ends - carriage
+    text_lengths = content_ends - starts + has_newline
+    return starts, content_ends, text_lengths
+
+
+def _char_at(buffer: np.ndarray, starts: np.ndarray, content_ends: np.ndarray,
+             text_lengths: np.ndarray, offset: int) -> np.ndarray:
+    """Character at a line offset, with "\\n" past the content and 0 past the text."""
+    positions = starts + offset
+    chars = np.zeros(len(starts), dtype=np.uint8)
+    inside = positions < content_ends
+    chars[inside] = buffer[positions[inside]]
+    chars[~inside & (offset < text_lengths)] = _NEWLINE
+    return chars
+
+
+def _end_of_file_mask(buffer, starts, content_ends, text_lengths) -> np.ndarray:
+    """Vectorized form of line[:2].strip() == "X"."""
+    first = _char_at(buffer, starts, content_ends, text_lengths, 0)
+    second = _char_at(buffer, starts, content_ends, text_lengths, 1)
+    first_blank = np.isin(first, _WHITESPACE) | (first == 0)
+    second_blank = np.isin(second, _WHITESPACE) | (second == 0)
+    return ((first == _END_MARKER) & second_blank) | (first_blank & (second == _END_MARKER))
+
+
+def _comment_mask(buffer, starts, content_ends, text_lengths) -> np.ndarray:
+    """Vectorized form of len(line) <= 1 or line[0] == "("."""
+    first = _char_at(buffer, starts, content_ends, text_lengths, 0)
+    return (text_lengths <= 1) | (first == _COMMENT)
+
+
+def _extract_column(padded: np.ndarray, starts: np.ndarray, content_ends: np.ndarray,
+                    start: int, end: int, text_lengths: Optional[np.ndarray] = None) -> np.ndarray:
+    """Slice [start:end] of every line and return the stripped values as a str array.
+
+    With `text_lengths`, values are returned as line[start:end] of the text
+    line: unstripped and with the line break when the slice reaches it.
+    `padded` must extend at least `end` bytes past the last line.
+    """
+    width = end - start
+    # One row of `width` bytes per line, gathered from a strided view of the buffer
+    chars = sliding_window_view(padded, width)[starts + start]
+    line_lengths = content_ends - starts
+    if len(line_lengths) and line_lengths.min() < end:
+        chars = np.where(np.arange(start, end) < line_lengths[:, None], chars, np.uint8(0))
+    # ISO-8859-1 maps each byte to the code point with the same value
+    values = chars.astype(np.uint32).view(f"U{width}").ravel()
+    if text_lengths is None:
+        return np.char.strip(values)
+    breaks = np.flatnonzero((line_lengths >= start) & (line_lengths < end) & (text_lengths > line_lengths))
+    if len(breaks):
+        values[breaks] = np.char.add(values[breaks], "\n")
+    return values
+
+
+def _code_points(values: np.ndarray) -> np.ndarray:
+    """View a str array as an (n, width) matrix of code points, 0 past the end."""
+    values = np.ascontiguousarray(values)
+    width = values.dtype.itemsize // 4
+    return values.view(np.uint32).reshape(len(values), width)
+
+
+def _parse_numbers(values: np.ndarray, integer: bool, blank: Optional[float]) -> np.ndarray:
+    """Parse stripped decimal strings, falling back to Python for anything unusual."""
+    dtype = np.int64 if integer else np.float64
+    result = np.zeros(len(values), dtype=dtype)
+    if len(values) == 0 or values.dtype.itemsize == 0:
+        simple = np.zeros(len(values), dtype=bool)
+    else:
+        points = _code_points(values)
+        is_digit = (points >= 48) & (points <= 57)
+        is_dot = points == 46
+        signed = (points[:, 0] == 45) | (points[:, 0] == 43)
+        allowed = is_digit | (points == 0) | (is_dot if not integer else False)
+        allowed[:, 0] |= signed
+        digit_count = is_digit.sum(axis=1)
+        # Up to 15 digits keeps the integer mantissa exact, so mantissa / 10**decimals
+        # rounds exactly like float(text)
+        simple = allowed.all(axis=1) & (is_dot.sum(axis=1) <= 1) & (digit_count > 0) & (digit_count <= 15)
+
+        # Place value of each digit = 10 ** (digits to its right)
+        digits_right = np.cumsum(is_digit[:, ::-1], axis=1)[:, ::-1] - is_digit
+        place = np.power(10, np.minimum(digits_right, 18), dtype=np.int64)
+        mantissa = np.where(is_digit, (points.astype(np.int64) - 48) * place, 0).sum(axis=1)
+        if integer:
+            numbers = mantissa
+        else:
+            decimals = (is_digit & (np.cumsum(is_dot, axis=1) > 0)).sum(axis=1)
+            numbers = mantissa / np.power(10.0, decimals)
+        numbers[points[:, 0] == 45] *= -1
+        result[simple] = numbers[simple]
+
+    rest = ~simple
+    if blank is not None:
+        empty = values == ""
+        result[empty] = blank
+        rest &= ~empty
+    if rest.any():
+        convert = int if integer else float
+        result[rest] = [convert(value) for value in values[rest].tolist()]
+    return result
+
+
+def parse_float(values: np.ndarray, blank: Optional[float] = None) -> np.ndarray:
+    """Convert a column of stripped strings to floats, like float(value).
+
+    Empty values become `blank` when it is given and raise ValueError otherwise.
+    """
+    return _parse_numbers(values, integer=False, blank=blank)
+
+
+def parse_int(values: np.ndarray, blank: Optional[int] = None) -> np.ndarray:
+    """Convert a column of stripped strings to integers, like int(value)."""
+    return _parse_numbers(values, integer=True, blank=blank)
+
+
+def _chunk_ranges(mapped: mmap.mmap, size: int, chunk_bytes: int) -> Iterator[Tuple[int, int]]:
+    """Byte ranges of about chunk_bytes that end right after a line break (or at the end of the file)."""
+    position = 0
+    while position < size:
+        end = min(position + chunk_bytes, size)
+        if end < size:
+            cut = mapped.rfind(b"\n", position, end)
+            if cut < 0:
+                cut = mapped.find(b"\n", end)
+            end = size if cut < 0 else cut + 1
+        yield position, end
+        position = end
+
+
+def _read_chunk(buffer: np.ndarray, padding: int, first_line: int, layout: ColumnSpec, columns: List[str],
+                skip_lines: int, skip_end_marker: bool, stop_at_end_marker: bool, raw: bool,
+                parts: Dict[str, List[np.ndarray]]) -> Tuple[int, bool]:
+    """Append the kept rows of a chunk of whole lines to `parts`.
+
+    `buffer` holds the chunk followed by `padding` zero bytes. Returns the
+    number of lines in the chunk and whether an end marker stopped the file.
+    """
+    padded, buffer = buffer, buffer[:len(buffer) - padding]
+    starts, content_ends, text_lengths = _line_bounds(buffer)
+    line_numbers = np.arange(first_line, first_line + len(starts))
+
+    if raw:
+        keep = np.ones(len(starts), dtype=bool)
+    else:
+        keep = ~_comment_mask(buffer, starts, content_ends, text_lengths)
+    keep &= line_numbers > skip_lines
+    stopped = False
+    if skip_end_marker or stop_at_end_marker:
+        end_marker = _end_of_file_mask(buffer, starts, content_ends, text_lengths)
+        if stop_at_end_marker and end_marker.any():
+            keep &= line_numbers < line_numbers[end_marker][0]
+            stopped = True
+        keep &= ~end_marker
+
+    starts, content_ends, text_lengths = starts[keep], content_ends[keep], text_lengths[keep]
+    parts["line_number"].append(line_numbers[keep])
+    if raw:
+        parts["line_length"].append(text_lengths)
+    for column in columns:
+        start, end = layout[column]
+        parts[column].append(_extract_column(padded, starts, content_ends, start, end,
+                                             text_lengths if raw else None))
+    return len(line_numbers), stopped
+
+
+def read_fixed_width(file_path: Path, layout: ColumnSpec, columns: Optional[Iterable[str]] = None,
+                     skip_lines: int = 0, skip_end_marker: bool = False,
+                     stop_at_end_marker: bool = False, raw: bool = False,
+                     chunk_bytes: int = CHUNK_BYTES) -> Dict[str, np.ndarray]:
+    """Read the selected columns of a fixed-width file as stripped str arrays.
+
+    Comment lines (empty or starting with "(") and the first skip_lines lines are
+    dropped. Lines whose first two characters strip to "X" are dropped with
+    skip_end_marker, or end the file with stop_at_end_marker. The 1-based line
+    number of each row is returned under "line_number".
+
+    With `raw`, comment lines are kept and values are sliced as line[start:end]
+    of the text line, unstripped; the text length of each line (line break included, as
+    len(line) in text mode) is returned under "line_length".
+
+    The file is memory-mapped and decoded chunk_bytes at a time, so besides the
+    returned columns memory stays within a few chunks whatever the file size;
+    with stop_at_end_marker nothing past the trailer is read.
+    """
+    columns = list(layout if columns is None else columns)
+    padding = max((layout[column][1] for column in columns), default=0)
+    parts: Dict[str, List[np.ndarray]] = {"line_number": [], **({"line_length": []} if raw else {}),
+                                          **{column: [] for column in columns}}
+    options = (layout, columns, skip_lines, skip_end_marker, stop_at_end_marker, raw, parts)
+
+    with open(file_path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            # mmap cannot map an empty file
+            _read_chunk(np.zeros(padding, dtype=np.uint8), padding, 1, *options)
+        else:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                first_line = 1
+                for start, end in _chunk_ranges(mapped, size, chunk_bytes):
+                    # Copied out of the map with the padding the column slices need past the last line
+                    buffer = np.zeros(end - start + padding, dtype=np.uint8)
+                    buffer[:end - start] = np.frombuffer(mapped, dtype=np.uint8, count=end - start, offset=start)
+                    lines, stopped = _read_chunk(buffer, padding, first_line, *options)
+                    first_line += lines
+                    if stopped:
+                        break
+
+    return {name: np.concatenate(values) for name, values in parts.items()}
+
+
+def read_ger(file_path: Path, columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """Read the generator lines of a .GER file."""
+    return read_fixed_width(file_path, GER_LAYOUT, columns)
+
+
+def read_tuh(file_path: Path, columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """Read the generator lines of a .TUH file."""
+    return read_fixed_width(file_path, TUH_LAYOUT, columns, skip_lines=REPORT_HEADER_LINES,
+                            skip_end_marker=True)
+
+
+def read_nos(file_path: Path, columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """Read the bus lines of a .NOS file, stopping at the "X" trailer."""
+    return read_fixed_width(file_path, NOS_LAYOUT, columns, skip_lines=REPORT_HEADER_LINES,
+                            stop_at_end_marker=True)
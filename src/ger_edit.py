@@ -0,0 +1,231 @@
+"""
+Batch editing of .GER files.
+All the operations of a cycle are applied in one streaming pass over its file,
+which is then replaced atomically.
+"""
+
+from dataclasses import dataclass, field
+import logging
+import os
+from pathlib import Path
+import shutil
+import tempfile
+from typing import Dict, Iterable, List, Optional, Union
+
+from fixedwidth import GER_LAYOUT
+
+logger = logging.getLogger(__name__)
+
+ENCODING = "ISO-8859-1"
+COMMENT = "("
+
+NAME_COLUMNS = GER_LAYOUT["name"]
+MUST_COLUMNS = GER_LAYOUT["must"]
+BUS_COLUMNS = GER_LAYOUT["bus01"]
+# A split line carries "<bus01><share01><bus02><share02>" from the bus01 column on
+SPLIT_END = BUS_COLUMNS[1] + 15
+
+
+def _format_bus(bus: int) -> str:
+    text = f"{int(bus):5d}"
+    if len(text) != 5:
+        raise ValueError(f"Bus number {bus} does not fit the 5-column GER field.")
+    return text
+
+
+def _format_share(share: float) -> str:
+    if not 0 < share < 100:
+        raise ValueError(f"Bus share {share} must be between 0 and 100.")
+    return f"{share:5.2f}"
+
+
+def _buses(bus01: int, bus02: Optional[int], share: float) -> str:
+    if bus02 is None:
+        return _format_bus(bus01)
+    return _format_bus(bus01) + _format_share(share) + _format_bus(bus02) + _format_share(100 - share)
+
+
+def _set_columns(line: str, start: int, end: int, text: str) -> str:
+    """Overwrite columns start:end of a line (without its newline), padding short lines."""
+    return line[:start].ljust(start) + text + line[end:]
+
+
+@dataclass
+class InsertGenerator:
+    """New generator line, optionally split 50/50 (or `share`/100 - `share`) across two buses."""
+    name: str
+    must: float
+    bus01: int
+    bus02: Optional[int] = None
+    share: float = 50.0
+    type: str = "AAA"
+
+    def line(self) -> str:
+        if len(self.name) > 28:
+            raise ValueError(f"Generator name {self.name!r} is longer than 28 characters.")
+        must = f"{self.must:8.2f}"
+        if len(must) != 8:
+            raise ValueError(f"MUST {self.must} of {self.name} does not fit the GER field.")
+        return f"{self.type:3s} {self.name:28s} {must}{' ' * 29}{_buses(self.bus01, self.bus02, self.share)}"
+
+
+@dataclass
+class CommentOut:
+    """Comment out every line of a generator."""
+    name: str
+
+
+@dataclass
+class ChangeBus:
+    """Replace the BUS01 of a generator, keeping the rest of its line (a split keeps its bus02 and shares)."""
+    name: str
+    bus: int
+
+    def apply(self, line: str) -> str:
+        start, end = BUS_COLUMNS
+        bus = f"{int(self.bus):05d}"
+        if len(bus) != end - start:
+            raise ValueError(f"Bus number {self.bus} does not fit the 5-column GER field.")
+        return _set_columns(line, start, end, bus)
+
+
+@dataclass
+class SingleBus:
+    """Connect a generator to a single bus, dropping any split."""
+    name: str
+    bus: int
+
+    def apply(self, line: str) -> str:
+        start = BUS_COLUMNS[0]
+        return _set_columns(line, start, SPLIT_END, _format_bus(self.bus).ljust(SPLIT_END - start)).rstrip()
+
+
+@dataclass
+class ChangeMust:
+    """Replace the MUST of a generator."""
+    name: str
+    must: float
+
+    def apply(self, line: str) -> str:
+        start, end = MUST_COLUMNS
+        must = f"{self.must:{end - start}.2f}"
+        if len(must) != end - start:
+            raise ValueError(f"MUST {self.must} of {self.name} does not fit the GER field.")
+        return _set_columns(line, start, end, must)
+
+
+@dataclass
+class SplitBus:
+    """Split a generator across two buses, `share` percent on bus01 and the rest on bus02."""
+    name: str
+    bus01: int
+    bus02: int
+    share: float = 50.0
+
+    def apply(self, line: str) -> str:
+        return _set_columns(line, BUS_COLUMNS[0], SPLIT_END, _buses(self.bus01, self.bus02, self.share))
+
+
+GerOperation = Union[InsertGenerator, CommentOut, ChangeBus, SingleBus, ChangeMust, SplitBus]
+
+
+@dataclass
+class GerEditResult:
+    """Outcome of a batch on one file: inserted generators, touched lines with their endings and names not found."""
+    file_path: Path
+    inserted: List[str] = field(default_factory=list)
+    edited: List[str] = field(default_factory=list)
+    edited_lines: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+
+
+def _line_name(line: str) -> str:
+    start, end = NAME_COLUMNS
+    return line[start:end].strip()
+
+
+def apply_ger_operations(ger_file: Path, operations: Iterable[GerOperation],
+                         output_file: Optional[Path] = None) -> GerEditResult:
+    """Apply a batch of operations to a .GER file in one pass.
+
+    Inserted generators go right after the header line, in batch order. The
+    operations on an existing generator are applied in batch order to every
+    one of its lines; comment lines are left untouched. The result is written
+    to a temporary file next to `output_file` (the input file by default) and
+    moved over it, so readers never see a partial file.
+    """
+    ger_file = Path(ger_file)
+    output_file = Path(output_file) if output_file is not None else ger_file
+    inserts: List[InsertGenerator] = []
+    edits: Dict[str, List[GerOperation]] = {}
+    for operation in operations:
+        if isinstance(operation, InsertGenerator):
+            inserts.append(operation)
+        else:
+            edits.setdefault(operation.name, []).append(operation)
+    inserted_lines = [insert.line() for insert in inserts]
+
+    result = GerEditResult(output_file, inserted=[insert.name for insert in inserts])
+    found = set()
+    descriptor, temp_path = tempfile.mkstemp(dir=output_file.parent, prefix=output_file.name, suffix=".tmp")
+    try:
+        with open(ger_file, "r", encoding=ENCODING, newline="") as source, \
+                os.fdopen(descriptor, "w", encoding=ENCODING, newline="") as target:
+            newline = None
+            for line in source:
+                content = line.rstrip("\r\n")
+                ending = line[len(content):]
+                name = _line_name(content)
+                line_edits = edits.get(name) if content[:1] != COMMENT else None
+                if line_edits:
+                    found.add(name)
+                    for edit in line_edits:
+                        if not isinstance(edit, CommentOut):
+                            content = edit.apply(content)
+                    if any(isinstance(edit, CommentOut) for edit in line_edits):
+                        content = COMMENT + content
+                    result.edited.append(name)
+                    line = content + (ending or newline or "\r\n")
+                    result.edited_lines.append(line)
+                if newline is None:
+                    # New generators go right below the header line, with the file's line ending
+                    newline = ending or "\r\n"
+                    target.write(line if ending else line + newline)
+                    target.writelines(inserted + newline for inserted in inserted_lines)
+                    continue
+                target.write(line)
+            if newline is None:
+                target.writelines(inserted + "\r\n" for inserted in inserted_lines)
+        shutil.copymode(ger_file, temp_path)
+        os.replace(temp_path, output_file)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+    result.missing = [name for name in edits if name not in found]
+    if result.missing:
+        logger.warning(f"{len(result.missing)} generators not found in {ger_file}: {', '.join(result.missing)}")
+    return result
+
+
+def ger_path(db_path: Path, year: int, suffix: str = "") -> Path:
+    return Path(db_path) / f"{year}-{year + 1}{suffix}.GER"
+
+
+def apply_ger_batch(db_path: Path, operations: Dict[int, Iterable[GerOperation]],
+                    suffix: str = "") -> Dict[int, GerEditResult]:
+    """Apply the operations of each cycle to its .GER file, one pass per file.
+
+    With a `suffix` the edited files are written as {cycle}{suffix}.GER and the
+    originals are kept.
+    """
+    results = {}
+    for year, year_operations in sorted(operations.items()):
+        ger_file = ger_path(db_path, year)
+        if not ger_file.exists():
+            logger.warning(f"File {ger_file} does not exist.")
+            continue
+        results[year] = apply_ger_operations(ger_file, year_operations, ger_path(db_path, year, suffix))
+        logger.info(f"Cycle {year}-{year + 1}: {len(results[year].inserted)} generators inserted, "
+                    f"{len(results[year].edited)} lines edited.")
+    return results
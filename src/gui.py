@@ -3,6 +3,7 @@ import sys
 import colorsys
 from pathlib import Path
 from collections import defaultdict
+from functools import partial
 
 import numpy as np
 import pandas as pd
@@ -10,15 +11,32 @@ import streamlit as st
 import plotly.graph_objects as go
 
 import autotust
+from aggregation import GROUP_KEYS
+from export import series_csv_chunks
+from projection import PROJECTION_YEARS
+from registry import DatabaseRegistry, case_signature
+from tariff import simulate_tariff
 
 # Add the current directory to sys.path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# Cycles are parsed in threads, so slow network shares are read concurrently
+LOAD_WORKERS = 9
+# Each Nodal run works in its own copy of the Nodal directory
+NODAL_WORKERS = os.cpu_count() or 1
+# Bases kept loaded at once across all sessions
+REGISTRY_SIZE = 4
+RESULTS_PAGE_SIZE = 50
+
+
+@st.cache_resource
+def database_registry():
+    """Registry of loaded bases shared by every session of the dashboard."""
+    return DatabaseRegistry(partial(autotust.load_base, workers=LOAD_WORKERS), max_entries=REGISTRY_SIZE)
 
-@st.cache_data
 def load_database(base_path):
-    """Load the database from the given path."""
-    return autotust.load_base(base_path)
+    """Shared read-only database of the given path, reloaded when its cycle files change."""
+    return database_registry().get(base_path)
 
 def normalize(value, min_val, max_val):
     return (value - min_val) / (max_val - min_val)
@@ -42,6 +60,10 @@ def create_line_chart(data, title, x_label, y_label):
     fig.update_layout(title=title, xaxis_title=x_label, yaxis_title=y_label)
     return fig
 
+def value_labels(values, fmt):
+    """Bar labels for an array of values, empty where a value is missing."""
+    return ["" if np.isnan(value) else fmt.format(value) for value in values]
+
 def create_bar_chart(x_data, y_data, title, x_label, text=None, color=None):
     """Create a bar chart with the given data and labels."""
     fig = go.Figure(data=[go.Bar(x=x_data, y=y_data, text=text, textposition='outside', marker_color=color)])
@@ -50,34 +72,61 @@ def create_bar_chart(x_data, y_data, title, x_label, text=None, color=None):
     return fig
 
 
-def display_results(database):
+def display_results(database, base_path):
     """Display the results tab."""
     st.write("# Results")
-    generator_id = st.selectbox("Select the generator:", [gen.name for gen in database.generators])
+    query = st.text_input("Search generators by name or CEG:")
+    rows = database.search_index().search(query)
+    if len(rows) == 0:
+        st.write(f"No generator matches {query!r}.")
+        return
+
+    pages = (len(rows) - 1) // RESULTS_PAGE_SIZE + 1
+    page = st.number_input(f"Page (of {pages}):", min_value=1, max_value=pages, value=1, step=1) if pages > 1 else 1
+    page_rows = rows[(page - 1) * RESULTS_PAGE_SIZE:page * RESULTS_PAGE_SIZE]
+    st.caption(f"{len(rows)} generators match.")
+    generator_id = st.selectbox("Select the generator:", database.columnar().names[page_rows].tolist())
     generator = database.get_generator_by_name(generator_id)
 
     if generator:
-        plot_generator_tust(generator, database.generators)
-        plot_iat_and_risk_expansion(generator)
+        tust = database.tust_series(generator)
+        plot_generator_tust(generator, database, tust)
+        plot_iat_and_risk_expansion(generator, tust)
         st.download_button(
             label="Download generator data",
-            data=convert_to_csv({generator_id: generator.tust}),
+            data=convert_to_csv({generator_id: tust}),
             file_name=f"{generator_id}_tust_data.csv",
             mime="text/csv"
         )
-        all_data_csv = convert_to_csv({gen.name: gen.tust for gen in database.generators})
-        st.download_button(
-            label="Download all data",
-            data=all_data_csv,
-            file_name="all_tust_data.csv",
-            mime="text/csv"
-        )
+        # The bulk file is only built once asked for, then kept for this session until the case files change
+        case_key = (str(Path(base_path).resolve()), case_signature(Path(base_path).resolve()))
+        export = st.session_state.get("all_tust_data")
+        if export is None or export[0] != case_key:
+            if st.button("Prepare all data"):
+                export = st.session_state["all_tust_data"] = (case_key, all_tust_csv(database))
+        if export is not None and export[0] == case_key:
+            st.download_button(
+                label="Download all data",
+                data=export[1],
+                file_name="all_tust_data.csv",
+                mime="text/csv"
+            )
     else:
         st.write(f"Generator {generator_id} not found.")
 
-def plot_generator_tust(generator, all_generators):
-    """Plot TUST values for the selected generator."""
-    years, tust_values = zip(*generator.tust.items())
+def all_tust_csv(database):
+    """CSV of every generator's TUST, projected years included, formatted in batches from the store.
+
+    st.download_button needs the whole file, so the batches are joined here.
+    """
+    store = database.columnar()
+    years = store.years.tolist() + list(PROJECTION_YEARS)
+    values = np.hstack((store.tust, database.projected_tust(years=PROJECTION_YEARS)))
+    return b"".join(series_csv_chunks(store.names, years, values))
+
+def plot_generator_tust(generator, database, tust):
+    """Plot TUST values for the selected generator, projected years included."""
+    years, tust_values = zip(*tust.items())
     fig = go.Figure()
 
     fig.add_trace(go.Scatter(
@@ -92,8 +141,7 @@ def plot_generator_tust(generator, all_generators):
         mode='lines', name='Average (Generator)'
     ))
 
-    all_tust_values = [tust for gen in all_generators for tust in gen.tust.values()]
-    average_global = np.mean(all_tust_values)
+    average_global = database.summary().mean_tust
     fig.add_trace(go.Scatter(
         x=years, y=[average_global] * len(years),
         mode='lines', name='Average (Global)'
@@ -106,34 +154,16 @@ def plot_generator_tust(generator, all_generators):
     )
     st.plotly_chart(fig)
 
-def plot_iat_and_risk_expansion(generator):
+def plot_iat_and_risk_expansion(generator, tust):
     """Plot IAT and Risk Expansion for the selected generator."""
     iat = st.number_input("Enter the value of IAT (%):", value=4.0, step=0.5)
     risk_expansion = st.number_input("Enter the value of Risk Expansion (%):", value=5.0, step=0.5)
-    limit = iat + risk_expansion
-
-    cumulative_iat = 1 + (iat / 100)
-    tust_nominal_values, controlled_tust, limit_upper_values, limit_lower_values = [], [], [], []
 
-    years = list(generator.tust.keys())
-
-    for i, year in enumerate(years):
-        cumulative_iat *= (1 + (iat / 100))
-        tust_nominal = generator.tust[year] * cumulative_iat
-        tust_nominal_values.append(tust_nominal)
-
-        if i == 0:
-            controlled_tust.append(tust_nominal)
-            limit_upper_values.append(tust_nominal)
-            limit_lower_values.append(tust_nominal)
-        else:
-            prev_controlled_tust = controlled_tust[-1]
-            limit_upper = (prev_controlled_tust * 0.8 + tust_nominal * 0.2) * (1 + limit / 100)
-            limit_lower = (prev_controlled_tust * 0.8 + tust_nominal * 0.2) * (1 - limit / 100)
-            limit_upper_values.append(limit_upper)
-            limit_lower_values.append(limit_lower)
-
-            controlled_tust.append(max(min(tust_nominal, limit_upper), limit_lower))
+    years = list(tust.keys())
+    simulation = simulate_tariff([list(tust.values())], years, iat, risk_expansion)
+    tust_nominal_values = simulation.nominal[0, 0].tolist()
+    controlled_tust = simulation.controlled[0, 0].tolist()
+    limit_upper_values, limit_lower_values = simulation.upper[0, 0].tolist(), simulation.lower[0, 0].tolist()
 
     fig_nominal = go.Figure()
     fig_nominal.add_trace(go.Scatter(
@@ -169,41 +199,42 @@ def convert_to_csv(data_dict):
 def display_general_results(database):
     """Display the general results tab."""
     st.write("# General Results")
-    avg_tust = database.calculate_avg_tust()
+    summary = database.summary()
 
-    subsystem_data = {ss: tusts for ss, tusts in avg_tust.items() if ss in autotust.SUBSYSTEM_MAP.keys()}
-    st.plotly_chart(create_line_chart(subsystem_data, "Average TUST by Subsystem", 'Year',
+    st.plotly_chart(create_line_chart(summary.avg_tust_by_subsystem, "Average TUST by Subsystem", 'Year',
                                       'Average TUST [R$/kW.month - ref. Jun/2023]'))
 
-    uf_data = {uf: tusts for uf, tusts in avg_tust.items() if uf in autotust.STATE_TO_SUBSYSTEM.keys()}
-    st.plotly_chart(
-        create_line_chart(uf_data, "Average TUST by UF", 'Year', 'Average TUST [R$/kW.month - ref. Jun/2023]'))
+    st.plotly_chart(create_line_chart(summary.avg_tust_by_uf, "Average TUST by UF", 'Year',
+                                      'Average TUST [R$/kW.month - ref. Jun/2023]'))
 
-    type_data = {type_: tusts for type_, tusts in avg_tust.items() if
-                 type_ not in autotust.SUBSYSTEM_MAP and type_ not in autotust.STATE_TO_SUBSYSTEM}
-    st.plotly_chart(
-        create_line_chart(type_data, "Average TUST by Type", 'Year', 'Average TUST [R$/kW.month - ref. Jun/2023]'))
+    st.plotly_chart(create_line_chart(summary.avg_tust_by_type, "Average TUST by Type", 'Year',
+                                      'Average TUST [R$/kW.month - ref. Jun/2023]'))
+
+    st.write("## TUST Statistics")
+    group_by = st.multiselect("Group by", GROUP_KEYS, default=["subsystem", "cycle"])
+    statistics = summary.statistics(group_by)
+    st.dataframe(statistics.round(2), hide_index=True)
+    st.download_button("Download statistics", statistics.to_csv(index=False).encode(),
+                       "autotust_statistics.csv", "text/csv")
 
 def display_assumptions(database):
     """Display the assumptions tab."""
     st.write("# Assumptions")
     st.write("### GER File")
+    summary = database.summary()
 
-    if database.generators:
-        must_values_by_type, must_total_values = database.calculate_must_values()
-        must_total_years = list(must_values_by_type[next(iter(must_values_by_type))].keys())
-
+    if summary.must_by_type:
         fig_must_total = go.Figure()
-        for type_, must_values in sorted(must_values_by_type.items(), reverse=True):
+        for type_, must_values in sorted(summary.must_by_type.items(), reverse=True):
             fig_must_total.add_trace(go.Bar(
-                x=must_total_years, y=[value / 1e3 for value in must_values.values()],
-                text=[f"{value / 1e3:.2f} GW" for value in must_values.values()],
+                x=summary.must_years, y=must_values / 1e3,
+                text=[f"{value / 1e3:.2f} GW" for value in must_values],
                 textposition='inside', name=type_
             ))
 
         fig_must_total.add_trace(go.Scatter(
-            x=must_total_years, y=[value / 1e3 for value in must_total_values.values()],
-            mode='text', text=[f"{value / 1e3:.2f} GW" for value in must_total_values.values()],
+            x=summary.must_years, y=summary.must_total / 1e3,
+            mode='text', text=[f"{value / 1e3:.2f} GW" for value in summary.must_total],
             textposition='top center', showlegend=False
         ))
 
@@ -218,49 +249,38 @@ def display_assumptions(database):
         st.write("The 'generators' list is empty.")
 
     st.write("### Cycle Data")
-    rap_years = [cycle_data.year for cycle_data in database.cycle_data]
-    rap_values = [cycle_data.rap for cycle_data in database.cycle_data if cycle_data.rap is not None]
+    years, values = summary.cycle_years, summary.cycle_values
 
     st.plotly_chart(create_bar_chart(
-        rap_years, rap_values, "RAP by Year", "<b>Year</b>",
-        text=[f"{value / 1e9:.2f} B" for value in rap_values]
+        years, values["rap"], "RAP by Year", "<b>Year</b>",
+        text=value_labels(values["rap"] / 1e9, "{:.2f} B")
     ))
 
-    must_ger_values = [cycle_data.mustg for cycle_data in database.cycle_data if cycle_data.mustg is not None]
     st.plotly_chart(create_bar_chart(
-        rap_years, must_ger_values, "MUSTg by Year", "<b>Year</b>",
-        text=[f"{value / 1e3:.2f} GW" for value in must_ger_values]
+        years, values["mustg"], "MUSTg by Year", "<b>Year</b>",
+        text=value_labels(values["mustg"] / 1e3, "{:.2f} GW")
     ))
 
-    must_cp_values = [cycle_data.mustp for cycle_data in database.cycle_data if cycle_data.mustp is not None]
-    must_fp_values = [cycle_data.mustfp for cycle_data in database.cycle_data if cycle_data.mustfp is not None]
-
     st.plotly_chart(go.Figure([
-        go.Bar(x=rap_years, y=must_cp_values, name="P",
-               text=[f"{value / 1e3:.1f}" if value is not None else 0 for value in must_cp_values],
-               textposition='outside'),
-        go.Bar(x=rap_years, y=must_fp_values, name="FP",
-               text=[f"{value / 1e3:.1f}" if value is not None else 0 for value in must_fp_values],
-               textposition='outside')
+        go.Bar(x=years, y=values["mustp"], name="P",
+               text=value_labels(values["mustp"] / 1e3, "{:.1f}"), textposition='outside'),
+        go.Bar(x=years, y=values["mustfp"], name="FP",
+               text=value_labels(values["mustfp"] / 1e3, "{:.1f}"), textposition='outside')
     ]).update_layout(
         title="MUSTc by Year", xaxis_title="<b>Year</b>", title_x=0.5,
         xaxis=dict(tickmode='linear', dtick=1)
     ).update_yaxes(visible=False))
 
-    teu_g_values = [cycle_data.teug for cycle_data in database.cycle_data if cycle_data.teug is not None]
     st.plotly_chart(create_bar_chart(
-        rap_years, teu_g_values, "TEUg by Year", "<b>Year</b>",
-        text=[f"{value:.2f}" for value in teu_g_values]
+        years, values["teug"], "TEUg by Year", "<b>Year</b>",
+        text=value_labels(values["teug"], "{:.2f}")
     ))
 
-    teu_cp_values = [cycle_data.teup for cycle_data in database.cycle_data if cycle_data.teup is not None]
-    teu_cf_values = [cycle_data.teufp for cycle_data in database.cycle_data if cycle_data.teufp is not None]
-
     st.plotly_chart(go.Figure([
-        go.Bar(x=rap_years, y=teu_cp_values, name="P",
-               text=[f"{value:.2f}" if value is not None else 0 for value in teu_cp_values], textposition='outside'),
-        go.Bar(x=rap_years, y=teu_cf_values, name="FP",
-               text=[f"{value:.2f}" if value is not None else 0 for value in teu_cf_values], textposition='outside')
+        go.Bar(x=years, y=values["teup"], name="P",
+               text=value_labels(values["teup"], "{:.2f}"), textposition='outside'),
+        go.Bar(x=years, y=values["teufp"], name="FP",
+               text=value_labels(values["teufp"], "{:.2f}"), textposition='outside')
     ]).update_layout(
         title="TEUc by Year", xaxis_title="<b>Year</b>", title_x=0.5,
         xaxis=dict(tickmode='linear', dtick=1)
@@ -271,10 +291,10 @@ def display_commands(base_path):
     st.write("# AutoTUST Commands")
     
     command = st.selectbox("Select command to run:", 
-                           ["Run Nodal v62", "Generate TUST Results", "Clean GER Files"])
+                           ["Run Nodal v63", "Generate TUST Results", "Clean GER Files"])
     
     if st.button("Execute Command"):
-        if command == "Run Nodal v62":
+        if command == "Run Nodal v63":
             execute_autotust_command('nodal', base_path)
         elif command == "Generate TUST Results":
             execute_autotust_command('output', base_path)
@@ -285,10 +305,14 @@ def execute_autotust_command(command, base_path):
     if command == 'nodal':
         csv_path = base_path / "autotust.csv"
         cycle_years, rap, pdr = autotust.read_autotust_csv(csv_path)
-        autotust.run_nodal62(base_path, cycle_years, rap, pdr)
-        st.success("Nodal v62 execution completed.")
+        results = autotust.run_nodal63(base_path, cycle_years, rap, pdr, workers=NODAL_WORKERS)
+        failed = [result.job.cycle_str for result in results if not result.ok]
+        if failed:
+            st.error(f"Nodal failed for cycles: {', '.join(failed)}")
+        else:
+            st.success("Nodal v63 execution completed.")
     elif command == 'output':
-        database = autotust.load_base(base_path)
+        database = load_database(base_path)
         autotust.get_tust_results(base_path, database)
         st.success("TUST results generated.")
     elif command == 'clean':
@@ -324,7 +348,7 @@ def gui():
         return
 
     if tab == "Results":
-        display_results(database)
+        display_results(database, BASE_PATH)
     elif tab == "General Results":
         display_general_results(database)
     elif tab == "Assumptions":
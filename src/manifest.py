@@ -0,0 +1,110 @@
+"""
+Run manifest stored in each case folder. It records a hash of every input of a
+Nodal run and the fingerprints of its outputs, so unchanged cycles are not re-run.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from cache import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "autotust_manifest.json"
+MANIFEST_VERSION = 1
+OUTPUT_EXTENSIONS = ("TUH", "NOS", "R63")
+
+# param.v63 entries filled per job; the rest of the template is shared by every run
+JOB_PARAM_INDICES = (1, 2, 3, 4, 20)
+
+
+def _content_hash(file_path: Path) -> Optional[str]:
+    fingerprint = file_fingerprint(file_path)
+    return None if fingerprint is None else fingerprint[3]
+
+
+def template_hash(template: List[Union[str, float]]) -> str:
+    """Hash the param.v63 template, ignoring the entries each job overwrites."""
+    shared = [str(value) for i, value in enumerate(template) if i not in JOB_PARAM_INDICES]
+    return hashlib.blake2b("\n".join(shared).encode(), digest_size=16).hexdigest()
+
+
+def job_inputs(case_path: Path, cycle: int, rap: float, pdr: float, template_digest: str) -> Dict[str, Any]:
+    """Inputs of the Nodal run of a cycle: the .dc and GER contents, RAP, PDR and the param template."""
+    cycle_str = f"{cycle}-{cycle + 1}"
+    return {
+        "dc": _content_hash(Path(case_path) / f"{cycle_str}.dc"),
+        "ger": _content_hash(Path(case_path) / f"{cycle_str}.GER"),
+        "rap": rap,
+        "pdr": pdr,
+        "template": template_digest,
+    }
+
+
+def job_outputs(case_path: Path, cycle: int) -> Dict[str, Any]:
+    """Fingerprints of the Nodal outputs of a cycle that AutoTUST reads."""
+    cycle_str = f"{cycle}-{cycle + 1}"
+    return {ext: file_fingerprint(Path(case_path) / f"{cycle_str}.{ext}") for ext in OUTPUT_EXTENSIONS}
+
+
+class RunManifest:
+    """Inputs and outputs of the last successful Nodal run of each cycle of a case."""
+
+    def __init__(self, case_path: Path):
+        self.path = Path(case_path) / MANIFEST_NAME
+        self.cycles: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r") as file:
+                content = json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest {self.path}: {e}")
+            return
+        if content.get("version") == MANIFEST_VERSION:
+            self.cycles = content.get("cycles", {})
+
+    def check(self, case_path: Path, cycle: int, inputs: Dict[str, Any]) -> Tuple[bool, str]:
+        """Return (up to date, reason) for a cycle given its current inputs."""
+        entry = self.cycles.get(f"{cycle}-{cycle + 1}")
+        if entry is None:
+            return False, "no previous run recorded"
+        if inputs["dc"] is None or inputs["ger"] is None:
+            return False, "input files missing"
+        changed = [key for key, value in inputs.items() if entry["inputs"].get(key) != value]
+        if changed:
+            return False, f"inputs changed: {', '.join(changed)}"
+        outputs = job_outputs(case_path, cycle)
+        missing = [ext for ext, fingerprint in outputs.items() if fingerprint is None]
+        if missing:
+            return False, f"outputs missing: {', '.join(missing)}"
+        # JSON stores the fingerprint tuples as lists
+        modified = [ext for ext, fingerprint in outputs.items() if list(fingerprint) != entry["outputs"].get(ext)]
+        if modified:
+            return False, f"outputs modified: {', '.join(modified)}"
+        return True, "inputs and outputs unchanged"
+
+    def record(self, case_path: Path, cycle: int, inputs: Dict[str, Any]) -> None:
+        """Record a successful run of a cycle and save the manifest."""
+        with self._lock:
+            self.cycles[f"{cycle}-{cycle + 1}"] = {"inputs": inputs, "outputs": job_outputs(case_path, cycle)}
+            self._save()
+
+    def _save(self) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        content = {"version": MANIFEST_VERSION, "cycles": self.cycles}
+        try:
+            with open(tmp_path, "w") as file:
+                json.dump(content, file, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write manifest {self.path}: {e}")
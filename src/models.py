@@ -1,12 +1,27 @@
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Union
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 from collections import defaultdict
 from pathlib import Path
+import hashlib
+import json
+
+import numpy as np
+
+from aggregation import aggregate_tust
+from columnar import GeneratorStore, GeneratorView
+from network import Network
+from projection import DEFAULT_MODEL, PROJECTION_YEARS, ProjectionModel, project_tust
+from search import SearchIndex
+from summary import Summary, build_summary
 
 NODAL_PATH = Path(r"C:\Program Files (x86)\Nodal_V63")
 INITIAL_CYCLE = 2024
 FINAL_CYCLE = 2032
 VALID_YEARS = set(range(INITIAL_CYCLE, FINAL_CYCLE + 1))
+# Cycles up to this one use the ONS bus numbering, later cycles the EPE one
+ONS_LAST_CYCLE = 2026
+# Type of the generators inserted for a studied plant
+GENERATOR_TYPE = "AAA"
 
 SUBSYSTEM_MAP = {
     'N': ['AP', 'AM', 'PA', 'RR', 'TO', 'MA'],
@@ -56,40 +71,183 @@ class CycleData:
     teufp: Optional[float] = None
 
 
+@dataclass
+class Candidate:
+    """A plant to screen: MUST, commercial operation cycle and connection buses in both numberings."""
+    name: str
+    must: float
+    cod: int
+    bus01_ons: int
+    bus01_epe: int
+    bus02_ons: Optional[int] = None
+    bus02_epe: Optional[int] = None
+
+    @property
+    def generator_name(self) -> str:
+        """Name of the inserted generator as it appears in the GER and TUH files."""
+        return f"{GENERATOR_TYPE} {self.name}"
+
+    def buses(self, year: int):
+        """(bus01, bus02) of a cycle, bus02 being None when the plant connects to a single bus."""
+        if year <= ONS_LAST_CYCLE:
+            return self.bus01_ons, self.bus02_ons
+        return self.bus01_epe, self.bus02_epe
+
+    def digest(self) -> str:
+        """Hash of the candidate data, so an edited candidate is screened again."""
+        return hashlib.blake2b(json.dumps(asdict(self), sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
 @dataclass
 class Database:
     """Main database for storing generators, buses, and cycle data."""
-    generators: List[Generator] = field(default_factory=list)
+    generators: List[Union[Generator, GeneratorView]] = field(default_factory=list)
     buses: List[Bus] = field(default_factory=list)
     cycle_data: List[CycleData] = field(default_factory=list)
+    networks: Dict[int, Network] = field(default_factory=dict)
+    _generators_by_name: Dict[str, Generator] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _generators_by_ceg: Dict[str, Generator] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _generators_by_cegnucleo: Dict[Union[int, str], List[Generator]] = field(
+        default_factory=lambda: defaultdict(list), init=False, repr=False, compare=False)
+    _buses_by_name: Dict[str, Bus] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _buses_by_num: Dict[int, Bus] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _store: Optional[GeneratorStore] = field(default=None, init=False, repr=False, compare=False)
+    _projections: Dict[Tuple[ProjectionModel, Tuple[int, ...]], np.ndarray] = field(
+        default_factory=dict, init=False, repr=False, compare=False)
+    _summary: Optional[Summary] = field(default=None, init=False, repr=False, compare=False)
+    _search_index: Optional[SearchIndex] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.reindex()
+
+    def reindex(self) -> None:
+        """Rebuild the lookup indexes from the generator and bus lists."""
+        self._generators_by_name.clear()
+        self._generators_by_ceg.clear()
+        self._generators_by_cegnucleo.clear()
+        self._buses_by_name.clear()
+        self._buses_by_num.clear()
+        for generator in self.generators:
+            self._index_generator(generator)
+        for bus in self.buses:
+            self._index_bus(bus)
+
+    def _index_generator(self, generator: Generator) -> None:
+        # First-seen wins, matching the previous linear scans.
+        self._generators_by_name.setdefault(generator.name, generator)
+        if generator.ceg:
+            self._generators_by_ceg.setdefault(generator.ceg, generator)
+        if generator.cegnucleo:
+            self._generators_by_cegnucleo[generator.cegnucleo].append(generator)
+
+    def _index_bus(self, bus: Bus) -> None:
+        self._buses_by_name.setdefault(bus.name, bus)
+        self._buses_by_num.setdefault(bus.num, bus)
 
     def add_generator(self, generator: Generator) -> None:
+        if self._store is not None:
+            raise ValueError("Cannot add generators to a compacted database.")
         self.generators.append(generator)
+        self._index_generator(generator)
+
+    def compact(self) -> None:
+        """Move generator data into a columnar store and replace generators by views over it."""
+        self._store = GeneratorStore.from_generators(self.generators, STATE_TO_SUBSYSTEM)
+        self.generators = self._store.views()
+        self._projections.clear()
+        self._summary = None
+        self._search_index = None
+        self.reindex()
+
+    def columnar(self) -> GeneratorStore:
+        """Columnar store of the generators, built on the fly if the database is not compacted."""
+        if self._store is not None:
+            return self._store
+        return GeneratorStore.from_generators(self.generators, STATE_TO_SUBSYSTEM)
+
+    def projected_tust(self, model: ProjectionModel = DEFAULT_MODEL,
+                       years: Iterable[int] = PROJECTION_YEARS) -> np.ndarray:
+        """(generator x year) TUST projected beyond the last cycle, in generator order.
+
+        Computed on first request and kept per model and years while the database is compacted.
+        """
+        key = (model, tuple(sorted(years)))
+        if self._store is None:
+            return project_tust(self.columnar(), model, key[1])
+        if key not in self._projections:
+            self._projections[key] = project_tust(self._store, model, key[1])
+        return self._projections[key]
+
+    def tust_series(self, generator: Union[Generator, GeneratorView], model: ProjectionModel = DEFAULT_MODEL,
+                    years: Iterable[int] = PROJECTION_YEARS) -> Dict[int, float]:
+        """{year: TUST} of a generator, followed by its projected years."""
+        years = sorted(years)
+        row = generator._row if isinstance(generator, GeneratorView) else self.generators.index(generator)
+        series = dict(generator.tust)
+        for year, value in zip(years, self.projected_tust(model, years)[row].tolist()):
+            if not np.isnan(value):
+                series[year] = value
+        return series
+
+    def summary(self) -> Summary:
+        """Dashboard aggregates of the database, computed once while it is compacted."""
+        if self._store is None:
+            return build_summary(self, SUBSYSTEM_MAP, STATE_TO_SUBSYSTEM, VALID_YEARS)
+        if self._summary is None:
+            self._summary = build_summary(self, SUBSYSTEM_MAP, STATE_TO_SUBSYSTEM, VALID_YEARS)
+        return self._summary
+
+    def search_index(self) -> SearchIndex:
+        """Index over generator names and CEGs, in generator order, built once while the database is compacted."""
+        if self._store is None:
+            return SearchIndex([gen.name for gen in self.generators], [gen.ceg for gen in self.generators])
+        if self._search_index is None:
+            self._search_index = SearchIndex(self._store.names, self._store.cegs)
+        return self._search_index
 
     def add_bus(self, bus: Bus) -> None:
         self.buses.append(bus)
+        self._index_bus(bus)
+
+    def add_network(self, year: int, network: Network) -> None:
+        """Attach the network of a cycle and fill the circuits (and missing areas) of the known buses."""
+        self.networks[year] = network
+        adjacency = network.topology().adjacency_lists()
+        for num, area in zip(network.bus_numbers.tolist(), network.areas.tolist()):
+            bus = self._buses_by_num.get(num)
+            if bus is not None:
+                bus.circuits[year] = adjacency[num]
+                bus.area = bus.area or area
 
     def add_cycle_data(self, cycle_data: CycleData) -> None:
         self.cycle_data.append(cycle_data)
 
     def get_generator_by_name(self, name: str) -> Optional[Generator]:
-        return next((g for g in self.generators if g.name == name), None)
+        return self._generators_by_name.get(name)
+
+    def get_generator_by_ceg(self, ceg: str) -> Optional[Generator]:
+        return self._generators_by_ceg.get(ceg)
+
+    def get_generators_by_cegnucleo(self, cegnucleo: Union[int, str]) -> List[Generator]:
+        return list(self._generators_by_cegnucleo.get(cegnucleo, []))
 
     def get_bus_by_name(self, name: str) -> Optional[Bus]:
-        return next((b for b in self.buses if b.name == name), None)
+        return self._buses_by_name.get(name)
+
+    def get_bus_by_num(self, num: int) -> Optional[Bus]:
+        return self._buses_by_num.get(num)
 
     def calculate_avg_tust(self):
         """Calculate the average TUST values."""
         total_tust = defaultdict(lambda: defaultdict(float))
         generator_count = defaultdict(lambda: defaultdict(int))
 
-        for generator in self.generators:
-            subsystem = STATE_TO_SUBSYSTEM.get(generator.uf, '')
-            for year, tust in generator.tust.items():
-                if year in VALID_YEARS and tust > 0:
-                    for category in [subsystem, generator.uf, generator.type]:
-                        total_tust[category][year] += tust
-                        generator_count[category][year] += 1
+        store = self.columnar()
+        for key in ("subsystem", "uf", "type"):
+            groups = aggregate_tust(store, by=(key, "cycle"), years=VALID_YEARS, percentiles=())
+            for category, year, value, count in zip(groups[key], groups["cycle"], groups["sum"], groups["count"]):
+                total_tust[category][year] += value
+                generator_count[category][year] += count
 
         avg_tust = {
             category: {year: round(value / generator_count[category][year], 2) for year, value in years.items()}
@@ -101,13 +259,12 @@ class Database:
     def calculate_must_values(self):
         """Calculate MUST values by type and total."""
         must_values_by_type = defaultdict(lambda: defaultdict(int))
-        for generator in self.generators:
-            for year, must in generator.must.items():
-                must_values_by_type[generator.type][year] += must
+        for type_, values in self.columnar().must_by_type().items():
+            must_values_by_type[type_].update(values)
 
         must_total_values = {
             year: sum(values[year] for values in must_values_by_type.values())
             for year in must_values_by_type[next(iter(must_values_by_type))].keys()
         }
 
-        return must_values_by_type, must_total_values
\ No newline at end of file
+        return must_values_by_type, must_total_values
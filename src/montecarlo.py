@@ -0,0 +1,138 @@
+"""
+Monte Carlo propagation of RAP and PDR uncertainty to generator TUST.
+Instead of one Nodal run per sampled path, each cycle's TUST is rescaled from
+a solved base: linearly with the RAP, which scales TEUg and every TUH value by
+the same factor, plus a per-generator PDR sensitivity estimated from a
+reference case solved with another PDR.
+"""
+
+from dataclasses import dataclass
+import logging
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from columnar import GeneratorStore
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (10, 50, 90)
+# Upper bound of the (sample x generator x cycle) block held in memory at once
+CHUNK_BYTES = 1 << 27
+
+
+@dataclass
+class Trajectories:
+    """Sampled (sample x cycle) RAP and PDR paths with the base values they were drawn around."""
+    years: np.ndarray
+    base_rap: np.ndarray
+    base_pdr: np.ndarray
+    rap: np.ndarray
+    pdr: np.ndarray
+
+
+def sample_trajectories(years: Sequence[int], base_rap: Sequence[float], base_pdr: Sequence[float],
+                        samples: int, rap_sigma: float = 0.05, pdr_sigma: float = 0.0,
+                        seed: Optional[int] = None) -> Trajectories:
+    """Draw RAP and PDR paths as random walks around the base values.
+
+    The RAP gets a log-normal shock of `rap_sigma` per cycle and the PDR a
+    normal shock of `pdr_sigma` per cycle; shocks accumulate along the path,
+    so later cycles are more uncertain.
+    """
+    rng = np.random.default_rng(seed)
+    base_rap, base_pdr = np.asarray(base_rap, dtype=float), np.asarray(base_pdr, dtype=float)
+    shape = (samples, len(years))
+    rap = base_rap[None, :] * np.exp(np.cumsum(rng.normal(0.0, rap_sigma, shape), axis=1))
+    pdr = base_pdr[None, :] + np.cumsum(rng.normal(0.0, pdr_sigma, shape), axis=1)
+    return Trajectories(np.asarray(years), base_rap, base_pdr, rap, pdr)
+
+
+def cycle_columns(store: GeneratorStore, years: Sequence[int]) -> np.ndarray:
+    """(generator x year) TUST of a store for the given years, NaN for years it lacks."""
+    tust = np.full((len(store), len(years)), np.nan)
+    for j, year in enumerate(years):
+        column = store._year_index.get(int(year))
+        if column is not None:
+            tust[:, j] = store.tust[:, column]
+    return tust
+
+
+def pdr_sensitivity(store: GeneratorStore, years: Sequence[int], rap: Sequence[float], pdr: Sequence[float],
+                    reference: GeneratorStore, reference_rap: Sequence[float],
+                    reference_pdr: Sequence[float]) -> np.ndarray:
+    """(generator x year) change of TUST per unit of PDR, from a reference case solved with another PDR.
+
+    Reference values are brought to the base RAP first and aligned by generator
+    name. Generators or cycles without a reference value, and cycles where both
+    PDRs are equal, get zero sensitivity.
+    """
+    rap, pdr = np.asarray(rap, dtype=float), np.asarray(pdr, dtype=float)
+    reference_rap, reference_pdr = np.asarray(reference_rap, dtype=float), np.asarray(reference_pdr, dtype=float)
+    rows = pd.Index(reference.names).get_indexer(store.names)
+    reference_tust = np.full((len(store), len(years)), np.nan)
+    found = rows >= 0
+    reference_tust[found] = cycle_columns(reference, years)[rows[found]] * (rap / reference_rap)[None, :]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sensitivity = (reference_tust - cycle_columns(store, years)) / (reference_pdr - pdr)[None, :]
+    return np.where(np.isfinite(sensitivity), sensitivity, 0.0)
+
+
+def tust_bands(tust: np.ndarray, trajectories: Trajectories, sensitivity: Optional[np.ndarray] = None,
+               percentiles: Sequence[float] = PERCENTILES, chunk_bytes: int = CHUNK_BYTES) -> np.ndarray:
+    """(percentile x generator x year) TUST under the sampled trajectories.
+
+    Each sample's TUST is tust * rap / base_rap + sensitivity * (pdr - base_pdr).
+    Generators are processed in chunks so the sampled block stays under
+    `chunk_bytes`. Missing TUST gives NaN bands.
+    """
+    n_generators, n_years = tust.shape
+    samples = len(trajectories.rap)
+    rap_factor = trajectories.rap / trajectories.base_rap[None, :]
+    pdr_delta = trajectories.pdr - trajectories.base_pdr[None, :]
+    chunk = max(1, chunk_bytes // max(samples * n_years * 8, 1))
+
+    bands = np.full((len(percentiles), n_generators, n_years), np.nan)
+    for start in range(0, n_generators, chunk):
+        block = tust[None, start:start + chunk, :] * rap_factor[:, None, :]
+        if sensitivity is not None:
+            block += sensitivity[None, start:start + chunk, :] * pdr_delta[:, None, :]
+        bands[:, start:start + chunk, :] = np.percentile(block, percentiles, axis=0)
+    return bands
+
+
+def bands_frame(store: GeneratorStore, years: Sequence[int], bands: np.ndarray,
+                percentiles: Sequence[float] = PERCENTILES) -> pd.DataFrame:
+    """Long table of the bands: NOME, CICLO and one P<percentile> column per percentile, known TUST only."""
+    n_generators, n_years = bands.shape[1:]
+    frame: Dict[str, np.ndarray] = {
+        "NOME": np.repeat(store.names, n_years),
+        "CICLO": np.tile(np.asarray(years), n_generators),
+    }
+    for i, percentile in enumerate(percentiles):
+        frame[f"P{percentile:g}"] = bands[i].reshape(-1)
+    table = pd.DataFrame(frame)
+    return table[~np.isnan(bands[0].reshape(-1))].reset_index(drop=True)
+
+
+def base_inputs(cycle_rap: Dict[int, Optional[float]], csv_inputs: Optional[Tuple[Sequence[int], Sequence[float],
+                Sequence[float]]], years: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Base RAP and PDR of each cycle: the RAP of the .R63 file, else of autotust.csv; the PDR of autotust.csv.
+
+    Raises ValueError when a cycle has no RAP; a cycle without PDR gets NaN.
+    """
+    csv_rap, csv_pdr = {}, {}
+    if csv_inputs is not None:
+        csv_years, rap, pdr = csv_inputs
+        csv_rap, csv_pdr = dict(zip(csv_years, rap)), dict(zip(csv_years, pdr))
+    base_rap, base_pdr = [], []
+    for year in years:
+        rap = cycle_rap.get(year)
+        if rap is None:
+            rap = csv_rap.get(year)
+        if rap is None:
+            raise ValueError(f"No RAP for cycle {year}-{year + 1} in its .R63 file nor in autotust.csv.")
+        base_rap.append(rap)
+        base_pdr.append(csv_pdr.get(year, np.nan))
+    return np.array(base_rap, dtype=float), np.array(base_pdr, dtype=float)
@@ -0,0 +1,299 @@
+"""
+Reader for the DBAR and DLIN sections of the Nodal .dc files (ANAREDE format).
+"""
+
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ColumnSpec = Dict[str, Tuple[int, int]]
+
+DBAR_LAYOUT: ColumnSpec = {
+    "num": (0, 5),
+    "op": (5, 6),
+    "state": (6, 7),
+    "type": (7, 8),
+    "name": (10, 22),
+    "voltage": (24, 28),
+    "angle": (28, 32),
+    "generation": (32, 37),
+    "load": (58, 63),
+    "uf": (73, 76),
+    "area": (76, 78),
+}
+
+DLIN_LAYOUT: ColumnSpec = {
+    "from": (0, 5),
+    "op": (7, 8),
+    "to": (10, 15),
+    "circuit": (15, 17),
+    "state": (17, 18),
+    "resistance": (20, 26),
+    "reactance": (26, 32),
+    "capacity": (63, 67),
+    "emergency_capacity": (67, 71),
+}
+
+# ANAREDE numbers written without a decimal point carry implied decimals
+IMPLIED_DECIMALS = {"voltage": 3, "resistance": 2, "reactance": 2}
+
+SECTION_END = "99999"
+DISCONNECTED = "D"
+
+
+def _is_comment(line: str) -> bool:
+    return len(line) <= 1 or line[0] == "("
+
+
+def _field(line: str, layout: ColumnSpec, name: str) -> str:
+    start, end = layout[name]
+    return line[start:end].strip()
+
+
+def parse_anarede_number(value: str, decimals: int = 0, blank: float = 0.0) -> float:
+    """Parse an ANAREDE numeric field, applying the implied decimals when there is no point."""
+    value = value.strip()
+    if not value:
+        return blank
+    if "." in value:
+        return float(value)
+    return int(value) / 10 ** decimals
+
+
+def iter_sections(file_path: Path, names: Tuple[str, ...] = ("DBAR", "DLIN")) -> Iterator[Tuple[str, str]]:
+    """Yield (section, line) for the data lines of the requested sections, in one pass.
+
+    A section starts at a line whose first four characters are its name and ends at
+    the "99999" line. Comment lines are skipped.
+    """
+    section = None
+    with open(file_path, "r", encoding="ISO-8859-1") as file:
+        for line in file:
+            line = line.rstrip("\r\n")
+            if section is None:
+                if line[:4] in names:
+                    section = line[:4]
+                continue
+            if line[:5] == SECTION_END:
+                section = None
+                continue
+            if _is_comment(line):
+                continue
+            yield section, line
+
+
+class Topology:
+    """Undirected bus adjacency in compressed sparse row form.
+
+    The neighbours of bus index i are indices[indptr[i]:indptr[i + 1]] and
+    the branch behind each entry is branches[indptr[i]:indptr[i + 1]].
+    Parallel circuits appear once per circuit.
+    """
+
+    def __init__(self, network: "Network", branch_mask: Optional[np.ndarray] = None):
+        self.network = network
+        selected = np.arange(network.n_branches) if branch_mask is None else np.flatnonzero(branch_mask)
+        from_index = network.from_index[selected]
+        to_index = network.to_index[selected]
+
+        # Both directions of every branch, grouped by source bus
+        sources = np.concatenate((from_index, to_index))
+        targets = np.concatenate((to_index, from_index))
+        order = np.lexsort((targets, sources))
+        sources = sources[order]
+        self.indices = targets[order]
+        self.branches = np.concatenate((selected, selected))[order]
+        self.indptr = np.zeros(network.n_buses + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=network.n_buses), out=self.indptr[1:])
+
+        # Distinct neighbours: drop repeated targets of the same source (parallel circuits)
+        distinct = np.ones(len(self.indices), dtype=bool)
+        distinct[1:] = (self.indices[1:] != self.indices[:-1]) | (sources[1:] != sources[:-1])
+        self._distinct = distinct
+        self._degrees = np.bincount(sources[distinct], minlength=network.n_buses)
+
+    def _neighbour_indices(self, index: int) -> np.ndarray:
+        start, end = self.indptr[index], self.indptr[index + 1]
+        return self.indices[start:end][self._distinct[start:end]]
+
+    def neighbours(self, num: int) -> np.ndarray:
+        """Bus numbers directly connected to a bus, sorted by bus position."""
+        return self.network.bus_numbers[self._neighbour_indices(self.network.bus_index(num))]
+
+    def branches_of(self, num: int) -> np.ndarray:
+        """Positions of the branches connected to a bus."""
+        index = self.network.bus_index(num)
+        return self.branches[self.indptr[index]:self.indptr[index + 1]]
+
+    def degree(self, num: int) -> int:
+        """Number of distinct buses connected to a bus."""
+        return int(self._degrees[self.network.bus_index(num)])
+
+    def degrees(self) -> np.ndarray:
+        """Distinct neighbour count of every bus, in bus order."""
+        return self._degrees
+
+    def k_hop(self, num: int, k: int) -> np.ndarray:
+        """Bus numbers within k branches of a bus (the bus itself included), sorted by bus position."""
+        visited = np.zeros(self.network.n_buses, dtype=bool)
+        frontier = np.array([self.network.bus_index(num)])
+        visited[frontier] = True
+        for _ in range(k):
+            if len(frontier) == 0:
+                break
+            starts, ends = self.indptr[frontier], self.indptr[frontier + 1]
+            lengths = ends - starts
+            # Positions starts[i]..ends[i]-1 of every frontier bus, without a Python loop
+            offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            reached = self.indices[np.repeat(starts, lengths) + offsets]
+            frontier = np.unique(reached[~visited[reached]])
+            visited[frontier] = True
+        return self.network.bus_numbers[visited]
+
+    def adjacency_lists(self) -> Dict[int, List[int]]:
+        """{bus number: distinct neighbour bus numbers} for every bus."""
+        numbers = self.network.bus_numbers
+        neighbours = numbers[self.indices[self._distinct]].tolist()
+        bounds = np.concatenate(([0], np.cumsum(self._degrees))).tolist()
+        return {num: neighbours[bounds[i]:bounds[i + 1]] for i, num in enumerate(numbers.tolist())}
+
+
+@dataclass
+class Network:
+    """Buses and branches of a cycle, as parallel arrays."""
+    bus_numbers: np.ndarray
+    bus_names: List[str]
+    generation: np.ndarray
+    load: np.ndarray
+    areas: np.ndarray
+    bus_in_service: np.ndarray
+    branch_from: np.ndarray
+    branch_to: np.ndarray
+    circuits: np.ndarray
+    reactance: np.ndarray
+    capacity: np.ndarray
+    branch_in_service: np.ndarray
+    from_index: np.ndarray = field(default=None, init=False, repr=False, compare=False)
+    to_index: np.ndarray = field(default=None, init=False, repr=False, compare=False)
+    _bus_index: Dict[int, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _topology: Optional[Topology] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._bus_index = {int(num): i for i, num in enumerate(self.bus_numbers)}
+        self.from_index = self.bus_indices(self.branch_from)
+        self.to_index = self.bus_indices(self.branch_to)
+
+    @property
+    def n_buses(self) -> int:
+        return len(self.bus_numbers)
+
+    @property
+    def n_branches(self) -> int:
+        return len(self.branch_from)
+
+    def bus_index(self, num: int) -> int:
+        """Position of a bus number in the bus arrays."""
+        return self._bus_index[num]
+
+    def bus_indices(self, nums) -> np.ndarray:
+        return np.array([self._bus_index[int(num)] for num in nums], dtype=np.int64)
+
+    def energized_branches(self) -> np.ndarray:
+        """Mask of the in-service branches whose two buses are in service."""
+        return self.branch_in_service & self.bus_in_service[self.from_index] & self.bus_in_service[self.to_index]
+
+    def topology(self) -> Topology:
+        """CSR adjacency of the energized branches, built on first use."""
+        if self._topology is None:
+            self._topology = Topology(self, self.energized_branches())
+        return self._topology
+
+    def injection(self) -> np.ndarray:
+        """Net injection per in-service bus, with generation scaled to the total load."""
+        generation = np.where(self.bus_in_service, self.generation, 0.0)
+        load = np.where(self.bus_in_service, self.load, 0.0)
+        total_generation = generation.sum()
+        if total_generation > 0 and load.sum() > 0:
+            generation = generation * (load.sum() / total_generation)
+        return generation - load
+
+
+def read_dc(file_path: Path) -> Network:
+    """Read the buses (DBAR) and branches (DLIN) of a .dc file.
+
+    Disconnected ("D") buses and branches are kept and flagged as out of service.
+    Branches ending at an unknown bus are dropped.
+    """
+    bus_numbers, bus_names, generation, load, areas, bus_in_service = [], [], [], [], [], []
+    branch_from, branch_to, circuits, reactance, capacity, branch_in_service = [], [], [], [], [], []
+    known = set()
+
+    for section, line in iter_sections(file_path):
+        if section == "DBAR":
+            num = int(_field(line, DBAR_LAYOUT, "num"))
+            if num in known:
+                logger.warning(f"Duplicated bus {num} in {file_path}, keeping the first one.")
+                continue
+            known.add(num)
+            bus_numbers.append(num)
+            bus_names.append(_field(line, DBAR_LAYOUT, "name"))
+            generation.append(parse_anarede_number(_field(line, DBAR_LAYOUT, "generation")))
+            load.append(parse_anarede_number(_field(line, DBAR_LAYOUT, "load")))
+            area = _field(line, DBAR_LAYOUT, "area")
+            areas.append(int(area) if area.isdigit() else 0)
+            bus_in_service.append(_field(line, DBAR_LAYOUT, "state") != DISCONNECTED)
+        else:
+            from_bus = int(_field(line, DLIN_LAYOUT, "from"))
+            to_bus = int(_field(line, DLIN_LAYOUT, "to"))
+            if from_bus not in known or to_bus not in known:
+                logger.debug(f"Skipping branch {from_bus}-{to_bus} to an unknown bus in {file_path}.")
+                continue
+            circuit = _field(line, DLIN_LAYOUT, "circuit")
+            x = parse_anarede_number(_field(line, DLIN_LAYOUT, "reactance"), IMPLIED_DECIMALS["reactance"])
+            branch_from.append(from_bus)
+            branch_to.append(to_bus)
+            circuits.append(int(circuit) if circuit.isdigit() else 1)
+            reactance.append(x / 100.0)
+            capacity.append(parse_anarede_number(_field(line, DLIN_LAYOUT, "capacity"), blank=np.nan))
+            branch_in_service.append(_field(line, DLIN_LAYOUT, "state") != DISCONNECTED)
+
+    return Network(
+        bus_numbers=np.array(bus_numbers, dtype=np.int64),
+        bus_names=bus_names,
+        generation=np.array(generation, dtype=float),
+        load=np.array(load, dtype=float),
+        areas=np.array(areas, dtype=np.int64),
+        bus_in_service=np.array(bus_in_service, dtype=bool),
+        branch_from=np.array(branch_from, dtype=np.int64),
+        branch_to=np.array(branch_to, dtype=np.int64),
+        circuits=np.array(circuits, dtype=np.int64),
+        reactance=np.array(reactance, dtype=float),
+        capacity=np.array(capacity, dtype=float),
+        branch_in_service=np.array(branch_in_service, dtype=bool),
+    )
+
+
+def load_networks(db_path: Path, years: Iterable[int]) -> Dict[int, Network]:
+    """Read the networks of the cycles that have a .dc file."""
+    networks = {}
+    for year in years:
+        network = load_network(db_path, year)
+        if network is not None:
+            networks[year] = network
+    return networks
+
+
+def load_network(db_path: Path, year: int) -> Optional[Network]:
+    """Read the network of a cycle, or return None if its .dc file is missing."""
+    dc_file = Path(db_path) / f"{year}-{year + 1}.dc"
+    if not dc_file.exists():
+        # Windows file names are case insensitive and both spellings are used
+        dc_file = dc_file.with_suffix(".DC")
+        if not dc_file.exists():
+            return None
+    return read_dc(dc_file)
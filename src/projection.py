@@ -0,0 +1,101 @@
+"""
+Projection of generator TUST beyond the last simulated cycle.
+Each model works on the whole (generator x cycle) history matrix at once.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Sequence, Type, Union
+
+import numpy as np
+
+from columnar import GeneratorStore
+
+
+@dataclass(frozen=True)
+class LinearDecrement:
+    """The TUST of the last cycle, lowered by `step` per projected cycle."""
+    step: float = 0.02
+
+    def project(self, history: np.ndarray, history_years: np.ndarray, years: np.ndarray) -> np.ndarray:
+        return history[:, -1:] - self.step * (years - history_years[-1])[None, :]
+
+
+@dataclass(frozen=True)
+class CAGR:
+    """Compound annual growth between the first and last known values of the last `window` cycles."""
+    window: int = 5
+
+    def project(self, history: np.ndarray, history_years: np.ndarray, years: np.ndarray) -> np.ndarray:
+        values, value_years = history[:, -self.window:], history_years[-self.window:]
+        known = ~np.isnan(values)
+        rows = np.arange(len(values))
+        first = np.argmax(known, axis=1)
+        last = values.shape[1] - 1 - np.argmax(known[:, ::-1], axis=1)
+        first_value, last_value = values[rows, first], values[rows, last]
+        span = value_years[last] - value_years[first]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rate = (last_value / first_value) ** (1 / np.maximum(span, 1)) - 1
+        # A single known cycle is carried flat; growth needs two positive values
+        rate = np.where(span > 0, rate, 0.0)
+        rate = np.where((first_value > 0) & (last_value > 0), rate, np.nan)
+        steps = years[None, :] - value_years[last][:, None]
+        return last_value[:, None] * (1 + rate[:, None]) ** steps
+
+
+@dataclass(frozen=True)
+class Regression:
+    """Least-squares line through the known values of the last `window` cycles."""
+    window: int = 5
+
+    def project(self, history: np.ndarray, history_years: np.ndarray, years: np.ndarray) -> np.ndarray:
+        values = history[:, -self.window:]
+        x = (history_years[-self.window:] - history_years[-1]).astype(float)[None, :]
+        known = ~np.isnan(values)
+        count = known.sum(axis=1)
+        y = np.where(known, values, 0.0)
+        xs = np.where(known, x, 0.0)
+        sum_x, sum_y = xs.sum(axis=1), y.sum(axis=1)
+        sum_xx, sum_xy = (xs * xs).sum(axis=1), (xs * y).sum(axis=1)
+        denominator = count * sum_xx - sum_x ** 2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            slope = np.where(denominator > 0, (count * sum_xy - sum_x * sum_y) / denominator, np.nan)
+            intercept = (sum_y - slope * sum_x) / count
+        return intercept[:, None] + slope[:, None] * (years - history_years[-1])[None, :]
+
+
+ProjectionModel = Union[LinearDecrement, CAGR, Regression]
+
+MODELS: Dict[str, Type] = {"linear": LinearDecrement, "cagr": CAGR, "regression": Regression}
+DEFAULT_MODEL = LinearDecrement()
+PROJECTION_YEARS = range(2033, 2040)
+
+
+def make_model(name: str, step: Optional[float] = None, window: Optional[int] = None) -> ProjectionModel:
+    """Build a model by name ("linear", "cagr" or "regression") with its optional parameter."""
+    if name not in MODELS:
+        raise ValueError(f"Unknown projection model {name!r}. Expected one of {tuple(MODELS)}.")
+    if name == "linear":
+        return LinearDecrement() if step is None else LinearDecrement(step)
+    return MODELS[name]() if window is None else MODELS[name](window)
+
+
+def project_tust(store: GeneratorStore, model: ProjectionModel = DEFAULT_MODEL,
+                 years: Iterable[int] = PROJECTION_YEARS,
+                 history_years: Optional[Sequence[int]] = None) -> np.ndarray:
+    """Projected (generator x year) TUST of a store, from the cycles in `history_years`.
+
+    The history defaults to every store cycle before the first projected year.
+    Generators without history in the cycles a model uses get NaN.
+    """
+    years = np.array(sorted(years), dtype=np.int64)
+    if history_years is None:
+        history_years = [year for year in store.years.tolist() if year < years[0]]
+    history_years = np.array(sorted(history_years), dtype=np.int64)
+    if len(history_years) == 0:
+        return np.full((len(store), len(years)), np.nan)
+    history = np.full((len(store), len(history_years)), np.nan)
+    for j, year in enumerate(history_years.tolist()):
+        column = store._year_index.get(year)
+        if column is not None:
+            history[:, j] = store.tust[:, column]
+    return model.project(history, history_years, years)
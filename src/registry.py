@@ -0,0 +1,126 @@
+"""
+Process-wide registry of loaded bases, shared by every dashboard session.
+A base is loaded once and handed out read-only until one of its cycle files
+changes; the least recently used bases are dropped beyond a size cap.
+"""
+
+from collections import OrderedDict
+import logging
+from pathlib import Path
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from cache import CYCLE_EXTENSIONS
+from models import Database, INITIAL_CYCLE, FINAL_CYCLE
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 4
+WATCH_INTERVAL = 5.0
+
+Signature = Tuple[Tuple[str, int, int], ...]
+
+
+def case_signature(db_path: Path) -> Signature:
+    """(file name, size, mtime) of every GER, TUH, NOS and summary report (R63, R61, R60) cycle file of a case.
+
+    Only file metadata is read, so the signature is cheap enough to poll.
+    """
+    signature = []
+    for year in range(INITIAL_CYCLE, FINAL_CYCLE + 1):
+        for ext in CYCLE_EXTENSIONS:
+            file_path = Path(db_path) / f"{year}-{year + 1}.{ext}"
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
+                continue
+            signature.append((file_path.name, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+class DatabaseRegistry:
+    """LRU cache of Database objects keyed by case folder and checked against the case signature.
+
+    `get` returns the resident database while the cycle files are unchanged and
+    reloads it otherwise. Concurrent requests for the same base wait for a
+    single load. The returned databases are shared: their stores are frozen and
+    must be treated as read-only. With `interval`, a watcher thread drops the
+    bases whose files changed, so the next request reloads them.
+    """
+
+    def __init__(self, loader: Callable[[Path], Database], max_entries: int = MAX_ENTRIES,
+                 interval: Optional[float] = WATCH_INTERVAL):
+        self.loader = loader
+        self.max_entries = max_entries
+        self.interval = interval
+        self._entries: "OrderedDict[Path, Tuple[Signature, Database]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._path_locks: Dict[Path, threading.Lock] = {}
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def get(self, db_path: Path) -> Database:
+        db_path = Path(db_path).resolve()
+        self._start_watcher()
+        with self._lock:
+            path_lock = self._path_locks.setdefault(db_path, threading.Lock())
+        with path_lock:
+            signature = case_signature(db_path)
+            with self._lock:
+                entry = self._entries.get(db_path)
+                if entry is not None and entry[0] == signature:
+                    self._entries.move_to_end(db_path)
+                    return entry[1]
+
+            logger.info(f"Loading base {db_path}" + (" (files changed)" if entry is not None else ""))
+            database = self.loader(db_path)
+            if database._store is not None:
+                database._store.freeze()
+            with self._lock:
+                self._entries[db_path] = (signature, database)
+                self._entries.move_to_end(db_path)
+                while len(self._entries) > self.max_entries:
+                    evicted, _ = self._entries.popitem(last=False)
+                    logger.info(f"Base {evicted} evicted from the registry.")
+            return database
+
+    def invalidate(self, db_path: Optional[Path] = None) -> None:
+        """Drop one base, or every base when no path is given."""
+        with self._lock:
+            if db_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(Path(db_path).resolve(), None)
+
+    def check(self) -> None:
+        """Drop the resident bases whose cycle files changed since they were loaded."""
+        with self._lock:
+            entries = [(path, signature) for path, (signature, _) in self._entries.items()]
+        for path, signature in entries:
+            if case_signature(path) != signature:
+                with self._lock:
+                    current = self._entries.get(path)
+                    if current is not None and current[0] == signature:
+                        del self._entries[path]
+                        logger.info(f"Files of base {path} changed, dropped from the registry.")
+
+    def _start_watcher(self) -> None:
+        if self.interval is None or self._watcher is not None:
+            return
+        with self._lock:
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, name="autotust-registry-watcher", daemon=True)
+                self._watcher.start()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except OSError as e:
+                logger.warning(f"Registry watcher could not check the bases: {e}")
+
+    def close(self) -> None:
+        """Stop the watcher thread."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
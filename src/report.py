@@ -0,0 +1,111 @@
+"""
+Parser of the cycle summary reports written by Nodal (.R60, .R61 and .R63).
+Only the head of a report holds the summary, so just the first READ_LIMIT bytes
+are read. Each field is located by its label and, in reports without it, at
+the fixed position of the report version.
+"""
+
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from pathlib import Path
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from models import CycleData
+
+ENCODING = "ISO-8859-1"
+READ_LIMIT = 16384
+
+# Brazilian formatted number ("-1.234,56"), or the dashes Nodal writes for a missing value
+_NUMBER = r"(-?\d[\d.]*(?:,\d+)?|-{2,})"
+
+
+def parse_report_float(text: str) -> Optional[float]:
+    """Parse a Brazilian formatted number; None for blanks, dashes and unreadable text."""
+    text = text.strip()
+    if not text or set(text) == {"-"}:
+        return None
+    try:
+        return float(text.replace(".", "").replace(",", "."))
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True)
+class ReportField:
+    """A summary value: its label pattern and its (line, start column, end column) when unlabelled."""
+    label: str
+    line: int
+    columns: Tuple[int, int]
+
+    @property
+    def pattern(self) -> Pattern:
+        return _compile(self.label)
+
+
+@lru_cache(maxsize=None)
+def _compile(label: str) -> Pattern:
+    # The label, then anything but a digit, a sign or a line break, then the value
+    return re.compile(rf"(?:{label})[^\d\n-]*{_NUMBER}", re.IGNORECASE)
+
+
+_MUST_CONSUMO = r"MUST\s+(?:DO\s+)?CONSUMO\s+(?:NA\s+)?"
+_TEU_CONSUMO = r"TEU\s*C(?:ONSUMO)?\s*(?:NA\s+)?"
+
+LAYOUT_V63 = {
+    "rap": ReportField(r"RAP\s+TOTAL|RECEITA\s+ANUAL\s+PERMITIDA(?:\s+TOTAL)?", 7, (88, 106)),
+    "mustg": ReportField(r"MUST\s+(?:DA\s+)?GERA[CÇ][AÃ]O", 8, (15, 26)),
+    "mustp": ReportField(_MUST_CONSUMO + r"PONTA", 8, (55, 66)),
+    "mustfp": ReportField(_MUST_CONSUMO + r"FORA\s+(?:DE\s+|DA\s+)?PONTA", 8, (75, 86)),
+    "teug": ReportField(r"TEU\s*G(?:ERA[CÇ][AÃ]O)?\b", 17, (7, 14)),
+    "teup": ReportField(_TEU_CONSUMO + r"P(?:ONTA)?\b", 18, (7, 14)),
+    "teufp": ReportField(_TEU_CONSUMO + r"(?:F(?:ORA)?\s*(?:DE\s+|DA\s+)?P(?:ONTA)?|F)\b", 19, (7, 14)),
+}
+LAYOUT_V61 = dict(LAYOUT_V63)
+# Nodal v60 writes the TEU one column to the right
+LAYOUT_V60 = {name: replace(report_field, columns=(8, 14)) if name.startswith("teu") else report_field
+              for name, report_field in LAYOUT_V63.items()}
+
+# Report extension -> field layout, in the order a cycle's reports are looked for
+REPORT_LAYOUTS: Dict[str, Dict[str, ReportField]] = {"R63": LAYOUT_V63, "R61": LAYOUT_V61, "R60": LAYOUT_V60}
+
+
+def _head_lines(file_path: Path) -> List[str]:
+    with open(file_path, "r", encoding=ENCODING) as file:
+        head = file.read(READ_LIMIT)
+    return head.splitlines()
+
+
+def parse_report(lines: List[str], year: int, layout: Dict[str, ReportField]) -> CycleData:
+    """Cycle summary of the head lines of a report, None for the fields it lacks."""
+    data = CycleData(year=year)
+    text = "\n".join(lines)
+    for name, report_field in layout.items():
+        match = report_field.pattern.search(text)
+        if match is not None:
+            value = match.group(1)
+        elif report_field.line < len(lines):
+            start, end = report_field.columns
+            value = lines[report_field.line][start:end]
+        else:
+            value = ""
+        setattr(data, name, parse_report_float(value))
+    return data
+
+
+def find_report(db_path: Path, year: int) -> Optional[Path]:
+    """The summary report of a cycle, the newest Nodal version first."""
+    for ext in REPORT_LAYOUTS:
+        file_path = Path(db_path) / f"{year}-{year + 1}.{ext}"
+        if file_path.exists():
+            return file_path
+    return None
+
+
+def read_report(file_path: Path, year: int) -> CycleData:
+    """Read the cycle summary of a .R60, .R61 or .R63 report, with the layout of its extension."""
+    file_path = Path(file_path)
+    layout = REPORT_LAYOUTS.get(file_path.suffix.lstrip(".").upper())
+    if layout is None:
+        raise ValueError(f"Unknown report type {file_path.suffix!r}. Expected one of {tuple(REPORT_LAYOUTS)}.")
+    return parse_report(_head_lines(file_path), year, layout)
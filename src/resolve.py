@@ -0,0 +1,238 @@
+"""
+Bulk resolution of plant TUST series: the plant's own TUST (TUH) where it has
+one, and the share-weighted nodal TUST (NOS) of its connection buses otherwise.
+Series are resolved from a loaded Database or straight from a case folder's
+TUH and NOS files.
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from columnar import BUS_MISSING
+from fixedwidth import parse_float, parse_int, read_nos, read_tuh
+from models import Candidate, Database, VALID_YEARS
+
+SOURCE_MISSING = 0
+SOURCE_TUH = 1
+SOURCE_NOS = 2
+SOURCE_LABELS = {SOURCE_MISSING: "", SOURCE_TUH: "TUH", SOURCE_NOS: "NOS"}
+
+# Parsed TUH and NOS files kept by resolve_case_tust
+FILE_CACHE_SIZE = 64
+_file_cache: "OrderedDict[tuple, Dict]" = OrderedDict()
+
+
+def bus_tust_table(database: Database, years: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """(sorted bus numbers, bus x year TUST matrix) of the NOS values, NaN where a bus has no value.
+
+    The first bus read with each number wins, as in Database.get_bus_by_num.
+    """
+    seen, numbers = set(), []
+    buses = []
+    for bus in database.buses:
+        if bus.num not in seen:
+            seen.add(bus.num)
+            numbers.append(bus.num)
+            buses.append(bus)
+    numbers = np.array(numbers, dtype=np.int64)
+    matrix = np.array([[bus.tust.get(year, np.nan) for year in years] for bus in buses],
+                      dtype=float).reshape(len(buses), len(years))
+    order = np.argsort(numbers, kind="stable")
+    return numbers[order], matrix[order]
+
+
+def _bus_values(numbers: np.ndarray, matrix: np.ndarray, buses: np.ndarray) -> np.ndarray:
+    """TUST of every bus of a (plant, connection, year) array, NaN for missing or unknown buses."""
+    positions = np.searchsorted(numbers, buses)
+    positions = np.minimum(positions, max(len(numbers) - 1, 0))
+    known = (buses != BUS_MISSING) & (len(numbers) > 0)
+    if len(numbers):
+        known &= numbers[positions] == buses
+    year_columns = np.broadcast_to(np.arange(matrix.shape[1]), buses.shape)
+    values = np.full(buses.shape, np.nan)
+    values[known] = matrix[positions[known], year_columns[known]]
+    return values
+
+
+def _combine(tuh: np.ndarray, years: Sequence[int], buses: Optional[np.ndarray], shares: Optional[np.ndarray],
+             cod: Optional[Sequence[int]],
+             bus_table: Callable[[Sequence[int]], Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Fill the gaps of a (plant, year) TUH matrix with the weighted TUST of the plants' buses.
+
+    `bus_table` gives the (bus numbers, bus x year NOS matrix) of the cycles
+    where some plant lacks its own TUST.
+    """
+    tuh = tuh.copy()
+    if cod is not None:
+        cod = np.array([np.iinfo(np.int64).min if value is None else value for value in cod], dtype=np.int64)
+        tuh[np.array(years)[None, :] < cod[:, None]] = np.nan
+
+    tust = tuh.copy()
+    source = np.where(np.isnan(tuh), SOURCE_MISSING, SOURCE_TUH).astype(np.int8)
+    if buses is not None:
+        buses = np.asarray(buses, dtype=np.int64)
+        if buses.ndim == 2:
+            buses = np.repeat(buses[:, :, None], len(years), axis=2)
+        weights = np.ones(buses.shape[:2]) if shares is None else np.asarray(shares, dtype=float)
+        weights = np.where(buses != BUS_MISSING, weights[:, :, None], 0.0)
+
+        needed = np.flatnonzero(np.isnan(tust).any(axis=0))
+        numbers, needed_matrix = bus_table([years[j] for j in needed])
+        matrix = np.full((len(numbers), len(years)), np.nan)
+        matrix[:, needed] = needed_matrix
+        values = _bus_values(numbers, matrix, buses)
+        used = weights > 0
+        complete = used.any(axis=1) & ~(used & np.isnan(values)).any(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weighted = np.nansum(np.where(used, values, 0.0) * weights, axis=1) / weights.sum(axis=1)
+        fallback = np.isnan(tust) & complete
+        tust[fallback] = weighted[fallback]
+        source[fallback] = SOURCE_NOS
+    return tust, source
+
+
+def resolve_tust(database: Database, names: Sequence[str], buses: Optional[np.ndarray] = None,
+                 shares: Optional[np.ndarray] = None, cod: Optional[Sequence[int]] = None,
+                 years: Optional[Iterable[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Resolve the TUST of many plants over `years` in one call.
+
+    `buses` holds the connection buses of each plant as a (plant, connection)
+    array, or (plant, connection, year) when the numbering changes over the
+    cycles; BUS_MISSING marks an unused connection. `shares` weights the
+    connections (equal shares by default). A plant's own TUST is used from its
+    `cod` cycle on, where the TUH has it; every other cycle takes the weighted
+    TUST of its buses, which is NaN when any of them has no NOS value.
+
+    Returns the (plant, year) TUST matrix and the matching SOURCE_* codes.
+    """
+    years = sorted(VALID_YEARS if years is None else years)
+    store = database.columnar()
+    rows = pd.Index(store.names).get_indexer(list(names))
+    columns = np.array([store._year_index.get(year, -1) for year in years], dtype=np.int64)
+
+    tuh = np.full((len(names), len(years)), np.nan)
+    found_rows, found_columns = rows >= 0, columns >= 0
+    tuh[np.ix_(found_rows, found_columns)] = store.tust[np.ix_(rows[found_rows], columns[found_columns])]
+    return _combine(tuh, years, buses, shares, cod, lambda table_years: bus_tust_table(database, table_years))
+
+
+def _tuh_values(file_path: Path) -> Dict[str, float]:
+    table = read_tuh(file_path, ("name", "tust"))
+    values = {}
+    for name, value in zip(table["name"].tolist(), parse_float(table["tust"], blank=0).tolist()):
+        values.setdefault(name, value)
+    return values
+
+
+def _nos_values(file_path: Path) -> Dict[int, float]:
+    table = read_nos(file_path, ("num", "tust"))
+    values = {}
+    for num, value in zip(parse_int(table["num"]).tolist(), parse_float(table["tust"], blank=0).tolist()):
+        values.setdefault(num, value)
+    return values
+
+
+def _cached_values(reader: Callable[[Path], Dict], file_path: Path) -> Optional[Dict]:
+    """Values parsed by `reader`, or None if the file is missing.
+
+    Cached by file identity (device, inode and modification time), so the
+    hardlinks of one file share an entry and a rewritten file is read again.
+    """
+    try:
+        stat = file_path.stat()
+    except FileNotFoundError:
+        return None
+    # Some filesystems report no inode; the path then tells files apart
+    key = (reader.__name__, stat.st_dev, stat.st_ino or str(file_path), stat.st_mtime_ns)
+    values = _file_cache.get(key)
+    if values is None:
+        values = _file_cache[key] = reader(file_path)
+        while len(_file_cache) > FILE_CACHE_SIZE:
+            _file_cache.popitem(last=False)
+    else:
+        _file_cache.move_to_end(key)
+    return values
+
+
+def resolve_case_tust(case_path: Path, names: Sequence[str], buses: Optional[np.ndarray] = None,
+                      shares: Optional[np.ndarray] = None, cod: Optional[Sequence[int]] = None,
+                      years: Optional[Iterable[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """resolve_tust read straight from the TUH and NOS files of a case folder, without loading the base.
+
+    Only the name and TUST columns of a TUH and the number and TUST columns of
+    a NOS are read, and only for the cycles where some plant needs them. Parsed
+    files are cached by identity, so the outputs a scenario shares with its base
+    through hardlinks are read once for all its scenarios.
+    """
+    years = sorted(VALID_YEARS if years is None else years)
+    case_path = Path(case_path)
+    tuh = np.full((len(names), len(years)), np.nan)
+    # Cycles before every plant's COD only take bus values, so their TUH is not read
+    first_cod = None if cod is None or None in list(cod) or len(cod) == 0 else min(cod)
+    for j, year in enumerate(years):
+        if first_cod is not None and year < first_cod:
+            continue
+        values = _cached_values(_tuh_values, case_path / f"{year}-{year + 1}.TUH")
+        if values is not None:
+            tuh[:, j] = [values.get(name, np.nan) for name in names]
+
+    def bus_table(table_years: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        cycles = [_cached_values(_nos_values, case_path / f"{year}-{year + 1}.NOS") or {} for year in table_years]
+        numbers = np.array(sorted(set().union(*cycles)), dtype=np.int64)
+        matrix = np.array([[values.get(num, np.nan) for values in cycles] for num in numbers.tolist()],
+                          dtype=float).reshape(len(numbers), len(table_years))
+        return numbers, matrix
+
+    return _combine(tuh, years, buses, shares, cod, bus_table)
+
+
+def _candidate_buses(candidates: Sequence[Candidate], years: Sequence[int]) -> np.ndarray:
+    buses = np.full((len(candidates), 2, len(years)), BUS_MISSING, dtype=np.int64)
+    for i, candidate in enumerate(candidates):
+        for j, year in enumerate(years):
+            for k, bus in enumerate(candidate.buses(year)):
+                if bus is not None:
+                    buses[i, k, j] = bus
+    return buses
+
+
+def resolve_candidates(database: Database, candidates: Sequence[Candidate],
+                       years: Optional[Iterable[int]] = None) -> pd.DataFrame:
+    """TUST series of screening candidates in a base, with the source of each value.
+
+    Each candidate is looked up under its generator name; cycles before its COD,
+    or without a TUH value, fall back to the mean TUST of its buses in that
+    cycle's numbering (ONS or EPE).
+    """
+    years = sorted(VALID_YEARS if years is None else years)
+    tust, source = resolve_tust(database, [candidate.generator_name for candidate in candidates],
+                                _candidate_buses(candidates, years), cod=[candidate.cod for candidate in candidates],
+                                years=years)
+    return series_frame([candidate.name for candidate in candidates], years, tust, source)
+
+
+def resolve_case_candidates(case_path: Path, candidates: Sequence[Candidate],
+                            years: Optional[Iterable[int]] = None) -> pd.DataFrame:
+    """resolve_candidates read straight from the TUH and NOS files of a case folder."""
+    years = sorted(VALID_YEARS if years is None else years)
+    tust, source = resolve_case_tust(case_path, [candidate.generator_name for candidate in candidates],
+                                     _candidate_buses(candidates, years),
+                                     cod=[candidate.cod for candidate in candidates], years=years)
+    return series_frame([candidate.name for candidate in candidates], years, tust, source)
+
+
+def series_frame(names: Sequence[str], years: Sequence[int], tust: np.ndarray,
+                 source: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """Wide table of resolved series: NOME, one column per cycle and, with `source`, SOURCE_<cycle> columns."""
+    frame = {"NOME": list(names)}
+    for j, year in enumerate(years):
+        frame[str(year)] = tust[:, j]
+    if source is not None:
+        labels = np.array([SOURCE_LABELS[code] for code in sorted(SOURCE_LABELS)], dtype=object)
+        for j, year in enumerate(years):
+            frame[f"SOURCE_{year}"] = labels[source[:, j]]
+    return pd.DataFrame(frame)
@@ -0,0 +1,186 @@
+"""
+Concurrent Nodal runs. Each (case, cycle) job runs in its own copy of the Nodal
+directory, so jobs never share a param.v63 or an #ER_nod#.TX1 log.
+"""
+
+import logging
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+from manifest import RunManifest, job_inputs, template_hash
+from workspace import release_outputs
+
+logger = logging.getLogger(__name__)
+
+NODAL_EXECUTABLE = "Nodal_F63.exe"
+PARAM_FILE = "param.v63"
+LOG_FILE = "#ER_nod#.TX1"
+# Nodal writes its console output and log in Latin-1 (cp1252 accented text)
+NODAL_ENCODING = "latin-1"
+
+
+@dataclass
+class NodalJob:
+    """One Nodal run: a cycle of a case with its RAP and PDR."""
+    case_path: Path
+    cycle: int
+    rap: float
+    pdr: float
+
+    @property
+    def cycle_str(self) -> str:
+        return f"{self.cycle}-{self.cycle + 1}"
+
+    @property
+    def log_path(self) -> Path:
+        """Where the job's #ER_nod#.TX1 log is collected."""
+        return Path(self.case_path) / f"#ER_nod#_{self.cycle_str}.TX1"
+
+    def __str__(self) -> str:
+        return f"{Path(self.case_path).name} {self.cycle_str}"
+
+
+@dataclass
+class JobResult:
+    """Outcome of a NodalJob."""
+    job: NodalJob
+    returncode: Optional[int]
+    elapsed: float
+    log_path: Optional[Path] = None
+    error: Optional[str] = None
+    skipped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.skipped or (self.returncode == 0 and self.error is None)
+
+
+def read_param63(file_path: Path) -> List[Union[str, float]]:
+    """Read the param.v63 file."""
+    param_list = []
+    if file_path.exists():
+        with open(file_path) as param_file:
+            for iline, line in enumerate(param_file):
+                contents = line if (iline <= 3 or line == "\n") else float(line)
+                param_list.append(contents)
+    logger.debug(f"Param63 contents: {param_list}")
+    return param_list
+
+
+def write_param63(params: List[Union[str, float]], file_path: Path) -> None:
+    """Write to the param.v63 file."""
+    with open(file_path, "w") as param_file:
+        for iparam, value in enumerate(params):
+            if iparam == 0:
+                param_file.write(f"{value}")
+            elif 1 <= iparam <= 3:
+                param_file.write(f"{value}\n")
+            elif iparam == 4:
+                param_file.write(f"{value:013.2f}\n")
+            elif iparam == 5:
+                param_file.write(f"{value}\n")
+            elif 6 <= iparam <= 10:
+                param_file.write(f"{value:05.1f}\n")
+            elif iparam <= 11:
+                param_file.write(f"{value:013.2f}\n")
+            else:
+                param_file.write(f"{value:05.2f}\n")
+
+
+def job_params(template: List[Union[str, float]], job: NodalJob, working_path: Path) -> List[Union[str, float]]:
+    """Fill the param.v63 template for a job running in `working_path`."""
+    params = list(template)
+    case_path = Path(job.case_path).resolve()
+    params[1] = str(working_path)
+    params[2] = str(case_path / f"{job.cycle_str}.dc")
+    params[3] = str(case_path / job.cycle_str)
+    params[4] = job.rap
+    params[20] = job.pdr
+    return params
+
+
+def run_job(job: NodalJob, nodal_path: Path, template: List[Union[str, float]],
+            executable: str = NODAL_EXECUTABLE) -> JobResult:
+    """Run a job in a fresh copy of the Nodal directory and collect its log into the case folder.
+
+    Outputs of the cycle shared with a base are unlinked first, so Nodal writes new files.
+    """
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="nodal_") as tmp:
+        sandbox = Path(tmp) / "nodal"
+        shutil.copytree(nodal_path, sandbox)
+        write_param63(job_params(template, job, sandbox), sandbox / PARAM_FILE)
+        # Outputs linked from a base get their own file instead of being overwritten through the link
+        release_outputs(job.case_path, job.cycle)
+
+        returncode, error = None, None
+        try:
+            completed = subprocess.run([str(sandbox / executable)], cwd=sandbox, stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT, encoding=NODAL_ENCODING, errors="replace")
+            returncode = completed.returncode
+            if returncode != 0:
+                error = f"{executable} exited with code {returncode}: {completed.stdout.strip()}"
+        except OSError as e:
+            error = f"Could not start {executable}: {e}"
+        except UnicodeError as e:
+            error = f"Could not decode the output of {executable}: {e}"
+
+        log_path = None
+        sandbox_log = sandbox / LOG_FILE
+        if sandbox_log.exists():
+            log_path = job.log_path
+            shutil.copyfile(sandbox_log, log_path)
+
+    return JobResult(job, returncode, time.perf_counter() - start, log_path, error)
+
+
+def run_jobs(jobs: Iterable[NodalJob], nodal_path: Path, workers: int = 1,
+             executable: str = NODAL_EXECUTABLE, force: bool = False) -> List[JobResult]:
+    """Run Nodal jobs concurrently, `workers` at a time, returning results in job order.
+
+    Jobs whose inputs and outputs match the case's run manifest are skipped
+    unless `force` is set. A failed job is logged and does not stop the others.
+    """
+    jobs = list(jobs)
+    nodal_path = Path(nodal_path).resolve()
+    template = read_param63(nodal_path / PARAM_FILE)
+    if not template:
+        raise FileNotFoundError(f"{PARAM_FILE} not found in {nodal_path}")
+
+    template_digest = template_hash(template)
+    manifests = {}
+    for job in jobs:
+        case_key = Path(job.case_path).resolve()
+        if case_key not in manifests:
+            manifests[case_key] = RunManifest(job.case_path)
+
+    def run(job: NodalJob) -> JobResult:
+        manifest = manifests[Path(job.case_path).resolve()]
+        inputs = job_inputs(job.case_path, job.cycle, job.rap, job.pdr, template_digest)
+        up_to_date, reason = manifest.check(job.case_path, job.cycle, inputs)
+        if up_to_date and not force:
+            logger.info(f"Skipping Nodal for {job}: {reason}.")
+            return JobResult(job, None, 0.0, skipped=True)
+        logger.info(f"Running Nodal for {job}: {'forced' if force else reason}.")
+
+        result = run_job(job, nodal_path, template, executable)
+        if result.ok:
+            logger.info(f"Nodal finished for {job} in {result.elapsed:.1f} s.")
+            manifest.record(job.case_path, job.cycle, inputs)
+        else:
+            logger.error(f"Nodal failed for {job}: {result.error}")
+        if result.log_path is not None:
+            with open(result.log_path, "r", encoding=NODAL_ENCODING, errors="replace") as file:
+                logger.info(f"{LOG_FILE} of {job}:\n{file.read()}")
+        else:
+            logger.warning(f"The file {LOG_FILE} was not found for {job}.")
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(run, jobs))
@@ -0,0 +1,209 @@
+"""
+Connection point screening: one scenario per candidate plant, Nodal runs for the
+cycles the plant changes, and a consolidated ranking of the candidates' TUST.
+Progress is kept in a state file so an interrupted screening resumes where it stopped.
+"""
+
+from dataclasses import dataclass
+import json
+import logging
+import os
+from pathlib import Path
+import shutil
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ger_edit import InsertGenerator, apply_ger_batch
+from models import GENERATOR_TYPE, Candidate
+from resolve import SOURCE_LABELS, SOURCE_TUH, resolve_case_candidates
+from scheduler import NodalJob, run_jobs
+from workspace import SCENARIO_MANIFEST, create_scenario
+
+logger = logging.getLogger(__name__)
+
+STATE_NAME = "screening_state.json"
+STATE_VERSION = 1
+RANKING_NAME = "screening_ranking.csv"
+
+CREATED = "created"
+DONE = "done"
+FAILED = "failed"
+
+
+def _optional_bus(value: Any) -> Optional[int]:
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value == "":
+        return None
+    return int(value)
+
+
+def read_candidates(file_path: Path) -> List[Candidate]:
+    """Read the candidates table (.csv or .xlsx) with the NOME, MUST, COD and BUS01/BUS02 _ONS/_EPE columns."""
+    file_path = Path(file_path)
+    if file_path.suffix.lower() in (".xlsx", ".xls"):
+        table = pd.read_excel(file_path)
+    else:
+        table = pd.read_csv(file_path)
+    table.columns = [str(column).strip().upper() for column in table.columns]
+    candidates = []
+    for row in table.to_dict("records"):
+        candidates.append(Candidate(
+            name=str(row["NOME"]).strip(),
+            must=float(row["MUST"]),
+            cod=int(row["COD"]),
+            bus01_ons=int(row["BUS01_ONS"]),
+            bus01_epe=int(row["BUS01_EPE"]),
+            bus02_ons=_optional_bus(row.get("BUS02_ONS")),
+            bus02_epe=_optional_bus(row.get("BUS02_EPE")),
+        ))
+    names = [candidate.name for candidate in candidates]
+    duplicated = sorted({name for name in names if names.count(name) > 1})
+    if duplicated:
+        raise ValueError(f"Duplicated candidates in {file_path}: {', '.join(duplicated)}")
+    return candidates
+
+
+class ScreeningState:
+    """Stage of each candidate of a screening, saved after every change."""
+
+    def __init__(self, output_dir: Path):
+        self.path = Path(output_dir) / STATE_NAME
+        self.candidates: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r") as file:
+                    content = json.load(file)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable screening state {self.path}: {e}")
+                return
+            if content.get("version") == STATE_VERSION:
+                self.candidates = content.get("candidates", {})
+
+    def entry(self, candidate: Candidate) -> Dict[str, Any]:
+        """State of a candidate, reset when its data changed since it was recorded."""
+        entry = self.candidates.get(candidate.name)
+        if entry is None or entry.get("digest") != candidate.digest():
+            entry = self.candidates[candidate.name] = {"digest": candidate.digest(), "status": None}
+        return entry
+
+    def update(self, candidate: Candidate, **values: Any) -> None:
+        self.entry(candidate).update(values)
+        self.save()
+
+    def save(self) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as file:
+            json.dump({"version": STATE_VERSION, "candidates": self.candidates}, file, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def candidate_cycles(candidate: Candidate, cycle_years: Sequence[int]) -> List[int]:
+    """Cycles in which the candidate is in operation, the ones whose GER gets the new generator."""
+    return [year for year in cycle_years if year >= candidate.cod]
+
+
+def build_scenario(candidate: Candidate, base_path: Path, case_path: Path, cycle_years: Sequence[int]) -> None:
+    """Create the candidate's case as a scenario of the base with the plant inserted in its GER files."""
+    if case_path.exists():
+        # Left behind by an interrupted run: it may lack some GER edits
+        shutil.rmtree(case_path)
+    operations = {}
+    for year in candidate_cycles(candidate, cycle_years):
+        bus01, bus02 = candidate.buses(year)
+        operations[year] = [InsertGenerator(candidate.name, candidate.must, bus01, bus02, type=GENERATOR_TYPE)]
+    create_scenario(base_path, case_path, modified=[f"{year}-{year + 1}.GER" for year in operations])
+    apply_ger_batch(case_path, operations)
+
+
+def candidate_tust(candidate: Candidate, case_path: Path, cycle_years: Sequence[int]) -> Dict[int, Optional[float]]:
+    """TUST of a candidate per cycle: the generator's TUST once in operation, the mean TUST of its buses before.
+
+    Read from the case's TUH and NOS files; the cycles before the COD are not
+    rerun, so their NOS is the base's, shared through the scenario's links. A
+    cycle in operation without the generator in its TUH gets None.
+    """
+    row = resolve_case_candidates(case_path, [candidate], cycle_years).iloc[0]
+    tust = {year: None if np.isnan(row[str(year)]) else float(row[str(year)]) for year in cycle_years}
+    for year in candidate_cycles(candidate, cycle_years):
+        if row[f"SOURCE_{year}"] != SOURCE_LABELS[SOURCE_TUH]:
+            tust[year] = None
+    return tust
+
+
+def ranking_table(candidates: Sequence[Candidate], state: ScreeningState, cycle_years: Sequence[int]) -> pd.DataFrame:
+    """One row per screened candidate with its TUST per cycle, ranked by the mean TUST."""
+    rows = []
+    for candidate in candidates:
+        entry = state.entry(candidate)
+        if entry.get("status") != DONE:
+            continue
+        tust = {int(year): value for year, value in entry["tust"].items()}
+        values = [tust.get(year) for year in cycle_years]
+        known = [value for value in values if value is not None]
+        row = {"NOME": candidate.name, "MUST": candidate.must, "COD": candidate.cod}
+        row.update({str(year): value for year, value in zip(cycle_years, values)})
+        row["MEAN"] = sum(known) / len(known) if known else None
+        rows.append(row)
+    table = pd.DataFrame(rows, columns=["NOME", "MUST", "COD"] + [str(year) for year in cycle_years] + ["MEAN"])
+    table = table.sort_values("MEAN", na_position="last", kind="stable").reset_index(drop=True)
+    table.insert(0, "RANK", range(1, len(table) + 1))
+    return table
+
+
+def run_screening(candidates_path: Path, base_path: Path, output_dir: Path, nodal_path: Path,
+                  cycle_years: Sequence[int], rap: Sequence[float], pdr: Sequence[float],
+                  workers: int = 1, force: bool = False) -> pd.DataFrame:
+    """Screen every candidate of a table against a base and write the ranking to screening_ranking.csv.
+
+    Each candidate gets the case {output_dir}/{base name}_{candidate}. Candidates
+    already screened with the same data are not redone, and the Nodal runs of
+    an interrupted screening are skipped through the run manifest of each case.
+    With `force`, every candidate is screened again.
+    """
+    base_path, output_dir = Path(base_path).resolve(), Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    candidates = read_candidates(candidates_path)
+    state = ScreeningState(output_dir)
+    rap_by_year = dict(zip(cycle_years, rap))
+    pdr_by_year = dict(zip(cycle_years, pdr))
+
+    pending = [candidate for candidate in candidates if force or state.entry(candidate).get("status") != DONE]
+    logger.info(f"{len(candidates) - len(pending)} of {len(candidates)} candidates already screened.")
+
+    cases, jobs = {}, []
+    for candidate in pending:
+        case_path = output_dir / f"{base_path.name}_{candidate.name}"
+        cases[candidate.name] = case_path
+        entry = state.entry(candidate)
+        if force or entry.get("status") != CREATED or not (case_path / SCENARIO_MANIFEST).exists():
+            try:
+                build_scenario(candidate, base_path, case_path, cycle_years)
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not build the case of {candidate.name}: {e}")
+                state.update(candidate, status=FAILED, error=str(e))
+                continue
+            state.update(candidate, status=CREATED, case=str(case_path), error=None)
+        jobs.extend(NodalJob(case_path, year, rap_by_year[year], pdr_by_year[year])
+                    for year in candidate_cycles(candidate, cycle_years))
+
+    results = run_jobs(jobs, nodal_path, workers=workers, force=force) if jobs else []
+    failed = {result.job.case_path for result in results if not result.ok}
+
+    for candidate in pending:
+        case_path = cases[candidate.name]
+        if state.entry(candidate).get("status") != CREATED:
+            continue
+        if case_path in failed:
+            state.update(candidate, error="Nodal failed")
+            continue
+        tust = candidate_tust(candidate, case_path, cycle_years)
+        missing = [year for year, value in tust.items() if value is None]
+        if missing:
+            logger.warning(f"No TUST for {candidate.name} in cycles {', '.join(map(str, missing))}.")
+        state.update(candidate, status=DONE, tust={str(year): value for year, value in tust.items()}, error=None)
+
+    ranking = ranking_table(candidates, state, list(cycle_years))
+    ranking.to_csv(output_dir / RANKING_NAME, index=False, float_format="%.4f")
+    logger.info(f"Ranking of {len(ranking)} candidates written to {output_dir / RANKING_NAME}")
+    return ranking
@@ -0,0 +1,71 @@
+"""
+Search index over generator names and CEGs.
+Prefix queries use a sorted key array; longer queries intersect trigram
+posting lists and confirm the substring on the few remaining candidates.
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+MIN_TRIGRAM_QUERY = 3
+
+
+def _trigrams(text: str) -> List[str]:
+    return [text[i:i + 3] for i in range(len(text) - 2)]
+
+
+class SearchIndex:
+    """Case-insensitive search over the names and CEGs of a store's generators.
+
+    Results are generator rows: prefix matches of the name or CEG first, then
+    the other substring matches, each group in row order.
+    """
+
+    def __init__(self, names: Sequence[str], cegs: Sequence[str]):
+        self.keys = [f"{name}\n{ceg}".lower() for name, ceg in zip(names, cegs)]
+        fields = [(str(name).lower(), row) for row, name in enumerate(names)]
+        fields += [(str(ceg).lower(), row) for row, ceg in enumerate(cegs) if ceg]
+        fields.sort()
+        self._sorted_fields = np.array([field for field, _ in fields], dtype=object)
+        self._sorted_rows = np.array([row for _, row in fields], dtype=np.int64)
+
+        postings: Dict[str, List[int]] = {}
+        for row, key in enumerate(self.keys):
+            for trigram in set(_trigrams(key)):
+                postings.setdefault(trigram, []).append(row)
+        self._postings = {trigram: np.array(rows, dtype=np.int64) for trigram, rows in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def prefix(self, query: str) -> np.ndarray:
+        """Rows whose name or CEG starts with `query`."""
+        query = query.lower()
+        start = np.searchsorted(self._sorted_fields, query, side="left")
+        end = np.searchsorted(self._sorted_fields, query + "\uffff", side="left")
+        return np.unique(self._sorted_rows[start:end])
+
+    def contains(self, query: str) -> np.ndarray:
+        """Rows whose name or CEG contains `query` (prefix matches only for queries under three characters)."""
+        query = query.lower()
+        if len(query) < MIN_TRIGRAM_QUERY:
+            return self.prefix(query)
+        candidates = None
+        for trigram in sorted(set(_trigrams(query)), key=lambda gram: len(self._postings.get(gram, ()))):
+            rows = self._postings.get(trigram)
+            if rows is None:
+                return np.empty(0, dtype=np.int64)
+            candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+            if len(candidates) == 0:
+                break
+        return np.array([row for row in candidates.tolist() if query in self.keys[row]], dtype=np.int64)
+
+    def search(self, query: str) -> np.ndarray:
+        """Rows matching `query`, prefix matches first; every row for an empty query."""
+        query = query.strip()
+        if not query:
+            return np.arange(len(self), dtype=np.int64)
+        prefix = self.prefix(query)
+        others = np.setdiff1d(self.contains(query), prefix, assume_unique=True)
+        return np.concatenate((prefix, others))
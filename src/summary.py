@@ -0,0 +1,83 @@
+"""
+Aggregates shown by the dashboard, computed once per loaded base.
+The tabs only read from a Summary, so widget interactions do no work over the
+generator tables.
+"""
+
+from dataclasses import dataclass, field
+import threading
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from aggregation import aggregate_tust
+
+CYCLE_FIELDS = ("rap", "mustg", "mustp", "mustfp", "teug", "teup", "teufp")
+
+
+@dataclass
+class Summary:
+    """Global and grouped TUST means, MUST by type and year, and the cycle data as arrays.
+
+    Cycle values are float arrays aligned with `cycle_years`, NaN where a cycle
+    has no value. TUST statistics are computed per grouping on first request.
+    """
+    mean_tust: float
+    avg_tust_by_subsystem: Dict[str, Dict[int, float]]
+    avg_tust_by_uf: Dict[str, Dict[int, float]]
+    avg_tust_by_type: Dict[str, Dict[int, float]]
+    must_years: np.ndarray
+    must_by_type: Dict[str, np.ndarray]
+    must_total: np.ndarray
+    cycle_years: np.ndarray
+    cycle_values: Dict[str, np.ndarray]
+    _store: object = field(repr=False)
+    _years: frozenset = field(repr=False)
+    _statistics: Dict[Tuple[str, ...], pd.DataFrame] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def statistics(self, by: Sequence[str]) -> pd.DataFrame:
+        """TUST statistics grouped by `by` (see aggregate_tust), kept per grouping."""
+        key = tuple(by)
+        with self._lock:
+            table = self._statistics.get(key)
+        if table is None:
+            table = aggregate_tust(self._store, by=key, years=self._years)
+            with self._lock:
+                self._statistics[key] = table
+        return table
+
+
+def build_summary(database, subsystems: Sequence[str], ufs: Sequence[str], years: Sequence[int]) -> Summary:
+    """Compute the summary of a database; `subsystems` and `ufs` split the grouped means by kind."""
+    store = database.columnar()
+    avg_tust = database.calculate_avg_tust()
+    subsystems, ufs = set(subsystems), set(ufs)
+
+    must_by_type, must_total = database.calculate_must_values() if database.generators else ({}, {})
+    must_years = np.array(list(next(iter(must_by_type.values()), {}).keys()), dtype=np.int64)
+    must_by_type = {type_: np.array([values.get(year, 0) for year in must_years.tolist()], dtype=float)
+                    for type_, values in must_by_type.items()}
+
+    cycle_data = database.cycle_data
+    cycle_values = {
+        name: np.array([np.nan if getattr(data, name) is None else getattr(data, name) for data in cycle_data],
+                       dtype=float)
+        for name in CYCLE_FIELDS
+    }
+
+    return Summary(
+        mean_tust=store.mean_tust(),
+        avg_tust_by_subsystem={key: values for key, values in avg_tust.items() if key in subsystems},
+        avg_tust_by_uf={key: values for key, values in avg_tust.items() if key in ufs},
+        avg_tust_by_type={key: values for key, values in avg_tust.items()
+                          if key not in subsystems and key not in ufs},
+        must_years=must_years,
+        must_by_type=must_by_type,
+        must_total=np.array([must_total[year] for year in must_years.tolist()], dtype=float),
+        cycle_years=np.array([data.year for data in cycle_data], dtype=np.int64),
+        cycle_values=cycle_values,
+        _store=store,
+        _years=frozenset(years),
+    )
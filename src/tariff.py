@@ -0,0 +1,69 @@
+"""
+Tariff control simulation: TUST indexed by the IAT and bounded by the 80/20
+smoothing band, for many generators and IAT / risk-expansion scenarios at once.
+"""
+
+from dataclasses import dataclass
+from typing import Sequence, Union
+
+import numpy as np
+
+# Weights of the previous controlled TUST and of the nominal TUST in the centre of the band
+PREVIOUS_WEIGHT = 0.8
+NOMINAL_WEIGHT = 0.2
+
+Rates = Union[float, Sequence[float], np.ndarray]
+
+
+@dataclass
+class TariffSimulation:
+    """(scenario x generator x year) nominal TUST, controlled TUST and band limits, NaN where TUST is missing.
+
+    Scenario `k` combines iat[k] and risk_expansion[k], in percent.
+    """
+    years: np.ndarray
+    iat: np.ndarray
+    risk_expansion: np.ndarray
+    nominal: np.ndarray
+    controlled: np.ndarray
+    upper: np.ndarray
+    lower: np.ndarray
+
+
+def simulate_tariff(tust: np.ndarray, years: Sequence[int], iat: Rates, risk_expansion: Rates) -> TariffSimulation:
+    """Simulate the tariff control of a (generator x year) TUST matrix under every scenario.
+
+    For each generator, the known cycles are indexed by a cumulative IAT that
+    is (1 + iat)^2 in its first known cycle and grows by (1 + iat) per known
+    cycle. The first controlled value is the nominal one; every later one is
+    the nominal TUST clamped to a band of +-(iat + risk_expansion)% around
+    0.8 x the previous controlled value + 0.2 x the nominal value.
+
+    `iat` and `risk_expansion` are broadcast against each other to give the
+    scenarios. The cycles run in sequence; generators and scenarios are
+    computed together.
+    """
+    tust = np.atleast_2d(np.asarray(tust, dtype=float))
+    iat, risk_expansion = np.broadcast_arrays(np.atleast_1d(np.asarray(iat, dtype=float)),
+                                              np.atleast_1d(np.asarray(risk_expansion, dtype=float)))
+    rate = 1 + iat[:, None, None] / 100
+    limit = (iat + risk_expansion)[:, None] / 100
+
+    known = ~np.isnan(tust)
+    steps = np.cumsum(known, axis=1)
+    nominal = tust[None, :, :] * rate ** (steps + 1)[None, :, :]
+
+    controlled = np.full(nominal.shape, np.nan)
+    upper, lower = controlled.copy(), controlled.copy()
+    previous = np.full(nominal.shape[:2], np.nan)
+    for j in range(tust.shape[1]):
+        value = nominal[:, :, j]
+        centre = previous * PREVIOUS_WEIGHT + value * NOMINAL_WEIGHT
+        first = np.isnan(previous)
+        upper[:, :, j] = np.where(first, value, centre * (1 + limit))
+        lower[:, :, j] = np.where(first, value, centre * (1 - limit))
+        controlled[:, :, j] = np.where(first, value, np.maximum(np.minimum(value, upper[:, :, j]), lower[:, :, j]))
+        present = known[None, :, j]
+        previous = np.where(present, controlled[:, :, j], previous)
+
+    return TariffSimulation(np.asarray(years), iat, risk_expansion, nominal, controlled, upper, lower)
@@ -0,0 +1,221 @@
+"""
+Scenario case folders derived from a base case.
+The inputs a run only reads and the Nodal outputs of earlier runs are hardlinked
+(or symlinked, or copied as a last resort) into the scenario; a Nodal run
+releases the links of its cycle's outputs before writing them. The files a
+study modifies and every other file get their own copy, cloned with a reflink
+where the filesystem supports it.
+"""
+
+from dataclasses import dataclass, field
+import errno
+import fnmatch
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+import shutil
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from cache import CACHE_DIR_NAME
+from manifest import MANIFEST_NAME, OUTPUT_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+SCENARIO_MANIFEST = "autotust_scenario.json"
+SCENARIO_VERSION = 1
+
+# Files shared with the base: the inputs Nodal and AutoTUST only read and the
+# Nodal outputs. GER files are rewritten by ger_edit through a temporary file
+# moved over the link, and a Nodal run unlinks its cycle's outputs first (see
+# release_outputs), so neither writes into the base's copy. Anything else could
+# be written in place by a run, through a hardlink into the base, so it is copied.
+SHARED_PATTERNS = ("*.dc", "*.GER", "param*", "*.TUH", "*.NOS", "*.R63", "*.R61", "*.R60")
+# Left out of a scenario: AutoTUST rebuilds them, and the run manifest refers to the base's own files
+SKIPPED_PATTERNS = (MANIFEST_NAME, SCENARIO_MANIFEST, "*.tmp")
+SKIPPED_DIRS = (CACHE_DIR_NAME,)
+
+# Serializes the scenario manifest updates of concurrent Nodal jobs
+_scenario_lock = threading.Lock()
+
+# Linux FICLONE ioctl: share the source extents with the destination (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+
+def _matches(name: str, patterns: Iterable[str]) -> bool:
+    name = name.upper()
+    return any(fnmatch.fnmatchcase(name, pattern.upper()) for pattern in patterns)
+
+
+def is_shared(name: str) -> bool:
+    """Whether a file name is a read-only input that a scenario can share with its base."""
+    return _matches(name, SHARED_PATTERNS)
+
+
+def is_linked(file_path: Path) -> bool:
+    """Whether a file is a symlink or has other hardlinks, i.e. may be shared with a base."""
+    file_path = Path(file_path)
+    return file_path.is_symlink() or (file_path.exists() and file_path.stat().st_nlink > 1)
+
+
+def link_file(source: Path, target: Path) -> str:
+    """Share a file with a hardlink, falling back to a symlink and then to a copy. Returns the method used."""
+    try:
+        os.link(source, target)
+        return "hardlink"
+    except OSError as e:
+        logger.debug(f"Hardlink of {source} failed ({e}), trying a symlink.")
+    try:
+        os.symlink(Path(source).resolve(), target)
+        return "symlink"
+    except OSError as e:
+        logger.debug(f"Symlink of {source} failed ({e}), copying.")
+    shutil.copy2(source, target)
+    return "copy"
+
+
+def reflink_or_copy(source: Path, target: Path) -> str:
+    """Copy a file as a reflink when the filesystem supports it, else byte by byte. Returns the method used."""
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+    if fcntl is not None:
+        with open(source, "rb") as source_file, open(target, "wb") as target_file:
+            try:
+                fcntl.ioctl(target_file.fileno(), FICLONE, source_file.fileno())
+                cloned = True
+            except OSError as e:
+                if e.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS):
+                    raise
+                cloned = False
+        if cloned:
+            shutil.copystat(source, target)
+            return "reflink"
+    shutil.copy2(source, target)
+    return "copy"
+
+
+def materialize(file_path: Path) -> str:
+    """Give a linked file its own content, so it can be modified without touching the base.
+
+    The private copy is written next to the file and moved over it. Returns the
+    method used, or "own" when the file was not shared.
+    """
+    file_path = Path(file_path)
+    if not is_linked(file_path):
+        return "own"
+    source = file_path.resolve()
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+    try:
+        method = reflink_or_copy(source, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return method
+
+
+@dataclass
+class Scenario:
+    """A case folder built from a parent base: which files are shared and which are its own."""
+    path: Path
+    parent: Path
+    created: str = ""
+    linked: Dict[str, str] = field(default_factory=dict)
+    materialized: Dict[str, str] = field(default_factory=dict)
+
+    def materialize(self, names: Iterable[str]) -> None:
+        """Give the named files (relative to the case folder) their own copy and record them."""
+        for name in names:
+            if not (self.path / name).exists():
+                logger.warning(f"{name} is not in scenario {self.path}.")
+                continue
+            self.materialized[name] = materialize(self.path / name)
+            self.linked.pop(name, None)
+        self.save()
+
+    def save(self) -> None:
+        content = {"version": SCENARIO_VERSION, "parent": str(self.parent), "created": self.created,
+                   "linked": self.linked, "materialized": self.materialized}
+        manifest_path = self.path / SCENARIO_MANIFEST
+        tmp_path = manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(content, file, indent=2, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+
+    @classmethod
+    def load(cls, case_path: Path) -> Optional["Scenario"]:
+        """Read the scenario manifest of a case folder, or None if it is not a scenario."""
+        manifest_path = Path(case_path) / SCENARIO_MANIFEST
+        if not manifest_path.exists():
+            return None
+        with open(manifest_path, "r") as file:
+            content = json.load(file)
+        if content.get("version") != SCENARIO_VERSION:
+            logger.warning(f"Ignoring scenario manifest {manifest_path} of version {content.get('version')}.")
+            return None
+        return cls(Path(case_path), Path(content["parent"]), content.get("created", ""),
+                   content.get("linked", {}), content.get("materialized", {}))
+
+
+def create_scenario(base_path: Path, case_path: Path, modified: Iterable[str] = ()) -> Scenario:
+    """Build a scenario case folder from a base.
+
+    The inputs of the base (.dc, GER and param files) and its Nodal outputs
+    (TUH, NOS and summary reports) are linked into `case_path`; the `modified`
+    files (relative to the base) and every other file get their own copy. The
+    AutoTUST cache and manifests are left out. The parent base is recorded in autotust_scenario.json.
+    """
+    base_path, case_path = Path(base_path).resolve(), Path(case_path)
+    modified = set(modified)
+    case_path.mkdir(parents=True, exist_ok=False)
+    scenario = Scenario(case_path, base_path, datetime.now().isoformat(timespec="seconds"))
+
+    for directory, dirnames, filenames in os.walk(base_path):
+        dirnames[:] = [name for name in dirnames if name not in SKIPPED_DIRS]
+        relative_dir = Path(directory).relative_to(base_path)
+        (case_path / relative_dir).mkdir(exist_ok=True)
+        for filename in filenames:
+            if _matches(filename, SKIPPED_PATTERNS):
+                continue
+            relative = (relative_dir / filename).as_posix()
+            source, target = Path(directory) / filename, case_path / relative_dir / filename
+            if relative in modified or not is_shared(filename):
+                scenario.materialized[relative] = reflink_or_copy(source, target)
+            else:
+                scenario.linked[relative] = link_file(source, target)
+
+    missing = modified - set(scenario.materialized)
+    if missing:
+        logger.warning(f"Files not found in base {base_path}: {', '.join(sorted(missing))}")
+    scenario.save()
+    methods = list(scenario.linked.values())
+    logger.info(f"Scenario {case_path}: {methods.count('hardlink')} hardlinks, {methods.count('symlink')} symlinks, "
+                f"{methods.count('copy')} copies, {len(scenario.materialized)} own files.")
+    return scenario
+
+
+def release_outputs(case_path: Path, cycle: int) -> List[str]:
+    """Unlink the Nodal outputs of a cycle that are shared with a base, before Nodal rewrites them.
+
+    Nodal writes its outputs in place, which through a link would change the
+    base's files. Files the case owns are left alone. Returns the released names.
+    """
+    case_path = Path(case_path)
+    released = []
+    for ext in OUTPUT_EXTENSIONS:
+        file_path = case_path / f"{cycle}-{cycle + 1}.{ext}"
+        if is_linked(file_path):
+            file_path.unlink()
+            released.append(file_path.name)
+    if released:
+        with _scenario_lock:
+            scenario = Scenario.load(case_path)
+            if scenario is not None:
+                for name in released:
+                    scenario.linked.pop(name, None)
+                scenario.save()
+    return released